@@ -24,36 +24,42 @@
 
 __author__ = "chenty"
 
+import asyncio
+import functools
 import json
 import os
 from os.path import join
 import shutil
-import threading
+import signal
 import time
 import zipfile
 import zlib
 import subprocess
+from asyncio.subprocess import PIPE
 import socket
 import grp
 import pwd
 
-from rpc.judicator_rpc.ttypes import ReturnCode
+from rpc.judicator_rpc.ttypes import ReturnCode, Resource
 
 from utility.function import get_logger, try_with_times, check_empty_dir
-from utility.task import TASK_STATUS, check_task_dict_size
+from utility.task import TASK_STATUS, TASK_DICTIONARY_MAX_SIZE, TASK_RESOURCES, task_dict_size, blob_digest
 from utility.etcd.proxy import generate_local_etcd_proxy
-from utility.rpc import extract, generate, select_from_etcd_and_call
+from utility.rpc import extract, generate, JudicatorPool
+from utility.cache import DatasetCache, link_tree
+from utility.cgroup import TaskCGroups
 
 
-# Global dictionary for all tasks
+# Global dictionary for all tasks, only accessed in the event loop
 tasks = {}
-# The lock for the dictionary
-lock = threading.Lock()
+# Seconds to wait for outputs to be closed after subprocesses exit
+CAPTURE_DRAIN_TIMEOUT = 5
 
-def change_user(config):
+def change_user(config, cgroup=None):
     """
     A wrapper for changing user of subprocess according to given configuration
     :param config: The configuration json
+    :param cgroup: Path to the cgroup which the subprocess is moved into before changing user, or None
     :return: Wrapped function
     """
     def change():
@@ -61,276 +67,697 @@ def change_user(config):
         Change the user for subprocess
         :return: None
         """
+        if cgroup:
+            with open(join(cgroup, "cgroup.procs"), "w") as f:
+                f.write(str(os.getpid()))
         os.setgid(config["task"]["user"]["gid"])
         os.setuid(config["task"]["user"]["uid"])
         return
     return change
 
-def execute(id, config, logger):
+def fetch_blob(digest, judicator_pool):
     """
-    Target function for execute daemon threads
-    Execute a job
+    Fetch the content of a blob from judicator
+    :param digest: Digest of the blob, or None if there is no blob
+    :param judicator_pool: Pool of connections to judicators
+    :return: The content, empty if there is no blob
+    """
+    if not digest:
+        return b""
+    res = judicator_pool.call("get_blob", digest)
+    if res.result != ReturnCode.OK:
+        raise Exception("Return code from judicator is not 0 but %d." % res.result)
+    if blob_digest(res.data) != digest:
+        raise Exception("Digest of fetched blob %s mismatched." % digest)
+    return res.data
+
+def prepare(task, paths, config, judicator_pool, dataset_cache, logger):
+    """
+    Generate all directories and files needed by a task
+    This is blocking and run in the thread pool of the event loop
+    :param task: The task
+    :param paths: Dictionary of paths of the task
+    :param config: Configuration json
+    :param judicator_pool: Pool of connections to judicators, for fetching blobs
+    :param dataset_cache: Cache of extracted execute data, or None if not enabled
+    :param logger: The logger object
+    :return: None
+    """
+    # Create all necessary dirs and unzip sources
+    logger.info("Generating directories for task %s." % task["id"])
+    os.mkdir(paths["work_dir"])
+    os.mkdir(paths["download_dir"])
+    os.mkdir(paths["source_dir"])
+    os.mkdir(paths["data_dir"])
+
+    # Generate all files for compilation
+    logger.info("Generating files for task %s." % task["id"])
+    # Compile source, fetched from the blob store if only the digest is given
+    source = task["compile"]["source"] or fetch_blob(task["compile"]["source_digest"], judicator_pool)
+    if source:
+        with open(paths["compile_source"], "wb") as f:
+            f.write(source)
+        with zipfile.ZipFile(paths["compile_source"], "r") as f:
+            f.extractall(paths["source_dir"])
+    # Compile command
+    with open(paths["compile_command"], "wb") as f:
+        if task["compile"]["command"]:
+            f.write(zlib.decompress(task["compile"]["command"]))
+
+    # Generate all files for execution
+    # Execute input
+    with open(paths["execute_input"], "wb") as f:
+        if task["execute"]["input"]:
+            f.write(zlib.decompress(task["execute"]["input"]))
+    # Execute data, extracted here only if it is not going to be taken from the cache
+    data_digest = task["execute"]["data_digest"]
+    if not data_digest and task["execute"]["data"]:
+        data_digest = blob_digest(task["execute"]["data"])
+    if not dataset_cache and data_digest:
+        data = task["execute"]["data"] or fetch_blob(data_digest, judicator_pool)
+        with open(paths["execute_data"], "wb") as f:
+            f.write(data)
+        with zipfile.ZipFile(paths["execute_data"], "r") as f:
+            f.extractall(paths["data_dir"])
+    # Execute command
+    with open(paths["execute_command"], "wb") as f:
+        if task["execute"]["command"]:
+            f.write(zlib.decompress(task["execute"]["command"]))
+    # Changing the owner of source dir
+    subprocess.call(
+        ["chown", "-R", str(config["task"]["user"]["uid"]) + ":" + str(config["task"]["user"]["gid"]),
+         paths["source_dir"]]
+    )
+    # Link files of cached execute data after changing the owner, so that they are not owned by tasks
+    # Tasks run as root or the user of the executor could still modify the cache through links, so they get copies
+    # Directories created and files copied are owned by tasks, as if they were extracted before changing the owner
+    if dataset_cache and data_digest:
+        dataset = dataset_cache.acquire(
+            data_digest,
+            lambda: task["execute"]["data"] or fetch_blob(data_digest, judicator_pool)
+        )
+        try:
+            link_tree(
+                dataset,
+                paths["data_dir"],
+                config["task"]["user"]["uid"] in (0, os.getuid()),
+                (config["task"]["user"]["uid"], config["task"]["user"]["gid"])
+            )
+        finally:
+            dataset_cache.release(data_digest)
+    logger.info("Generated all directories and files for task %s." % task["id"])
+    return
+
+def snapshot(task):
+    """
+    Copy a task without its subprocess, coroutine and published snapshots, which are not part of the task
+    :param task: The task
+    :return: The copy
+    """
+    res = dict(task)
+    for k in ("process", "coroutine", "brief", "complete"):
+        res.pop(k, None)
+    return res
+
+def set_status(task, status):
+    """
+    Change the status of a running task, and publish a new brief snapshot of it for reporting
+    :param task: The task
+    :param status: The new status
+    :return: None
+    """
+    task["status"] = status
+    task["brief"] = generate(task, True)
+    return
+
+def finish(task, coroutine):
+    """
+    Callback of a finished task coroutine
+    Publish the final snapshot of the task for reporting, and drop its compile and execute information
+    :param task: The task
+    :param coroutine: The finished coroutine
+    :return: None
+    """
+    task["complete"] = generate(task, False, False, False)
+    task["compile"] = None
+    task["execute"] = None
+    return
+
+class OutputCapture(asyncio.SubprocessProtocol):
+    """
+    Protocol of the subprocess of a stage of a task, capturing its stdout and stderr compressed on the fly
+    The subprocess is killed once the compressed output exceeds the budget, so memory used is bounded
+    """
+    def __init__(self, budget, id, task_cgroups, logger):
+        """
+        Initializer of the class
+        :param budget: Max total size in bytes of compressed stdout and stderr
+        :param id: Task id
+        :param task_cgroups: Cgroups of tasks, or None if not enabled
+        :param logger: The logger object
+        """
+        loop = asyncio.get_event_loop()
+        self.budget = budget
+        self.id = id
+        self.task_cgroups = task_cgroups
+        self.logger = logger
+        self.transport = None
+        self.size = 0
+        self.exceeded = False
+        self.compressors = (zlib.compressobj(), zlib.compressobj())
+        self.chunks = ([], [])
+        # Futures resolved when the subprocess exits, and when its stdout and stderr are closed
+        self.exited = loop.create_future()
+        self.closed = {1: loop.create_future(), 2: loop.create_future()}
+        return
+
+    @property
+    def pid(self):
+        """
+        Pid of the subprocess
+        """
+        return self.transport.get_pid()
+
+    @property
+    def returncode(self):
+        """
+        Exit code of the subprocess, None if it has not exited
+        """
+        return self.transport.get_returncode()
+
+    def connection_made(self, transport):
+        """
+        Callback of the subprocess being started
+        :param transport: Transport of the subprocess
+        :return: None
+        """
+        self.transport = transport
+        return
+
+    def pipe_data_received(self, fd, data):
+        """
+        Callback of data read from stdout or stderr, which is compressed
+        Once the budget is exceeded, the rest is discarded
+        :param fd: 1 for stdout, 2 for stderr
+        :param data: The data
+        :return: None
+        """
+        if self.exceeded:
+            return
+        compressed = self.compressors[fd - 1].compress(data)
+        self.chunks[fd - 1].append(compressed)
+        self.size += len(compressed)
+        if self.size > self.budget:
+            self.exceeded = True
+            self.kill()
+        return
+
+    def pipe_connection_lost(self, fd, exc):
+        """
+        Callback of stdout or stderr being closed
+        :param fd: 1 for stdout, 2 for stderr
+        :param exc: Exception closing it, or None
+        :return: None
+        """
+        if fd in self.closed and not self.closed[fd].done():
+            self.closed[fd].set_result(None)
+        return
+
+    def process_exited(self):
+        """
+        Callback of the subprocess exiting, whose pipes can still be held open by its descendants
+        :return: None
+        """
+        if not self.exited.done():
+            self.exited.set_result(self.transport.get_returncode())
+        return
+
+    def kill(self):
+        """
+        Kill the subprocess with its process group, and all processes in the cgroup of the task if enabled
+        Only the cgroup reaches descendants started in new sessions, like daemons
+        :return: None
+        """
+        kill_process(self)
+        if self.task_cgroups:
+            try:
+                self.task_cgroups.kill(self.id)
+            except:
+                self.logger.error("Failed to kill cgroup of task %s." % self.id, exc_info=True)
+        return
+
+    async def finish(self):
+        """
+        Wait for stdout and stderr to be closed, and get the compressed output
+        Descendants of the subprocess still holding them open after a while are killed
+        If they can not be killed, the pipes are closed and the rest of the output is lost
+        :return: Tuple, (compressed stdout, compressed stderr, if the budget is exceeded)
+        """
+        _, pending = await asyncio.wait(list(self.closed.values()), timeout=CAPTURE_DRAIN_TIMEOUT)
+        if pending:
+            self.kill()
+            _, pending = await asyncio.wait(pending, timeout=CAPTURE_DRAIN_TIMEOUT)
+        if pending:
+            self.logger.warning("Closed output of task %s held open by processes not killed." % self.id)
+        # Close the pipes left open and the transport, which has exited
+        self.transport.close()
+        output = [b"".join(self.chunks[i]) + self.compressors[i].flush() for i in (0, 1)]
+        if len(output[0]) + len(output[1]) > self.budget:
+            self.exceeded = True
+        return output[0], output[1], self.exceeded
+
+def output_budget(task):
+    """
+    Get the max total size of compressed outputs which can be added to a task
+    :param task: Copy of the task, with outputs of the current stage being empty
+    :return: The budget in bytes
+    """
+    return TASK_DICTIONARY_MAX_SIZE - 1 - task_dict_size(task)
+
+def process_group_alive(pgid):
+    """
+    Check whether a process group still has any member, by status of all processes in /proc
+    :param pgid: Id of the process group
+    :return: The result
+    """
+    for name in os.listdir("/proc"):
+        if not name.isdigit():
+            continue
+        try:
+            with open(join("/proc", name, "stat"), "r") as f:
+                # The command name in parentheses may contain spaces, and the group id is the third field after it
+                if int(f.read().rsplit(")", 1)[1].split()[2]) == pgid:
+                    return True
+        except (OSError, IndexError, ValueError):
+            continue
+    return False
+
+def kill_process(process):
+    """
+    Kill the subprocess of a stage of a task, together with all processes it started in its session
+    Processes left running in the background would otherwise keep output pipes open
+    Once the subprocess is reaped, its pid may be reused by an unrelated process, so its process group is only killed
+    if it still has members, which keep the pid from being reused
+    :param process: Output capture of the subprocess
+    :return: None
+    """
+    if process.returncode is not None and not process_group_alive(process.pid):
+        return
+    try:
+        os.killpg(process.pid, signal.SIGKILL)
+    except ProcessLookupError:
+        pass
+    return
+
+def clean(id, work_dir, task_cgroups):
+    """
+    Remove the work directory and the cgroup of a task
+    This is blocking and run in the thread pool of the event loop
+    :param id: Task id
+    :param work_dir: The work directory
+    :param task_cgroups: Cgroups of tasks, or None if not enabled
+    :return: None
+    """
+    shutil.rmtree(work_dir)
+    if task_cgroups:
+        task_cgroups.remove(id)
+    return
+
+def account(task, task_cgroups):
+    """
+    Add resource usage measured by the cgroup of a task into its result
+    :param task: The task
+    :param task_cgroups: Cgroups of tasks, or None if not enabled
+    :return: None
+    """
+    if task_cgroups:
+        task["result"]["cpu_time"], task["result"]["memory_peak"] = task_cgroups.usage(task["id"])
+    return
+
+async def start_process(task, command, stdin, capture, config, cgroup):
+    """
+    Start the subprocess of a stage of a task, unless the task has been cancelled
+    The subprocess is killed at once if the task is cancelled while it is being started
+    :param task: The task
+    :param command: The command file run by bash
+    :param stdin: Stdin of the subprocess, or None
+    :param capture: Output capture, which becomes the protocol of the subprocess
+    :param config: Configuration json
+    :param cgroup: Path to the cgroup of the task, or None
+    :return: If the subprocess is started
+    """
+    if task["cancel"]:
+        return False
+    _, task["process"] = await asyncio.get_event_loop().subprocess_exec(
+        lambda: capture,
+        "bash",
+        command,
+        stdin=stdin,
+        stdout=PIPE,
+        stderr=PIPE,
+        cwd=task["paths"]["source_dir"],
+        preexec_fn=change_user(config, cgroup),
+        start_new_session=True
+    )
+    if task["cancel"]:
+        kill_process(task["process"])
+    return True
+
+async def wait_exit(process, timeout=None):
+    """
+    Wait for a subprocess to exit
+    Unlike waiting for the transport to be closed, it does not wait for the pipes of the subprocess to be closed,
+    which can be held open by its descendants forever
+    :param process: Output capture of the subprocess
+    :param timeout: Timeout in seconds, None or 0 for unlimited
+    :return: The exit code
+    """
+    # The future is shielded, so that it is still resolved after a timeout
+    return await asyncio.wait_for(asyncio.shield(process.exited), timeout or None)
+
+async def wait_process(task, timeout, stage, logger):
+    """
+    Wait for the subprocess of a stage of a task with timeout, and kill it if it is not finished
+    The subprocess is cleared from the task once it is reaped
+    :param task: The task
+    :param timeout: Timeout in seconds, 0 for unlimited
+    :param stage: Name of the stage, compile or execution
+    :param logger: The logger object
+    :return: Tuple, (if the subprocess exits with 0, error message)
+    """
+    try:
+        if timeout == 0:
+            logger.info("Task %s has unlimited %s timeout." % (task["id"], stage))
+        else:
+            logger.info("Wait for task %s %s with timeout %d." % (task["id"], stage, timeout))
+        res = await wait_exit(task["process"], timeout)
+        # Clear the subprocess once it is reaped, so that it is not killed when the task is cancelled
+        task["process"] = None
+        logger.info("Finished %s of task %s with exit code %d." % (stage, task["id"], res))
+        return res == 0, b""
+    except asyncio.TimeoutError:
+        logger.warning("Exceeded time limit in %s of task %s." % (stage, task["id"]), exc_info=True)
+        error_message = b"Compile time out." if stage == "compile" else b"Execution time out."
+    except:
+        logger.error("Failed to finish %s of task %s." % (stage, task["id"]), exc_info=True)
+        error_message = b"Unknown error."
+    # Kill and wait for the subprocess
+    kill_process(task["process"])
+    await wait_exit(task["process"])
+    task["process"] = None
+    return False, error_message
+
+async def execute(id, config, judicator_pool, dataset_cache, task_cgroups, logger):
+    """
+    Coroutine executing a task
+    Blocking file operations are run in the thread pool of the event loop
     :param id: Job id
     :param config: Configuration json
+    :param judicator_pool: Pool of connections to judicators, for fetching blobs
+    :param dataset_cache: Cache of extracted execute data, or None if not enabled
+    :param task_cgroups: Cgroups of tasks, or None if not enabled
     :param logger: The logger object
     :return: None
     """
-    global tasks, lock
+    loop = asyncio.get_event_loop()
 
-    logger.info("Working thread for task %s started." % id)
+    logger.info("Coroutine for task %s started." % id)
     # Get the specified task
     task = tasks[id]
     task["result"] = {
         "compile_output": b"",
         "compile_error": b"",
         "execute_output": b"",
-        "execute_error": b""
+        "execute_error": b"",
+        "cpu_time": None,
+        "memory_peak": None
     }
 
     work_dir = join(config["data_dir"], task["id"])
     download_dir = join(work_dir, config["task"]["dir"]["download"])
     source_dir = join(work_dir, config["task"]["dir"]["source"])
-    data_dir = join(work_dir, config["task"]["dir"]["data"])
-    result_dir = join(work_dir, config["task"]["dir"]["result"])
-
-    compile_source = join(download_dir, config["task"]["compile"]["source"])
-    compile_command = join(source_dir, config["task"]["compile"]["command"])
-    compile_output = join(result_dir, config["task"]["compile"]["output"])
-    compile_error = join(result_dir, config["task"]["compile"]["error"])
-
-    execute_input = join(source_dir, config["task"]["execute"]["input"])
-    execute_data = join(download_dir, config["task"]["execute"]["data"])
-    execute_command = join(source_dir, config["task"]["execute"]["command"])
-    execute_output = join(result_dir, config["task"]["execute"]["output"])
-    execute_error = join(result_dir, config["task"]["execute"]["error"])
+    paths = task["paths"] = {
+        "work_dir": work_dir,
+        "download_dir": download_dir,
+        "source_dir": source_dir,
+        "data_dir": join(work_dir, config["task"]["dir"]["data"]),
+        "compile_source": join(download_dir, config["task"]["compile"]["source"]),
+        "compile_command": join(source_dir, config["task"]["compile"]["command"]),
+        "execute_input": join(source_dir, config["task"]["execute"]["input"]),
+        "execute_data": join(download_dir, config["task"]["execute"]["data"]),
+        "execute_command": join(source_dir, config["task"]["execute"]["command"])
+    }
 
     # Create all dirs and files
     try:
-        # Create all necessary dirs and unzip sources
-        logger.info("Generating directories for task %s." % task["id"])
-        os.mkdir(work_dir)
-        os.mkdir(download_dir)
-        os.mkdir(source_dir)
-        os.mkdir(data_dir)
-        os.mkdir(result_dir)
-
-        # Generate all files for compilation
-        logger.info("Generating files for task %s." % task["id"])
-        # Compile source
-        if task["compile"]["source"]:
-            with open(compile_source, "wb") as f:
-                f.write(task["compile"]["source"])
-            with zipfile.ZipFile(compile_source, "r") as f:
-                f.extractall(source_dir)
-        # Compile command
-        with open(compile_command, "wb") as f:
-            if task["compile"]["command"]:
-                f.write(zlib.decompress(task["compile"]["command"]))
-
-        # Generate all files for execution
-        # Execute input
-        with open(execute_input, "wb") as f:
-            if task["execute"]["input"]:
-                f.write(zlib.decompress(task["execute"]["input"]))
-        # Execute data
-        if task["execute"]["data"]:
-            with open(execute_data, "wb") as f:
-                f.write(task["execute"]["data"])
-            with zipfile.ZipFile(execute_data, "r") as f:
-                f.extractall(data_dir)
-        # Execute command
-        with open(execute_command, "wb") as f:
-            if task["execute"]["command"]:
-                f.write(zlib.decompress(task["execute"]["command"]))
-        # Changing the owner of source dir
-        subprocess.call(
-            ["chown", "-R", str(config["task"]["user"]["uid"]) + ":" + str(config["task"]["user"]["gid"]), source_dir]
-        )
-        logger.info("Generated all directories and files for task %s." % task["id"])
+        await loop.run_in_executor(None, prepare, task, paths, config, judicator_pool, dataset_cache, logger)
+        cgroup = task_cgroups.create(task["id"]) if task_cgroups else None
         cancel = False
     except:
         logger.error("Failed to generate directories and files for task %s." % task["id"], exc_info=True)
         cancel = True
 
     # Start to compile
-    # Acquire the lock
-    with lock:
+    # If not cancelled, start subprocess to compile it
+    # Otherwise, clean and exit
+    if not cancel:
         try:
-            cancel = cancel or task["cancel"]
-            # If not cancelled, start subprocess to compile it
-            # Otherwise, clean and exit
-            if not cancel:
-                logger.info("Compiling task %s." % task["id"])
-                task["status"] = TASK_STATUS["COMPILING"]
-                with open(compile_output, "wb") as ostream, open(compile_error, "wb") as estream:
-                    task["process"] = subprocess.Popen(
-                        ["bash", config["task"]["compile"]["command"]],
-                        stdout=ostream,
-                        stderr=estream,
-                        cwd=source_dir,
-                        preexec_fn=change_user(config)
-                    )
-            else:
-                task["done"] = True
+            logger.info("Compiling task %s." % task["id"])
+            set_status(task, TASK_STATUS["COMPILING"])
+            capture = OutputCapture(output_budget(snapshot(task)), task["id"], task_cgroups, logger)
+            cancel = not await start_process(
+                task, config["task"]["compile"]["command"], None, capture, config, cgroup
+            )
         except:
             logger.error("Failed to compile task %s." % task["id"], exc_info=True)
             cancel = True
     if cancel:
-        logger.info("Working thread for task %s terminating." % task["id"])
-        shutil.rmtree(work_dir)
+        task["done"] = True
+        logger.info("Coroutine for task %s terminating." % task["id"])
+        await loop.run_in_executor(None, clean, task["id"], work_dir, task_cgroups)
         return
 
-    # Wait for the compilation with timeout
-    try:
-        if task["compile"]["timeout"] == 0:
-            logger.info("Task %s has unlimited compile timeout." % task["id"])
-        else:
-            logger.info("Wait for task %s compilation with timeout %d." % (task["id"], task["compile"]["timeout"]))
-        res = task["process"].wait(task["compile"]["timeout"] if task["compile"]["timeout"] != 0 else None)
-        logger.info("Compiled task %s with exit code %d." % (task["id"], res))
-        success = res == 0
-        error_message = b""
-    except Exception as e:
-        # Check if it is timed out or something else happened
-        if isinstance(e, subprocess.TimeoutExpired):
-            logger.warning("Exceeded time limit when compiling task %s." % task["id"], exc_info=True)
-            error_message = b"Compile time out."
-        else:
-            logger.error("Failed to finish compilation of task %s." % task["id"], exc_info=True)
-            error_message = b"Unknown error."
-        # Kill and wait for the subprocess
-        task["process"].kill()
-        task["process"].wait()
-        success = False
+    # Wait for the compilation with timeout, capturing its output
+    success, error_message = await wait_process(task, task["compile"]["timeout"], "compile", logger)
 
     # Start to execute
-    # Acquire the lock
-    with lock:
-        # If compilation is success, start subprocess to execute it
-        # Otherwise, clean and exit
-        try:
-            # Add compile result
-            logger.info("Collecting compilation result for task %s." % task["id"])
-            with open(compile_output, "rb") as f:
-                task["result"]["compile_output"] = zlib.compress(f.read())
-            if not error_message:
-                with open(compile_error, "rb") as f:
-                    task["result"]["compile_error"] = zlib.compress(f.read())
-            else:
-                task["result"]["compile_error"] = zlib.compress(error_message)
-            # If the compilation output goes beyond the limitation
-            tmp_task = dict(task)
-            tmp_task.pop("process", None)
-            tmp_task.pop("thread", None)
-            if not check_task_dict_size(tmp_task):
-                task["result"]["compile_output"] = b""
-                task["result"]["compile_error"] = zlib.compress(b"Compile output limitation exceeded.")
-                success = False
-            # If compilation is successful, execute it
-            if success:
-                logger.info("Running task %s." % task["id"])
-                task["status"] = TASK_STATUS["RUNNING"]
-                with open(execute_input, "rb") as istream, \
-                        open(execute_output, "wb") as ostream, \
-                        open(execute_error, "wb") as estream:
-                    task["process"] = subprocess.Popen(
-                        ["bash", config["task"]["execute"]["command"]],
-                        stdin=istream,
-                        stdout=ostream,
-                        stderr=estream,
-                        cwd=source_dir,
-                        preexec_fn=change_user(config)
-                    )
-            else:
-                task["status"] = TASK_STATUS["COMPILE_FAILED"]
-                task["done"] = True
-                task["process"] = None
-        except:
-            logger.error("Failed to collect compilation result or run task %s." % task["id"], exc_info=True)
+    # If compilation is success, start subprocess to execute it
+    # Otherwise, clean and exit
+    try:
+        # Add compile result
+        logger.info("Collecting compilation result for task %s." % task["id"])
+        output, error, exceeded = await capture.finish()
+        task["result"] = dict(
+            task["result"],
+            compile_output=output,
+            compile_error=zlib.compress(error_message) if error_message else error
+        )
+        account(task, task_cgroups)
+        # If the compilation output goes beyond the limitation
+        if exceeded:
+            task["result"]["compile_output"] = b""
+            task["result"]["compile_error"] = zlib.compress(b"Compile output limitation exceeded.")
             success = False
-    # It not successful, set status to compile failed
+        # If compilation is successful, execute it unless cancelled
+        if success:
+            logger.info("Running task %s." % task["id"])
+            set_status(task, TASK_STATUS["RUNNING"])
+            capture = OutputCapture(output_budget(snapshot(task)), task["id"], task_cgroups, logger)
+            with open(paths["execute_input"], "rb") as istream:
+                success = await start_process(
+                    task, config["task"]["execute"]["command"], istream, capture, config, cgroup
+                )
+        else:
+            task["status"] = TASK_STATUS["COMPILE_FAILED"]
+        if not success:
+            task["done"] = True
+    except:
+        logger.error("Failed to collect compilation result or run task %s." % task["id"], exc_info=True)
+        success = False
+    # It not successful, clean and exit
     if not success:
-        logger.info("Working thread for task %s terminating." % task["id"])
-        shutil.rmtree(work_dir)
+        logger.info("Coroutine for task %s terminating." % task["id"])
+        await loop.run_in_executor(None, clean, task["id"], work_dir, task_cgroups)
         return
 
-    # Wait for the execution with timeout
-    try:
-        if task["execute"]["timeout"] == 0:
-            logger.info("Task %s has unlimited execute timeout." % task["id"])
-        else:
-            logger.info("Wait for task %s execution with timeout %d." % (task["id"], task["execute"]["timeout"]))
-        res = task["process"].wait(task["execute"]["timeout"] if task["execute"]["timeout"] != 0 else None)
-        logger.info("Run task %s with exit code %d." % (task["id"], res))
-        success = res == 0
-        error_message = b""
-    except Exception as e:
-        # Check if it is timed out or something else happened
-        if isinstance(e, subprocess.TimeoutExpired):
-            logger.warning("Exceeded time limit when running task %s." % task["id"], exc_info=True)
-            error_message = b"Execution time out."
-        else:
-            logger.error("Failed to finish execution of task %s." % task["id"], exc_info=True)
-            error_message = b"Unknown error."
-        # Kill and wait for the subprocess
-        task["process"].kill()
-        task["process"].wait()
-        success = False
+    # Wait for the execution with timeout, capturing its output
+    success, error_message = await wait_process(task, task["execute"]["timeout"], "execution", logger)
 
     # Adjust task status accordingly
-    # Acquire the lock first
-    with lock:
-        try:
-            # Add execution result
-            logger.info("Collecting execution result.")
-            with open(execute_output, "rb") as f:
-                task["result"]["execute_output"] = zlib.compress(f.read())
-            if not error_message:
-                with open(execute_error, "rb") as f:
-                    task["result"]["execute_error"] = zlib.compress(f.read())
-            else:
-                task["result"]["execute_error"] = zlib.compress(error_message)
-            # If the execution output goes beyond the limitation
-            tmp_task = dict(task)
-            tmp_task.pop("process", None)
-            tmp_task.pop("thread", None)
-            if not check_task_dict_size(tmp_task):
-                task["result"]["execute_output"] = b""
-                task["result"]["execute_error"] = zlib.compress(b"Execution output limitation exceeded.")
-                success = False
-            task["status"] = TASK_STATUS["SUCCESS"] if success else TASK_STATUS["RUN_FAILED"]
-        except:
-            logger.error("Failed to collect execution result of task %s." % task["id"], exc_info=True)
-            task["status"] = TASK_STATUS["RUN_FAILED"]
+    try:
+        # Add execution result
+        logger.info("Collecting execution result.")
+        output, error, exceeded = await capture.finish()
+        task["result"] = dict(
+            task["result"],
+            execute_output=output,
+            execute_error=zlib.compress(error_message) if error_message else error
+        )
+        account(task, task_cgroups)
+        # If the execution output goes beyond the limitation
+        if exceeded:
+            task["result"]["execute_output"] = b""
+            task["result"]["execute_error"] = zlib.compress(b"Execution output limitation exceeded.")
+            success = False
+        task["status"] = TASK_STATUS["SUCCESS"] if success else TASK_STATUS["RUN_FAILED"]
+    except:
+        logger.error("Failed to collect execution result of task %s." % task["id"], exc_info=True)
+        task["status"] = TASK_STATUS["RUN_FAILED"]
     task["done"] = True
-    task["process"] = None
 
-    logger.info("Working thread for task %s terminating." % task["id"])
+    logger.info("Coroutine for task %s terminating." % task["id"])
     # Clean files
-    shutil.rmtree(work_dir)
+    await loop.run_in_executor(None, clean, task["id"], work_dir, task_cgroups)
 
     return
 
-def report(complete, executing, vacant, local_etcd, config, logger):
+async def routine(config, judicator_pool, dataset_cache, task_cgroups, logger):
+    """
+    Coroutine reporting tasks execution status regularly, and starting coroutines for assigned tasks
+    The report is made in the thread pool of the event loop, so that tasks keep running while reporting
+    :param config: Configuration json
+    :param judicator_pool: Pool of connections to judicators
+    :param dataset_cache: Cache of extracted execute data, or None if not enabled
+    :param task_cgroups: Cgroups of tasks, or None if not enabled
+    :param logger: The logger object
+    :return: None
+    """
+    loop = asyncio.get_event_loop()
+    retry_times = config["retry"]["times"]
+    retry_interval = config["retry"]["interval"]
+
+    # When report wait is enabled, time spent by the judicator waiting for new tasks is part of the interval,
+    # and the next report is made at once if any task is assigned
+    # It is at most the interval, so that results of tasks finished while waiting are not reported later than usual
+    report_wait = min(config.get("report_wait", 0), config["report_interval"])
+    sleep_time = config["report_interval"]
+    while True:
+        await asyncio.sleep(sleep_time)
+        sleep_time = config["report_interval"]
+
+        # Collect things to report
+        logger.info("Collecting report content.")
+        complete, executing = [], []
+        vacant = config["task"]["vacant"]
+        capacity = dict(config["capacity"])
+        # Only snapshots published by tasks are reported, which are never modified afterwards
+        for t in tasks:
+            if not tasks[t]["cancel"]:
+                if tasks[t]["complete"]:
+                    complete.append(tasks[t]["complete"])
+                    logger.info("Task %s added to complete list." % t)
+                else:
+                    executing.append(tasks[t]["brief"])
+                    vacant -= 1
+                    for k in TASK_RESOURCES:
+                        capacity[k] -= (tasks[t]["requirement"] or {}).get(k) or 0
+                    logger.info("Task %s added to executing list." % t)
+        capacity = Resource(**dict((k, max(v, 0)) for k, v in capacity.items()))
+
+        # Try to report to judicator and get response
+        logger.info("Executor current vacancy: %d, capacity: %s." % (vacant, str(capacity)))
+        logger.info("Reporting to judicator.")
+        report_start = time.time()
+        success, res = await loop.run_in_executor(
+            None,
+            functools.partial(
+                try_with_times,
+                retry_times,
+                retry_interval,
+                False,
+                logger,
+                "report to judicator",
+                report,
+                complete,
+                executing,
+                vacant,
+                report_wait if vacant > 0 else 0,
+                capacity,
+                judicator_pool,
+                config
+            )
+        )
+        if not success:
+            logger.error("Failed to report to judicator. Skipping tasks update.")
+            continue
+        cancel, assign = [extract(x, brief=True) for x in res[0]], [extract(x) for x in res[1]]
+        if report_wait:
+            sleep_time = 0 if assign else max(0, config["report_interval"] - (time.time() - report_start))
+        logger.info("Reported to judicator with response:")
+        logger.info("Cancel list: %s." % str([t["id"] for t in cancel]))
+        logger.info("Assign list: %s." % str([t["id"] for t in assign]))
+
+        # Update tasks information
+        logger.info("Updating tasks information.")
+        try:
+            # Cancel tasks
+            logger.info("Checking tasks to be cancelled.")
+            for t in cancel:
+                logger.info("Cancelling task %s." % t["id"])
+                if not t["id"] in tasks:
+                    continue
+                tasks[t["id"]]["cancel"] = True
+                # If the subprocess is still running, kill it
+                if tasks[t["id"]]["process"]:
+                    logger.info("Killing subprocess of task %s." % t["id"])
+                    kill_process(tasks[t["id"]]["process"])
+                else:
+                    logger.info("No subprocess to kill for task %s." % t["id"])
+
+            # Clean all tasks
+            # A list ot tasks index must be built beforehand, as the tasks is going to change
+            tasks_list = tuple(tasks.keys())
+            logger.info("Checking tasks to be deleted.")
+            for t in tasks_list:
+                if tasks[t]["complete"]:
+                    # A task is can only be considered as all done (thus can be deleted)
+                    # when the coroutine is done and the final snapshot is published
+                    # and cancel (indicating the judicator has received the result) is True
+                    if tasks[t]["cancel"]:
+                        del tasks[t]
+                        logger.info("Deleted task %s." % t)
+
+            # Handle newly assigned
+            logger.info("Checking tasks to be assigned.")
+            for t in assign:
+                logger.info("Assigned task %s." % t["id"])
+
+                tasks[t["id"]] = t
+                tasks[t["id"]]["process"] = None
+                tasks[t["id"]]["cancel"] = False
+                tasks[t["id"]]["brief"] = generate(t, True)
+                tasks[t["id"]]["complete"] = None
+
+                # Generate a coroutine and start it
+                tasks[t["id"]]["coroutine"] = loop.create_task(
+                    execute(t["id"], config, judicator_pool, dataset_cache, task_cgroups, logger)
+                )
+                tasks[t["id"]]["coroutine"].add_done_callback(functools.partial(finish, t))
+        except:
+            logger.error("Failed to update tasks.", exc_info=True)
+
+        logger.info("Finished executor routine work.")
+
+def report(complete, executing, vacant, wait, capacity, judicator_pool, config):
     """
     Get the address of a judicator and report the tasks status
     :param complete: Complete task list
     :param executing: Executing task list
     :param vacant: Vacant task places
-    :param local_etcd: Proxy of local etcd
+    :param wait: Max seconds for the judicator to wait for new tasks if none can be assigned
+    :param capacity: Resource structure of resources not required by executing tasks
+    :param judicator_pool: Pool of connections to judicators
     :param config: Configuration json
-    :param logger: Logger object
     :return: Tuple contain RPC report return
     """
-    res = select_from_etcd_and_call(
+    res = judicator_pool.call(
         "report",
-        local_etcd,
-        config["judicator_etcd_path"],
-        logger,
         config["name"],
         complete,
         executing,
-        vacant
+        vacant,
+        wait,
+        capacity
     )
     if res.result != ReturnCode.OK:
         raise Exception("Return code from judicator is not 0 but %d." % res.result)
@@ -344,13 +771,11 @@ def run(module_name="Executor", etcd_conf_path="config/etcd.json", main_conf_pat
     :param main_conf_path: Path to main config file
     :return: None
     """
-    global tasks, lock
+    global tasks
 
     # Load configuration
     with open(main_conf_path, "r") as f:
         config = json.load(f)
-    retry_times = config["retry"]["times"]
-    retry_interval = config["retry"]["interval"]
 
     # Generate logger
     if "log" in config:
@@ -362,6 +787,17 @@ def run(module_name="Executor", etcd_conf_path="config/etcd.json", main_conf_pat
     # Generate proxy for local etcd
     with open(etcd_conf_path, "r") as f:
         local_etcd = generate_local_etcd_proxy(json.load(f)["etcd"], logger)
+    # Generate pool of connections to judicators
+    judicator_pool = JudicatorPool(
+        local_etcd,
+        config["judicator_etcd_path"],
+        logger,
+        **config.get("judicator_pool", {})
+    )
+    if config.get("report_wait", 0) > config["report_interval"]:
+        logger.warning("Report wait is longer than the report interval. The report interval is used instead.")
+    if min(config.get("report_wait", 0), config["report_interval"]) >= judicator_pool.timeout:
+        logger.warning("Report wait is not shorter than the rpc timeout. Held reports time out.")
 
     # Check whether the data dir of main is empty
     # If not, delete it and create a new one
@@ -372,128 +808,67 @@ def run(module_name="Executor", etcd_conf_path="config/etcd.json", main_conf_pat
     os.chmod(config["data_dir"], 0o700)
     logger.info("Data directory privilege changed to 0700.")
 
+    # Generate cache of extracted execute data if enabled
+    if "dataset_cache" in config:
+        dataset_cache = DatasetCache(config["dataset_cache"]["dir"], config["dataset_cache"]["max_size"], logger)
+    else:
+        dataset_cache = None
+
+    # Generate cgroups of tasks if enabled
+    if "cgroup" in config:
+        task_cgroups = TaskCGroups(config["cgroup"]["path"], config["cgroup"].get("limits", {}), logger)
+    else:
+        task_cgroups = None
+
     # If task user id and group id is not specified, use the current user and group
     if "user" not in config["task"]:
         config["task"]["user"] = {"uid": os.getuid(), "gid": os.getgid()}
     logger.info("Task execution uid: %d, gid: %d." % (config["task"]["user"]["uid"], config["task"]["user"]["gid"]))
+    if dataset_cache and config["task"]["user"]["uid"] in (0, os.getuid()):
+        logger.warning("Tasks run as root or the executor user. Cached execute data are copied instead of linked.")
+
+    # Resources not specified in capacity are detected, with disk being the free space of the data directory
+    capacity = config.get("capacity", {})
+    config["capacity"] = {
+        "cpu": capacity.get("cpu", os.cpu_count()),
+        "memory": capacity.get("memory", os.sysconf("SC_PAGE_SIZE") * os.sysconf("SC_PHYS_PAGES")),
+        "disk": capacity.get("disk", shutil.disk_usage(config["data_dir"]).free)
+    }
+    logger.info("Task resource capacity: %s." % str(config["capacity"]))
+
+    # Run the event loop, with pid file descriptors watching subprocesses instead of a thread for each if possible
+    loop = asyncio.new_event_loop()
+    asyncio.set_event_loop(loop)
+    try:
+        os.close(os.pidfd_open(os.getpid()))
+        watcher = asyncio.PidfdChildWatcher()
+        watcher.attach_loop(loop)
+        asyncio.set_child_watcher(watcher)
+        logger.info("Using pid file descriptors to watch subprocesses.")
+    except:
+        logger.warning("Failed to use pid file descriptors to watch subprocesses.", exc_info=True)
 
     # Report tasks execution status regularly
     logger.info("Starting executor routines.")
     try:
-        while True:
-            time.sleep(config["report_interval"])
-
-            # Collect things to report
-            logger.info("Collecting report content.")
-            complete, executing = [], []
-            vacant = config["task"]["vacant"]
-            # Acquire lock first before modifying global variable
-            with lock:
-                try:
-                    for t in tasks:
-                        if not tasks[t]["cancel"]:
-                            if tasks[t]["thread"] and not tasks[t]["thread"].is_alive():
-                                complete.append(generate(tasks[t], False, False, False))
-                                logger.info("Task %s added to complete list." % t)
-                            else:
-                                executing.append(generate(tasks[t], True))
-                                vacant -= 1
-                                logger.info("Task %s added to executing list." % t)
-                except KeyboardInterrupt:
-                    raise
-                except:
-                    logger.error("Failed to collect report content.", exc_info=True)
-
-            # Try to report to judicator and get response
-            logger.info("Executor current vacancy: %d." % vacant)
-            logger.info("Reporting to judicator.")
-            success, res = try_with_times(
-                retry_times,
-                retry_interval,
-                False,
-                logger,
-                "report to judicator",
-                report,
-                complete,
-                executing,
-                vacant,
-                local_etcd,
-                config,
-                logger
-            )
-            if not success:
-                logger.error("Failed to report to judicator. Skipping tasks update.")
-                continue
-            cancel, assign = [extract(x, brief=True) for x in res[0]], [extract(x) for x in res[1]]
-            logger.info("Reported to judicator with response:")
-            logger.info("Cancel list: %s." % str([t["id"] for t in cancel]))
-            logger.info("Assign list: %s." % str([t["id"] for t in assign]))
-
-            # Update tasks information
-            logger.info("Updating tasks information.")
-            # Acquire lock first before modifying global variable
-            with lock:
-                try:
-                    # Cancel tasks
-                    logger.info("Checking tasks to be cancelled.")
-                    for t in cancel:
-                        logger.info("Cancelling task %s." % t["id"])
-                        if not t["id"] in tasks:
-                            continue
-                        tasks[t["id"]]["cancel"] = True
-                        # If the subprocess is still running, kill it
-                        if tasks[t["id"]]["process"] and tasks[t["id"]]["process"].poll() is None:
-                            logger.info("Killing subprocess of task %s." % t["id"])
-                            tasks[t["id"]]["process"].kill()
-                        else:
-                            logger.info("No subprocess to kill for task %s." % t["id"])
-
-                    # Clean all tasks
-                    # A list ot tasks index must be built beforehand, as the tasks is going to change
-                    tasks_list = tuple(tasks.keys())
-                    logger.info("Checking tasks to be deleted.")
-                    for t in tasks_list:
-                        if tasks[t]["thread"] and not tasks[t]["thread"].is_alive():
-                            # A task is can only be considered as all done (thus can be deleted)
-                            # when thread.is_alive() is False (indicating the daemon thread has finished)
-                            # and cancel (indicating the judicator has received the result) is True
-                            if tasks[t]["cancel"]:
-                                del tasks[t]
-                                logger.info("Deleted task %s." % t)
-
-                    # Handle newly assigned
-                    logger.info("Checking tasks to be assigned.")
-                    for t in assign:
-                        logger.info("Assigned task %s." % t["id"])
-
-                        tasks[t["id"]] = t
-                        tasks[t["id"]]["process"] = None
-                        tasks[t["id"]]["cancel"] = False
-
-                        # Generate a thread and start it
-                        tasks[t["id"]]["thread"] = threading.Thread(target=execute, args=(t["id"], config, logger))
-                        tasks[t["id"]]["thread"].setDaemon(True)
-                        tasks[t["id"]]["thread"].start()
-                except KeyboardInterrupt:
-                    raise
-                except:
-                    logger.error("Failed to update tasks.", exc_info=True)
-
-            logger.info("Finished executor routine work.")
-
+        loop.run_until_complete(routine(config, judicator_pool, dataset_cache, task_cgroups, logger))
     except KeyboardInterrupt:
         logger.info("Received SIGINT. Cleaning up all subprocess.", exc_info=True)
 
     # Clean up and kill all subprocess
-    # Acquire the lock until exit to ensure that no more subprocess are generated
-    lock.acquire()
+    # Mark all tasks cancelled and stop their coroutines first, to ensure that no more subprocess are generated
+    for t in tasks:
+        tasks[t]["cancel"] = True
+        if tasks[t]["coroutine"]:
+            tasks[t]["coroutine"].cancel()
     for t in tasks:
         if tasks[t]["process"]:
-            tasks[t]["process"].kill()
-            tasks[t]["process"].wait()
+            kill_process(tasks[t]["process"])
+            loop.run_until_complete(wait_exit(tasks[t]["process"]))
             logger.info("Killed subprocess of task %s." % t)
         else:
             logger.info("Task %s has no subprocess running." % t)
+    loop.close()
 
     logger.info("%s main program exiting." % module_name)
     return
@@ -511,6 +886,8 @@ def command_parser(parser):
                         help="Capacity of tasks of the executor")
     parser.add_argument("--main-report-interval", type=int, dest="main_report_interval", default=None,
                         help="Interval between reports made to judicator from executor")
+    parser.add_argument("--main-report-wait", type=int, dest="main_report_wait", default=None,
+                        help="Max seconds for judicator to hold a report until new tasks can be assigned")
     parser.add_argument("--main-task-user-group", dest="main_task_user_group", default=None,
                         help="User:group string indicating execution user/group when executing real tasks")
     parser.add_argument("--main-print-log", dest="main_print_log", action="store_const", const=True, default=False,
@@ -543,6 +920,8 @@ def command_parser(parser):
             config_sub["task"]["user"] = {"uid": pwd.getpwnam(user)[2], "gid": grp.getgrnam(group)[2]}
         if args.main_report_interval is not None:
             config_sub["report_interval"] = args.main_report_interval
+        if args.main_report_wait is not None:
+            config_sub["report_wait"] = args.main_report_wait
         if args.main_print_log:
             config_sub.pop("log", None)
         if args.docker_sock is not None:
@@ -25,6 +25,8 @@ __author__ = "chenty"
 
 import json
 import flask
+import hashlib
+import itertools
 import zlib
 import tempfile
 from os.path import join
@@ -34,8 +36,11 @@ from rpc.judicator_rpc.ttypes import *
 
 from utility.function import get_logger
 from utility.task import check_task_dict_size, check_id, decompress_and_truncate, TASK_DICTIONARY_MAX_SIZE, check_int
+from utility.task import check_resource, TASK_RESOURCES
+from utility.task import blob_digest, decompress_chunks, TASK_FILES, TRUNCATE_MAX_LENGTH
 from utility.etcd.proxy import generate_local_etcd_proxy
-from utility.rpc import select_from_etcd_and_call, extract, generate
+from utility.cache import ResponseCache, UwsgiResponseCache
+from utility.rpc import JudicatorPool, extract, generate
 
 
 # Server class inheriting Flask to serve HTTP request
@@ -69,10 +74,42 @@ class Server(flask.Flask):
         # Generate proxy for etcd
         with open(etcd_conf_path, "r") as f:
             self.local_etcd = generate_local_etcd_proxy(json.load(f)["etcd"], self.logger)
+        # Generate pool of connections to judicators
+        self.judicator_pool = JudicatorPool(
+            self.local_etcd,
+            self.conf["judicator_etcd_path"],
+            self.logger,
+            **self.conf.get("judicator_pool", {})
+        )
+        # Generate cache of rendered done tasks, which never change
+        # A uwsgi cache is shared by all workers, and each worker has its own cache otherwise
+        task_cache = self.conf.get("task_cache", {})
+        self.task_cache_max_age = task_cache.get("max_age", 0)
+        self.task_cache = None
+        if "uwsgi_cache" in task_cache:
+            try:
+                self.task_cache = UwsgiResponseCache(task_cache["uwsgi_cache"])
+            except ImportError:
+                self.logger.warning("Not running in uwsgi. Using an in-process cache for tasks.")
+        if self.task_cache is None and task_cache.get("max_size", 0) > 0:
+            self.task_cache = ResponseCache(task_cache["max_size"])
 
         self.load_response_function()
         return
 
+    def done_task_response(self, body, etag):
+        """
+        Generate a response of a done task, which can be cached by browsers and proxies
+        :param body: Rendered json of the task in bytes
+        :param etag: Etag of the json
+        :return: The response, or a 304 response if the etag matches the request
+        """
+        response = flask.Response(body, mimetype="application/json")
+        response.set_etag(etag)
+        response.cache_control.public = True
+        response.cache_control.max_age = self.task_cache_max_age
+        return response.make_conditional(flask.request)
+
     def load_response_function(self):
         """
         Load all flask response functions
@@ -122,12 +159,22 @@ class Server(flask.Flask):
                     "status": 0,
                     "executor": None,
                     "report_time": None,
-                    "result": None
+                    "result": None,
+                    "requirement": None,
+                    "priority": int(flask.request.form.get("priority") or 0)
                 }
                 if not (check_int(data["user"]) and
                         check_int(data["compile"]["timeout"]) and
-                        check_int(data["execute"]["timeout"])):
+                        check_int(data["execute"]["timeout"]) and
+                        check_int(data["priority"])):
                     raise Exception("An int parameter is out of bound.")
+                # Resources not given are not required, and a task requiring nothing can run on any executor
+                if any(flask.request.form.get("requirement_" + k) for k in TASK_RESOURCES):
+                    data["requirement"] = dict(
+                        (k, int(flask.request.form.get("requirement_" + k) or 0)) for k in TASK_RESOURCES
+                    )
+                    if not check_resource(data["requirement"]):
+                        raise Exception("A requirement parameter is out of bound.")
             except:
                 self.logger.error("Failed to parse added task.", exc_info=True)
                 return flask.jsonify({"result": ReturnCode.INVALID_INPUT, "id": None})
@@ -189,13 +236,28 @@ class Server(flask.Flask):
             if not check_task_dict_size(data):
                 return flask.jsonify({"result": ReturnCode.TOO_LARGE, "id": None})
 
+            # Refer to zip files already stored by judicators by their digests instead of uploading them again
+            source_zip, data_zip = data["compile"]["source"], data["execute"]["data"]
+            data["compile"]["source_digest"] = blob_digest(source_zip) if source_zip else None
+            data["execute"]["data_digest"] = blob_digest(data_zip) if data_zip else None
+            digests = [x for x in (data["compile"]["source_digest"], data["execute"]["data_digest"]) if x]
+            reference = data
+            if digests:
+                res = self.judicator_pool.call("check_blobs", digests)
+                if res.result == ReturnCode.OK:
+                    reference = dict(data, compile=dict(data["compile"]), execute=dict(data["execute"]))
+                    if reference["compile"]["source_digest"] not in res.missing:
+                        reference["compile"]["source"] = b""
+                    if reference["execute"]["data_digest"] not in res.missing:
+                        reference["execute"]["data"] = b""
+                    self.logger.info("Uploading %d of %d zip files." % (len(res.missing), len(digests)))
+
             # Add through rpc and return
-            res = select_from_etcd_and_call(
-                "add", self.local_etcd,
-                self.conf["judicator_etcd_path"],
-                self.logger,
-                generate(data)
-            )
+            res = self.judicator_pool.call("add", generate(reference))
+            # If a referred zip file has been deleted after checking, upload all of them
+            if res.result == ReturnCode.NOT_EXIST and reference is not data:
+                self.logger.warning("Referred zip file no longer exists. Uploading all zip files.")
+                res = self.judicator_pool.call("add", generate(data))
             return flask.jsonify({"result": res.result, "id": res.id})
 
         @self.route("/api/task", methods=["DELETE"])
@@ -211,11 +273,8 @@ class Server(flask.Flask):
 
             # Cancel and return the result
             self.logger.info("Canceling task %s." % id)
-            res = select_from_etcd_and_call(
+            res = self.judicator_pool.call(
                 "cancel",
-                self.local_etcd,
-                self.conf["judicator_etcd_path"],
-                self.logger,
                 id
             )
             return flask.jsonify({"result": res})
@@ -246,6 +305,8 @@ class Server(flask.Flask):
                 page = int(flask.request.args.get("page", 0))
                 if not check_int(page):
                     return flask.jsonify(failed_result)
+                cursor = flask.request.args.get("cursor", None)
+                count = bool(flask.request.args.get("count", False))
             except:
                 self.logger.error("Failed to get all search conditions.", exc_info=True)
                 return flask.jsonify(failed_result)
@@ -253,19 +314,30 @@ class Server(flask.Flask):
             self.logger.info("Parsed searching conditions.")
 
             # Search for the task
-            res = select_from_etcd_and_call(
-                "search",
-                self.local_etcd,
-                self.conf["judicator_etcd_path"],
-                self.logger,
-                id,
-                user,
-                start_time,
-                end_time,
-                old_to_new,
-                limit,
-                page
-            )
+            # If a cursor is given (even an empty one), continue from the cursor instead of skipping pages
+            if cursor is not None:
+                res = self.judicator_pool.call(
+                    "cursor_search",
+                    id,
+                    user,
+                    start_time,
+                    end_time,
+                    old_to_new,
+                    limit,
+                    cursor,
+                    count
+                )
+            else:
+                res = self.judicator_pool.call(
+                    "search",
+                    id,
+                    user,
+                    start_time,
+                    end_time,
+                    old_to_new,
+                    limit,
+                    page
+                )
 
             # Handle the result and return
             tasks = [extract(x, brief=True) for x in res.tasks]
@@ -274,6 +346,8 @@ class Server(flask.Flask):
                 t["add_time"] = "" if not t["add_time"] else t["add_time"].isoformat()
                 t["report_time"] = "" if not t["report_time"] else t["report_time"].isoformat()
 
+            if cursor is not None:
+                return flask.jsonify({"result": res.result, "total": res.total, "cursor": res.cursor, "tasks": tasks})
             return flask.jsonify({"result": res.result, "pages": res.pages, "tasks": tasks})
 
         @self.route("/api/task", methods=["GET"])
@@ -290,85 +364,83 @@ class Server(flask.Flask):
             if id is None:
                 return flask.jsonify({"result": ReturnCode.INVALID_INPUT, "task": None})
 
-            # Get the task
-            self.logger.info("Getting task %s." % id)
-            res = select_from_etcd_and_call(
-                "get",
-                self.local_etcd,
-                self.conf["judicator_etcd_path"],
-                self.logger,
-                id
-            )
-            # If not found, return
-            # Otherwise return required data.
-            if res.result != ReturnCode.OK:
-                if file:
-                    flask.abort(404)
-                return flask.jsonify({"result": ReturnCode.NOT_EXIST, "task": None})
-
-            task = extract(res.task)
-
-            # If requesting files, try to fetch it
+            # If requesting a file, fetch only the file and stream it
             if file:
-                # Compile source and execute_data are in zip format
-                # Others are plain text
-                if file == "compile_source" or file == "execute_data":
+                if file not in TASK_FILES:
+                    flask.abort(404)
+                self.logger.info("Getting %s of task %s." % (file, id))
+                res = self.judicator_pool.call(
+                    "get_file",
+                    id,
+                    file
+                )
+                # Zip files with digests in the blob store are returned as they are
+                # Others are plain text zipped by zlib, which are decompressed chunk by chunk
+                content = res.data if res.result == ReturnCode.OK else b""
+                if content and TASK_FILES[file][1]:
                     postfix = ".zip"
                     mimetype = "application/zip"
-                    content = task["compile"]["source"] if file == "compile_source" else task["execute"]["data"]
-                else:
+                elif content:
                     postfix = ".txt"
                     mimetype = "plain/text"
-                    if file == "compile_command":
-                        content = task["compile"]["command"]
-
-                    elif file == "execute_input":
-                        content = task["execute"]["input"]
-                    elif file == "execute_command":
-                        content = task["execute"]["command"]
-                    elif file == "execute_standard":
-                        content = task["execute"]["standard"]
-
-                    else:
-                        content = task.get("result", {}).get(file, b"")
-                    if content:
-                        content = zlib.decompress(content)
+                    chunks = decompress_chunks(content)
+                    first = next(chunks, b"")
+                    content = itertools.chain([first], chunks) if first else b""
                 # If nothing has been found, return 404
                 if not content:
                     self.logger.warning("Returning 404 as %s is empty for task %s." % (file, id))
                     flask.abort(404)
-                # Write a temp file and return it
                 self.logger.info("Returning %s for task %s." % (file, id))
-                temp_file = tempfile.TemporaryFile(dir=self.conf["data_dir"])
-                temp_file.write(content)
-                temp_file.seek(0)
-                return flask.send_file(
-                    temp_file,
-                    cache_timeout=-1,
-                    as_attachment=True,
-                    attachment_filename=id + "_" + file + postfix,
-                    mimetype=mimetype
+                return flask.Response(
+                    content,
+                    mimetype=mimetype,
+                    headers={"Content-Disposition": "attachment; filename=%s_%s%s" % (id, file, postfix)}
                 )
 
+            # Return directly if the rendered task is cached, which is in form of etag and json split by a line break
+            cache_key = "%s|%d" % (id, truncate)
+            if self.task_cache is not None:
+                cached = self.task_cache.get(cache_key)
+                if cached is not None:
+                    self.logger.info("Task %s hit in cache." % id)
+                    etag, body = cached.split(b"\n", 1)
+                    return self.done_task_response(body, etag.decode())
+
+            # Get the task with its text files, truncated by the judicator if necessary
+            # Zip files are not fetched, as only whether they exist is returned
+            self.logger.info("Getting task %s." % id)
+            res = self.judicator_pool.call(
+                "get_fields",
+                id,
+                [f for f, (_, digest_path) in TASK_FILES.items() if not digest_path],
+                TRUNCATE_MAX_LENGTH if truncate else 0
+            )
+            # If not found, return
+            # Otherwise return required data.
+            if res.result != ReturnCode.OK:
+                return flask.jsonify({"result": ReturnCode.NOT_EXIST, "task": None})
+
+            task = extract(res.task)
+
             # Deal with zip field
-            task["compile"]["source"] = bool(task["compile"]["source"])
-            task["execute"]["data"] = bool(task["execute"]["data"])
+            task["compile"]["source"] = bool(task["compile"]["source"] or task["compile"]["source_digest"])
+            task["execute"]["data"] = bool(task["execute"]["data"] or task["execute"]["data_digest"])
 
             self.logger.info("Decompressing all fields compressed by zlib of task %s." % id)
             # Deal with zlib decompressed field in compile section
-            task["compile"]["command"] = decompress_and_truncate(task["compile"]["command"], truncate)
+            task["compile"]["command"] = decompress_and_truncate(task["compile"]["command"], False)
 
             # Deal with zlib decompressed field in execute section
-            task["execute"]["input"] = decompress_and_truncate(task["execute"]["input"], truncate)
-            task["execute"]["command"] = decompress_and_truncate(task["execute"]["command"], truncate)
-            task["execute"]["standard"] = decompress_and_truncate(task["execute"]["standard"], truncate)
+            task["execute"]["input"] = decompress_and_truncate(task["execute"]["input"], False)
+            task["execute"]["command"] = decompress_and_truncate(task["execute"]["command"], False)
+            task["execute"]["standard"] = decompress_and_truncate(task["execute"]["standard"], False)
 
             # Deal with zlib decompressed field in result section
             if task["result"]:
-                task["result"]["compile_output"] = decompress_and_truncate(task["result"]["compile_output"], truncate)
-                task["result"]["compile_error"] = decompress_and_truncate(task["result"]["compile_error"], truncate)
-                task["result"]["execute_output"] = decompress_and_truncate(task["result"]["execute_output"], truncate)
-                task["result"]["execute_error"] = decompress_and_truncate(task["result"]["execute_error"], truncate)
+                task["result"]["compile_output"] = decompress_and_truncate(task["result"]["compile_output"], False)
+                task["result"]["compile_error"] = decompress_and_truncate(task["result"]["compile_error"], False)
+                task["result"]["execute_output"] = decompress_and_truncate(task["result"]["execute_output"], False)
+                task["result"]["execute_error"] = decompress_and_truncate(task["result"]["execute_error"], False)
 
             # Deal with time section
             task["add_time"] = "" if not task["add_time"] else task["add_time"].isoformat()
@@ -376,7 +448,15 @@ class Server(flask.Flask):
 
             self.logger.info("Returning task %s." % id)
 
-            return flask.jsonify({"result": res.result, "task": task})
+            response = flask.jsonify({"result": res.result, "task": task})
+            if not task["done"]:
+                return response
+            # Done tasks never change, so cache them
+            body = response.get_data()
+            etag = hashlib.sha256(body).hexdigest()
+            if self.task_cache is not None:
+                self.task_cache.set(cache_key, etag.encode() + b"\n" + body)
+            return self.done_task_response(body, etag)
 
         @self.route("/api/executors", methods=["GET"])
         def api_executors():
@@ -386,7 +466,7 @@ class Server(flask.Flask):
             """
             # Fetch all executors from rpc and return
             self.logger.info("Getting executors.")
-            res = select_from_etcd_and_call("executors", self.local_etcd, self.conf["judicator_etcd_path"], self.logger)
+            res = self.judicator_pool.call("executors")
             return flask.jsonify({
                 "result": res.result,
                 "executors": [{"id": x.id, "hostname": x.hostname, "report_time": x.report_time} for x in res.executors]
@@ -36,22 +36,126 @@ from bson.objectid import ObjectId
 import dateutil.parser
 import socket
 import os
+import signal
 
 from rpc.judicator_rpc import Judicator
 from rpc.judicator_rpc.ttypes import *
-from thrift.transport import TSocket, TTransport
-from thrift.protocol import TBinaryProtocol
-from thrift.server import TServer
+from thrift.transport import TSocket
+from thrift.server import TServer, TNonblockingServer
 
 from utility.function import get_logger, try_with_times, transform_address
 from utility.etcd.proxy import generate_local_etcd_proxy
-from utility.mongodb.proxy import generate_local_mongodb_proxy
-from utility.task import check_id, transform_id, TASK_STATUS
-from utility.rpc import extract, generate
+from utility.mongodb.proxy import generate_local_mongodb_proxy, generate_read_preference, reconcile_indexes
+from utility.mongodb.proxy import INDEX_PREFIX
+from utility.task import check_id, check_int, check_digest, check_resource, blob_digest, transform_id
+from utility.task import TASK_STATUS, TASK_RESOURCES, TASK_FILES, TRUNCATE_MAX_LENGTH, get_path, truncate_zipped
+from utility.rpc import extract, generate, TRANSPORT_FACTORIES, PROTOCOL_FACTORIES
 
 
 # Global bool indicating if the program is working
 working = True
+# Max rounds of claiming when assigning tasks to an executor
+CLAIM_ROUNDS = 3
+# Times of the vacant places of candidates looked at when claiming tasks with a capacity, as some may not fit
+CLAIM_CANDIDATES_FACTOR = 4
+# Max amount of tasks or executors expired by one update or deletion when checking as leader
+SWEEP_BATCH_SIZE = 1000
+# Max seconds for which a report with no task assigned can wait for new tasks
+# It is also bounded by half the task expiration, as executing tasks of the report are refreshed before waiting
+MAX_DISPATCH_WAIT = 30
+# Seconds between retries of watching the task collection
+DISPATCH_WATCH_RETRY = 10
+# Changes of the task collection making tasks available for assignment, new tasks and tasks to be retried
+DISPATCH_WATCH_PIPELINE = [
+    {"$match": {"$or": [
+        {"operationType": "insert"},
+        {"operationType": "update", "updateDescription.updatedFields.executor": {"$type": "null"}}
+    ]}}
+]
+
+# Zip files of tasks kept in the blob store, (section, field of the content, field of the digest)
+BLOB_FIELDS = [("compile", "source", "source_digest"), ("execute", "data", "data_digest")]
+# Blob store collection used if not configured
+DEFAULT_BLOB_CONFIG = {"database": "judicator", "collection": "blob"}
+# Fair share collection used if not configured, with all users weighted equally
+DEFAULT_SHARE_CONFIG = {"database": "judicator", "collection": "share", "weights": {}}
+
+# Projection of task fields needed by TaskBrief structure
+TASK_BRIEF_PROJECTION = ["user", "add_time", "done", "status", "executor", "report_time"]
+# Result text files with previews stored, which are truncated by TRUNCATE_MAX_LENGTH
+PREVIEW_FIELDS = ["compile_output", "compile_error", "execute_output", "execute_error"]
+# Projection of task fields always returned by get_fields, besides the files requested
+TASK_FIELDS_PROJECTION = TASK_BRIEF_PROJECTION + [
+    "priority", "requirement",
+    "compile.timeout", "compile.source_digest",
+    "execute.timeout", "execute.data_digest",
+    "result.cpu_time", "result.memory_peak"
+]
+
+# Order of assignment, higher priority first, and then fair share across users, see RPCService.share_tag
+ASSIGNMENT_SORT = [("priority", pymongo.DESCENDING), ("share", pymongo.ASCENDING), ("_id", pymongo.ASCENDING)]
+# Id of the document in the share collection holding the virtual time
+SHARE_VIRTUAL_TIME = "virtual_time"
+
+# Indexes of the task collection
+# Partial indexes on undone tasks serve assignment, unreported tasks check and expiration check
+TASK_INDEXES = [
+    pymongo.IndexModel(
+        [("executor", pymongo.ASCENDING), ("report_time", pymongo.ASCENDING)],
+        name=INDEX_PREFIX + "undone_executor_report_time",
+        partialFilterExpression={"done": False}
+    ),
+    pymongo.IndexModel(
+        [("executor", pymongo.ASCENDING)] + ASSIGNMENT_SORT,
+        name=INDEX_PREFIX + "undone_executor_priority_share_id",
+        partialFilterExpression={"done": False}
+    ),
+    pymongo.IndexModel(
+        [("user", pymongo.ASCENDING), ("add_time", pymongo.DESCENDING), ("_id", pymongo.DESCENDING)],
+        name=INDEX_PREFIX + "user_add_time_id"
+    ),
+    pymongo.IndexModel(
+        [("add_time", pymongo.DESCENDING), ("_id", pymongo.DESCENDING)],
+        name=INDEX_PREFIX + "add_time_id"
+    )
+]
+# Indexes of the executor collection
+EXECUTOR_INDEXES = [
+    pymongo.IndexModel([("hostname", pymongo.ASCENDING)], name=INDEX_PREFIX + "hostname", unique=True),
+    pymongo.IndexModel([("report_time", pymongo.ASCENDING)], name=INDEX_PREFIX + "report_time")
+]
+
+def explain(mongodb_task, mongodb_executor, logger):
+    """
+    Log query plans of all frequent queries
+    :param mongodb_task: Mongodb collection of tasks
+    :param mongodb_executor: Mongodb collection of executors
+    :param logger: The logger
+    :return: None
+    """
+    now = datetime.datetime.now()
+    queries = {
+        "assignment": mongodb_task.find({"done": False, "executor": None}, ["_id"], sort=ASSIGNMENT_SORT, limit=1),
+        "backfill": mongodb_task.find({"done": False, "executor": None, "priority": None}),
+        "unreported": mongodb_task.find({"_id": {"$nin": []}, "done": False, "executor": ""}),
+        "expiration": mongodb_task.find({"done": False, "executor": {"$ne": None}, "report_time": {"$lt": now}}),
+        "executor": mongodb_executor.find({"hostname": ""}),
+        "executor expiration": mongodb_executor.find({"report_time": {"$lt": now}}),
+        "search": mongodb_task.find({"add_time": {"$lte": now}}, sort=[("add_time", pymongo.DESCENDING)], limit=1),
+        "search by user": mongodb_task.find(
+            {"user": 0, "add_time": {"$lte": now}},
+            sort=[("add_time", pymongo.DESCENDING)],
+            limit=1
+        )
+    }
+    for name, cursor in queries.items():
+        try:
+            logger.debug(
+                "Query plan of %s query: %s." % (name, str(cursor.explain()["queryPlanner"]["winningPlan"]))
+            )
+        except:
+            logger.error("Failed to explain %s query." % name, exc_info=True)
+    return
 
 def register(config, local_etcd, local_mongodb, logger):
     """
@@ -98,6 +202,80 @@ def register(config, local_etcd, local_mongodb, logger):
     logger.info("Register thread terminating.")
     return
 
+def backfill_assignment(mongodb_task):
+    """
+    Set priority and fair share tag of undone tasks with no executor added without them, by judicators before they
+    were introduced, which add tasks with neither of them
+    Tasks without them are sorted after all others for assignment, and would wait behind new tasks forever
+    They get priority 0 and share tag 0, so they are assigned first in the default priority, as they are added earlier
+    A missing priority is indexed as null, so tasks are found through the assignment index and only the ones waiting
+    are looked at, while assigned ones are backfilled once they are retried
+    :param mongodb_task: Mongodb collection of tasks
+    :return: Amount of tasks updated
+    """
+    return mongodb_task.update_many(
+        {"done": False, "executor": None, "priority": None},
+        {"$set": {"priority": 0, "share": 0}}
+    ).modified_count
+
+def expire_tasks(mongodb_task, expire_time):
+    """
+    Set undone tasks not reported since a time to retrying and remove their executor
+    Expired tasks are found and then updated by update_many in batches, instead of one by one
+    :param mongodb_task: Mongodb collection of tasks
+    :param expire_time: Tasks with report time before it are expired
+    :return: List of ids of retried tasks
+    """
+    query = {"done": False, "executor": {"$ne": None}, "report_time": {"$lt": expire_time}}
+    retried = []
+    while True:
+        ids = [x["_id"] for x in mongodb_task.find(query, ["_id"], limit=SWEEP_BATCH_SIZE)]
+        if not ids:
+            break
+        # Tasks reported or done in the meantime are not matched again
+        result = mongodb_task.update_many(
+            dict(query, _id={"$in": ids}),
+            {"$set": {"executor": None, "status": TASK_STATUS["RETRYING"]}}
+        )
+        if result.modified_count == len(ids):
+            retried.extend(ids)
+        else:
+            # Only look for which ones are retried if some are not
+            retried.extend(
+                x["_id"] for x in mongodb_task.find(
+                    {"_id": {"$in": ids}, "executor": None, "status": TASK_STATUS["RETRYING"]}, ["_id"]
+                )
+            )
+        if len(ids) < SWEEP_BATCH_SIZE:
+            break
+    return retried
+
+def expire_executors(mongodb_executor, expire_time):
+    """
+    Delete executors not reported since a time
+    Expired executors are found and then deleted by delete_many in batches, instead of one by one
+    :param mongodb_executor: Mongodb collection of executors
+    :param expire_time: Executors with report time before it are expired
+    :return: List of hostnames of deleted executors
+    """
+    query = {"report_time": {"$lt": expire_time}}
+    deleted = []
+    while True:
+        found = dict((x["_id"], x["hostname"]) for x in mongodb_executor.find(query, limit=SWEEP_BATCH_SIZE))
+        if not found:
+            break
+        ids = list(found.keys())
+        # Executors reported in the meantime are not matched again
+        result = mongodb_executor.delete_many(dict(query, _id={"$in": ids}))
+        if result.deleted_count < len(ids):
+            # Only look for which ones are deleted if some are not
+            for x in mongodb_executor.find({"_id": {"$in": ids}}, ["_id"]):
+                del found[x["_id"]]
+        deleted.extend(found.values())
+        if len(ids) < SWEEP_BATCH_SIZE:
+            break
+    return deleted
+
 def lead(config, local_etcd, local_mongodb, mongodb_task, mongodb_executor, logger):
     """
     Target function for lead thread
@@ -147,27 +325,34 @@ def lead(config, local_etcd, local_mongodb, mongodb_task, mongodb_executor, logg
             if success:
                 logger.info("Checking tasks and executors as leader.")
 
+                sweep_start = time.time()
+
+                # Backfill tasks added by judicators of older versions, also during rolling upgrades
+                backfilled = backfill_assignment(mongodb_task)
+                if backfilled:
+                    logger.warning("Set default priority or share tag of %d tasks." % backfilled)
+
                 # Set all expired task to retrying and remove their executor
                 expire_time = datetime.datetime.now() - datetime.timedelta(seconds=config["task"]["expiration"])
-                while True:
-                    res = mongodb_task.find_one_and_update(
-                        {"done": False, "executor": {"$ne": None}, "report_time": {"$lt": expire_time}},
-                        {"$set": {"executor": None, "status": TASK_STATUS["RETRYING"]}}
-                    )
-                    if not res:
-                        break
-                    logger.warning("Set status of expired task %s to retrying." % str(res["_id"]))
+                retried = expire_tasks(mongodb_task, expire_time)
+                for id in retried:
+                    logger.warning("Set status of expired task %s to retrying." % str(id))
 
                 # Remove all expired executor from the record
                 # Currently this is only for monitor usage
                 expire_time = datetime.datetime.now() - datetime.timedelta(seconds=config["executor"]["expiration"])
-                while True:
-                    res = mongodb_executor.find_one_and_delete({"report_time": {"$lt": expire_time}})
-                    if not res:
-                        break
-                    logger.warning("Deleted expired executor %s." % res["hostname"])
+                deleted = expire_executors(mongodb_executor, expire_time)
+                for hostname in deleted:
+                    logger.warning("Deleted expired executor %s." % hostname)
 
-                logger.info("Checked tasks and executors.")
+                # The sweep is done while holding the leadership, which must not expire before the next refresh
+                sweep_duration = time.time() - sweep_start
+                logger.info(
+                    "Checked tasks and executors in %.3f seconds, with %d tasks retried and %d executors deleted." %
+                    (sweep_duration, len(retried), len(deleted))
+                )
+                if sweep_duration > (config["lead"]["ttl"] - config["lead"]["interval"]) / 2:
+                    logger.warning("Checking tasks and executors took %.3f seconds." % sweep_duration)
         except:
             logger.error("Failed to carry out leader process.", exc_info=True)
 
@@ -177,16 +362,93 @@ class RPCService:
     """
     RPC handler class
     """
-    def __init__(self, logger, mongodb_task, mongodb_executor):
+    def __init__(
+        self, logger, mongodb_task, mongodb_executor, mongodb_blob, mongodb_share,
+        share_weights=None, executor_refresh=0, read_preferences=None, executor_expiration=None,
+        task_expiration=None
+    ):
         """
         Initializer of the class
         :param logger: The logger
+        :param mongodb_task: Mongodb collection of tasks
+        :param mongodb_executor: Mongodb collection of executors
+        :param mongodb_blob: Mongodb collection of blobs
+        :param mongodb_share: Mongodb collection of fair share tags of users
+        :param share_weights: Dictionary from user id string to its weight in fair share, 1 if not given
+        :param executor_refresh: Min seconds between refreshes of report time of an executor, 0 for every report
+        :param read_preferences: Dictionary from name of rpc method to configuration of its read preference
+        :param executor_expiration: Seconds after which executors not refreshed are deleted by the leader, None if not
+        known
+        :param task_expiration: Seconds after which tasks not refreshed are retried by the leader, None if not known
         """
         self.logger = logger
         self.mongodb_task = mongodb_task
         self.mongodb_executor = mongodb_executor
+        self.mongodb_blob = mongodb_blob
+        self.mongodb_share = mongodb_share
+        self.share_weights = share_weights or {}
+        # Refreshes are skipped for at most half the expiration, so that working executors are not expired by the
+        # leader between two refreshes
+        self.executor_refresh = executor_refresh
+        if executor_expiration is not None:
+            self.executor_refresh = min(executor_refresh, executor_expiration / 2)
+        # Reports wait for new tasks for at most half the task expiration, so that executing tasks refreshed at the
+        # start of a report are not expired before the next report
+        self.max_dispatch_wait = MAX_DISPATCH_WAIT
+        if task_expiration is not None:
+            self.max_dispatch_wait = min(MAX_DISPATCH_WAIT, task_expiration / 2)
+        # Read preferences of rpc methods only reading, the primary is used for those not given
+        self.read_preferences = dict(
+            (method, generate_read_preference(x)) for method, x in (read_preferences or {}).items()
+        )
+
+        # Condition notified, with version increased, when tasks become available for assignment
+        self.dispatch = threading.Condition()
+        self.dispatch_version = 0
+        self.watch_thread = threading.Thread(target=self.watch)
+        self.watch_thread.setDaemon(True)
+        self.watch_thread.start()
+        return
+
+    def notify_dispatch(self):
+        """
+        Wake up all reports waiting for new tasks
+        :return: None
+        """
+        with self.dispatch:
+            self.dispatch_version += 1
+            self.dispatch.notify_all()
+        return
+
+    def watch(self):
+        """
+        Target function for watch thread
+        Watch the change stream of the task collection, so that tasks added through any judicator can be dispatched
+        :return: None
+        """
+        self.logger.info("Watch thread started.")
+        while working:
+            try:
+                with self.mongodb_task.watch(DISPATCH_WATCH_PIPELINE) as stream:
+                    for _ in stream:
+                        self.notify_dispatch()
+            except:
+                self.logger.error("Failed to watch task collection.", exc_info=True)
+            time.sleep(DISPATCH_WATCH_RETRY)
+        self.logger.info("Watch thread terminating.")
         return
 
+    def reader(self, method, collection):
+        """
+        Get a collection for reading in an rpc method, with the read preference of the method
+        :param method: Name of the rpc method
+        :param collection: The collection
+        :return: The collection with the read preference
+        """
+        if method not in self.read_preferences:
+            return collection
+        return collection.with_options(read_preference=self.read_preferences[method])
+
     def ping(self):
         """
         Interface: Ping
@@ -212,6 +474,18 @@ class RPCService:
         except:
             self.logger.error("Failed to extract new task.", exc_info=True)
             return AddReturn(ReturnCode.INVALID_INPUT, None)
+        # Tasks without requirement can be assigned to any executor with vacant places
+        # The field is left out instead of being null, so that it is missing when querying its fields
+        if not task["requirement"]:
+            del task["requirement"]
+        elif not check_resource(task["requirement"]):
+            self.logger.warning("Invalid requirement of new task: %s." % str(task["requirement"]))
+            return AddReturn(ReturnCode.INVALID_INPUT, None)
+        if task["priority"] is None:
+            task["priority"] = 0
+        elif not (isinstance(task["priority"], int) and check_int(task["priority"])):
+            self.logger.warning("Invalid priority of new task: %s." % str(task["priority"]))
+            return AddReturn(ReturnCode.INVALID_INPUT, None)
         del task["id"]
         task["add_time"] = datetime.datetime.now()
         task["done"] = False
@@ -220,22 +494,165 @@ class RPCService:
         self.logger.info("Adding new task to database.")
 
         # Add and return the auto generated id
+        # References to blobs are added first, and released if the task is not added
+        digests = []
         try:
+            # Move zip files into the blob store, leaving only their digests in the task
+            for section, field, digest_field in BLOB_FIELDS:
+                if not task[section]:
+                    continue
+                result, digest = self.store_blob(task[section][field], task[section][digest_field])
+                if result != ReturnCode.OK:
+                    self.logger.warning("Failed to store %s %s of new task with code %d." % (section, field, result))
+                    self.release_blobs(digests)
+                    return AddReturn(result, None)
+                if digest:
+                    digests.append(digest)
+                task[section][field] = b""
+                task[section][digest_field] = digest
+
+            task["share"] = self.share_tag(task["user"])
             result = self.mongodb_task.insert_one(task)
             self.logger.info("Added task %s.", str(result.inserted_id))
+            # Wake up waiting reports in this process at once, without waiting for the change stream
+            self.notify_dispatch()
             return AddReturn(ReturnCode.OK, str(result.inserted_id))
         except pymongo.errors.WriteError as e:
+            self.release_blobs(digests)
             if "large" in str(e):
                 self.logger.error("Failed to add new task as it is too large.", exc_info=True)
                 return AddReturn(ReturnCode.TOO_LARGE, None)
             raise e
         except pymongo.errors.DocumentTooLarge:
+            self.release_blobs(digests)
             self.logger.error("Failed to add new task as it is too large.", exc_info=True)
             return AddReturn(ReturnCode.TOO_LARGE, None)
         except:
+            self.release_blobs(digests)
             self.logger.error("Failed to add new task.", exc_info=True)
             return AddReturn(ReturnCode.ERROR, None)
 
+    def store_blob(self, data, digest):
+        """
+        Store a blob, or add a reference to it if it has already been stored
+        :param data: Binary content of the blob, can be empty if the blob is assumed to have been stored
+        :param digest: Digest of the blob, can be None if the content is given
+        :return: Tuple, (return code, digest of the blob or None if there is no blob)
+        """
+        if data:
+            if digest and digest != blob_digest(data):
+                return ReturnCode.INVALID_INPUT, None
+            digest = blob_digest(data)
+        elif not digest:
+            return ReturnCode.OK, None
+        elif not check_digest(digest):
+            return ReturnCode.INVALID_INPUT, None
+
+        while True:
+            if self.mongodb_blob.update_one({"_id": digest}, {"$inc": {"refs": 1}}).matched_count:
+                self.logger.info("Added reference to blob %s." % digest)
+                return ReturnCode.OK, digest
+            # The content must be given to store a blob which has not been stored
+            if not data:
+                return ReturnCode.NOT_EXIST, None
+            try:
+                self.mongodb_blob.insert_one({
+                    "_id": digest,
+                    "data": data,
+                    "size": len(data),
+                    "refs": 1,
+                    "add_time": datetime.datetime.now()
+                })
+                self.logger.info("Stored blob %s." % digest)
+                return ReturnCode.OK, digest
+            except pymongo.errors.DuplicateKeyError:
+                # Stored by others at the same time, add a reference again
+                continue
+
+    def release_blobs(self, digests):
+        """
+        Release references to blobs, and delete those no longer referenced
+        :param digests: Digests of the blobs
+        :return: None
+        """
+        for digest in digests:
+            try:
+                self.mongodb_blob.update_one({"_id": digest}, {"$inc": {"refs": -1}})
+                if self.mongodb_blob.delete_one({"_id": digest, "refs": {"$lte": 0}}).deleted_count:
+                    self.logger.info("Deleted blob %s." % digest)
+            except:
+                self.logger.error("Failed to release blob %s." % digest, exc_info=True)
+        return
+
+    def check_blobs(self, digests):
+        """
+        Interface: Check blobs
+        Check which blobs have not been stored, so that only they need to be uploaded
+        :param digests: Digests of the blobs
+        :return: A CheckBlobsReturn structure containing return code and digests of blobs not stored
+        """
+        self.logger.debug("Received rpc request: check_blobs.")
+        # Input check
+        if not (isinstance(digests, list) and all(check_digest(x) for x in digests)):
+            return CheckBlobsReturn(ReturnCode.INVALID_INPUT, [])
+
+        stored = set(
+            x["_id"] for x in self.reader("check_blobs", self.mongodb_blob).find(
+                {"_id": {"$in": digests}}, projection=["_id"]
+            )
+        )
+        return CheckBlobsReturn(ReturnCode.OK, [x for x in digests if x not in stored])
+
+    def get_blob(self, digest):
+        """
+        Interface: Get blob
+        Get the content of a blob
+        :param digest: Digest of the blob
+        :return: A GetBlobReturn structure containing return code and the content
+        """
+        self.logger.debug("Received rpc request: get_blob.")
+        # Input check
+        if not check_digest(digest):
+            return GetBlobReturn(ReturnCode.INVALID_INPUT, None)
+
+        blob = self.reader("get_blob", self.mongodb_blob).find_one({"_id": digest}, projection=["data"])
+        if not blob:
+            return GetBlobReturn(ReturnCode.NOT_EXIST, None)
+        self.logger.info("Got blob %s." % digest)
+        return GetBlobReturn(ReturnCode.OK, blob["data"])
+
+    def get_file(self, id, file):
+        """
+        Interface: Get file
+        Get one file of a task, without fetching other fields of the task
+        :param id: The id of the task
+        :param file: Name of the file, one of TASK_FILES
+        :return: A GetFileReturn structure containing return code and the content, zipped by zlib if not a zip file
+        """
+        self.logger.debug("Received rpc request: get_file.")
+        # Input check
+        if not (check_id(id) and file in TASK_FILES):
+            return GetFileReturn(ReturnCode.INVALID_INPUT, None)
+        self.logger.info("Getting file %s of task %s." % (file, id))
+
+        path, digest_path = TASK_FILES[file]
+        task = self.reader("get_file", self.mongodb_task).find_one(
+            {"_id": ObjectId(id)},
+            projection=[path] + ([digest_path] if digest_path else [])
+        )
+        if not task:
+            return GetFileReturn(ReturnCode.NOT_EXIST, None)
+        data = get_path(task, path)
+        # Fetch the zip file from the blob store if only the digest is kept in the task
+        if not data and digest_path and get_path(task, digest_path):
+            blob = self.reader("get_file", self.mongodb_blob).find_one(
+                {"_id": get_path(task, digest_path)},
+                projection=["data"]
+            )
+            data = blob["data"] if blob else None
+        self.logger.info("Got file %s of task %s." % (file, id))
+        return GetFileReturn(ReturnCode.OK, data or b"")
+
     def cancel(self, id):
         """
         Interface: Cancel
@@ -252,7 +669,8 @@ class RPCService:
         # Try to update the status and executor of a undone task
         result = self.mongodb_task.find_one_and_update(
             {"_id": ObjectId(id), "done": False},
-            {"$set": {"executor": None, "status": TASK_STATUS["CANCELLED"], "done": True}}
+            {"$set": {"executor": None, "status": TASK_STATUS["CANCELLED"], "done": True}},
+            projection=["_id"]
         )
         if result:
             self.logger.info("Cancelled task %s." % id)
@@ -274,36 +692,26 @@ class RPCService:
         """
         self.logger.debug("Received rpc request: search.")
 
-        # Check and add conditions to the filter
-        filter = {}
+        # Check and generate the filter
         try:
-            if id:
-                if not check_id(id):
-                    raise Exception("Invalid id.")
-                filter["_id"] = ObjectId(id)
-            if user is not None:
-                filter["user"] = user
-            if start_time or end_time:
-                filter["add_time"] = {}
-                if start_time:
-                    filter["add_time"]["$gte"] = dateutil.parser.parse(start_time)
-                if end_time:
-                    filter["add_time"]["$lte"] = dateutil.parser.parse(end_time)
+            filter = self.search_filter(id, user, start_time, end_time)
         except:
             self.logger.error("Failed because of invalid data.", exc_info=True)
             return SearchReturn(ReturnCode.INVALID_INPUT, 0, [])
         self.logger.info("Searching with filter: %s." % str(filter))
 
         # Count result first for page calculation later
-        cnt = self.mongodb_task.count(filter=filter)
+        mongodb_task = self.reader("search", self.mongodb_task)
+        cnt = mongodb_task.count(filter=filter)
         # If nothing found, return directly
         if cnt == 0:
             self.logger.info("Found empty result.")
             return SearchReturn(ReturnCode.OK, 0, [])
 
         # Find all result and transform them into TaskBrief structure
-        result = self.mongodb_task.find(
+        result = mongodb_task.find(
             filter=filter,
+            projection=TASK_BRIEF_PROJECTION,
             sort=[(
                 "add_time",
                 pymongo.ASCENDING if old_to_new else pymongo.DESCENDING
@@ -322,6 +730,94 @@ class RPCService:
             [generate(r, brief=True) for r in result]
         )
 
+    def cursor_search(self, id, user, start_time, end_time, old_to_new, limit, cursor, count):
+        """
+        Interface: Cursor Search
+        Search tasks according to conditions, continuing after a cursor instead of skipping previous pages
+        :param id: Exact id of a task
+        :param user: Exact user id of a task
+        :param start_time: Start time of tasks
+        :param end_time: End time of tasks
+        :param old_to_new: If the result should be sorted in old-to-new order
+        :param limit: Limitation of the total amount
+        :param cursor: Cursor returned by the previous search, or None for the first search
+        :param count: If the total amount of tasks should be counted
+        :return: A CursorSearchReturn structure containing the result, total amount (-1 if not counted) and cursor
+        """
+        self.logger.debug("Received rpc request: cursor_search.")
+
+        # Check and generate the filter, and add conditions for the cursor to it
+        order = pymongo.ASCENDING if old_to_new else pymongo.DESCENDING
+        try:
+            filter = self.search_filter(id, user, start_time, end_time)
+            cursor_filter = filter
+            if cursor:
+                add_time, last_id = cursor.split("|")
+                add_time = dateutil.parser.parse(add_time)
+                if not check_id(last_id):
+                    raise Exception("Invalid id in cursor.")
+                op = "$gt" if old_to_new else "$lt"
+                cursor_filter = {
+                    "$and": [
+                        filter,
+                        {"$or": [{"add_time": {op: add_time}}, {"add_time": add_time, "_id": {op: ObjectId(last_id)}}]}
+                    ]
+                }
+        except:
+            self.logger.error("Failed because of invalid data.", exc_info=True)
+            return CursorSearchReturn(ReturnCode.INVALID_INPUT, -1, [], None)
+        self.logger.info("Searching with filter: %s." % str(cursor_filter))
+
+        # Find one more task than the limitation to know whether there are more tasks
+        mongodb_task = self.reader("cursor_search", self.mongodb_task)
+        result = mongodb_task.find(
+            filter=cursor_filter,
+            projection=TASK_BRIEF_PROJECTION,
+            sort=[("add_time", order), ("_id", order)],
+            limit=(limit + 1 if limit else 0)
+        )
+        result = [x for x in result]
+        next_cursor = None
+        if limit and len(result) > limit:
+            result = result[: limit]
+            next_cursor = result[-1]["add_time"].isoformat() + "|" + str(result[-1]["_id"])
+        for r in result:
+            transform_id(r)
+        self.logger.info("Found result: %s." % str([x["id"] for x in result]))
+
+        # Count only if required, using the estimation from metadata when there is no condition
+        total = -1
+        if count:
+            if filter:
+                total = mongodb_task.count_documents(filter)
+            else:
+                total = mongodb_task.estimated_document_count()
+        return CursorSearchReturn(ReturnCode.OK, total, [generate(r, brief=True) for r in result], next_cursor)
+
+    def search_filter(self, id, user, start_time, end_time):
+        """
+        Generate a mongodb filter for searching tasks
+        :param id: Exact id of a task
+        :param user: Exact user id of a task
+        :param start_time: Start time of tasks
+        :param end_time: End time of tasks
+        :return: The filter, an exception is raised if any condition is invalid
+        """
+        filter = {}
+        if id:
+            if not check_id(id):
+                raise Exception("Invalid id.")
+            filter["_id"] = ObjectId(id)
+        if user is not None:
+            filter["user"] = user
+        if start_time or end_time:
+            filter["add_time"] = {}
+            if start_time:
+                filter["add_time"]["$gte"] = dateutil.parser.parse(start_time)
+            if end_time:
+                filter["add_time"]["$lte"] = dateutil.parser.parse(end_time)
+        return filter
+
     def get(self, id):
         """
         Interface: Get
@@ -336,21 +832,90 @@ class RPCService:
         self.logger.info("Getting task %s." % id)
 
         # Find and transform the result
-        result = self.mongodb_task.find_one({"_id": ObjectId(id)})
+        result = self.reader("get", self.mongodb_task).find_one({"_id": ObjectId(id)})
         self.logger.info("Got task: %s." % id)
         if result:
             transform_id(result)
             return GetReturn(ReturnCode.OK, generate(result))
         return GetReturn(ReturnCode.NOT_EXIST, None)
 
-    def report(self, executor, complete, executing, vacant):
+    def preview(self, result):
+        """
+        Add previews of text files to the result of a task, so that the files are not read when truncated
+        :param result: The result dictionary, or None
+        :return: The result dictionary, with previews of files zipped by zlib in the preview field
+        """
+        if result:
+            try:
+                result["preview"] = {f: truncate_zipped(result[f]) for f in PREVIEW_FIELDS}
+            except:
+                self.logger.error("Failed to generate previews of result.", exc_info=True)
+        return result
+
+    def get_fields(self, id, fields, truncate):
+        """
+        Interface: Get fields
+        Get a specific task by id with only some of its files, so that others are neither read nor sent
+        :param id: The id of the task
+        :param fields: Names of the files to be returned, in TASK_FILES, others are left empty
+        :param truncate: Max length in characters of text files returned, 0 for not truncating
+        :return: A GetResult structure containing return code and the task
+        """
+        self.logger.debug("Received rpc request: get_fields.")
+        # Input check
+        if not (check_id(id) and
+                isinstance(fields, list) and all(f in TASK_FILES for f in fields) and
+                isinstance(truncate, int) and truncate >= 0):
+            return GetReturn(ReturnCode.INVALID_INPUT, None)
+        self.logger.info("Getting fields %s of task %s." % (str(fields), id))
+
+        # Read previews of result text files instead of the files, if they are long enough
+        previews = [f for f in fields if f in PREVIEW_FIELDS] if 0 < truncate <= TRUNCATE_MAX_LENGTH else []
+        result = self.reader("get_fields", self.mongodb_task).find_one(
+            {"_id": ObjectId(id)},
+            projection=TASK_FIELDS_PROJECTION +
+                       [TASK_FILES[f][0] for f in fields if f not in previews] +
+                       ["result.preview." + f for f in previews]
+        )
+        if not result:
+            return GetReturn(ReturnCode.NOT_EXIST, None)
+        if previews and isinstance(result.get("result"), dict):
+            preview = result["result"].pop("preview", None)
+            # Tasks done before previews are stored have none, so the files are read and truncated instead
+            if preview is None:
+                files = self.reader("get_fields", self.mongodb_task).find_one(
+                    {"_id": ObjectId(id)},
+                    projection=[TASK_FILES[f][0] for f in previews]
+                )
+                preview = (files or {}).get("result") or {}
+                previews = []
+            for f in PREVIEW_FIELDS:
+                if f in fields:
+                    result["result"][f] = preview.get(f)
+        # Fill files not requested, and truncate text files
+        for file, (path, digest_path) in TASK_FILES.items():
+            section, field = path.split(".")
+            if not isinstance(result.get(section), dict):
+                result[section] = None
+                continue
+            result[section][field] = result[section].get(field) or b""
+            if truncate and not digest_path and not (file in previews and truncate == TRUNCATE_MAX_LENGTH):
+                result[section][field] = truncate_zipped(result[section][field], truncate)
+        self.logger.info("Got fields of task: %s." % id)
+        transform_id(result)
+        return GetReturn(ReturnCode.OK, generate(result))
+
+    def report(self, executor, complete, executing, vacant, wait=None, capacity=None):
         """
         Interface: Report
         Accept report from an executor, update corresponding information, and assign new task to the executor
+        If no task can be assigned, the report can wait for new tasks before returning
         :param executor: Reporting executor
         :param complete: Completed tasks of the executor
         :param executing: Executing tasks
         :param vacant: Vacant place of the executor
+        :param wait: Max seconds to wait for new tasks if none is assigned, None or 0 to return at once
+        :param capacity: Resource structure of available resources of the executor, None if not limited
         :return: A ReportResult structure containing return code, tasks needed to be deleted, and assigned tasks
         """
         self.logger.debug("Received rpc request: report.")
@@ -358,21 +923,37 @@ class RPCService:
         if not (isinstance(executor, str) and executor and
                 isinstance(complete, list) and
                 isinstance(executing, list) and
-                isinstance(vacant, int) and vacant >= 0):
+                isinstance(vacant, int) and vacant >= 0 and
+                (wait is None or isinstance(wait, int) and wait >= 0) and
+                (capacity is None or isinstance(capacity, Resource))):
             return ReportReturn(ReturnCode.INVALID_INPUT, [], [])
+        # Resources not reported are not limited
+        if capacity:
+            capacity = dict(
+                (k, max(getattr(capacity, k), 0)) for k in TASK_RESOURCES if getattr(capacity, k) is not None
+            )
         self.logger.info("Received report from executor %s." % executor)
+        # Version of dispatch before claiming, so that tasks added afterwards always wake up the waiting
+        with self.dispatch:
+            dispatch_version = self.dispatch_version
 
-        # Refresh or add the information of the executor
-        result = self.mongodb_executor.find_one_and_update(
-            {"hostname": executor},
-            {"$set": {"report_time": datetime.datetime.now()}}
-        )
-        if not result:
-            self.mongodb_executor.insert_one({"hostname": executor, "report_time": datetime.datetime.now()})
-        self.logger.info("Updated executor %s." % executor)
+        # Refresh or add the information of the executor, if it has not been refreshed recently by any judicator
+        # An executor refreshed recently fails the upsert on the unique hostname without writing mongodb
+        now = datetime.datetime.now()
+        try:
+            result = self.mongodb_executor.update_one(
+                {"hostname": executor, "report_time": {"$lt": now - datetime.timedelta(seconds=self.executor_refresh)}},
+                {"$set": {"report_time": now}},
+                upsert=True
+            )
+            if result.upserted_id is not None:
+                self.logger.info("Added executor %s." % executor)
+            else:
+                self.logger.info("Updated executor %s." % executor)
+        except pymongo.errors.DuplicateKeyError:
+            pass
 
         delete_list, assign_list = [], []
-        executing_list = []
         # Operation taken when the result is too big to write in mongodb
         too_big_operation = {
             "$set": {
@@ -383,74 +964,87 @@ class RPCService:
                 "result": None
             }
         }
-        # Update all completed tasks, if the task indeed belong to the executor, and request the executor to delete it
+        # Update all completed tasks in one bulk write, if the task indeed belong to the executor
+        complete_list = []
         for t in complete:
             try:
                 task = extract(t)
-                self.logger.info("Updating complete task %s." % task["id"])
-                result = False
-                try:
-                    result = self.mongodb_task.find_one_and_update(
-                        {"_id": ObjectId(task["id"]), "executor": executor},
-                        {
-                            "$set": {
-                                "done": True,
-                                "status": task["status"],
-                                "executor": None,
-                                "report_time": datetime.datetime.now(),
-                                "result": task["result"]
-                            }
-                        }
-                    )
-                except pymongo.errors.OperationFailure as e:
-                    # If the reported task is too big (this should not happened), set the status to error
-                    if "large" in str(e):
-                        self.logger.error("Failed to update task %s as it is too large." % task["id"], exc_info=True)
-                        result = self.mongodb_task.find_one_and_update(
-                            {"_id": ObjectId(task["id"]), "executor": executor},
-                            too_big_operation
-                        )
-                    else:
-                        raise e
-                except pymongo.errors.DocumentTooLarge:
-                    self.logger.error("Failed to update task %s as it is too large." % task["id"], exc_info=True)
-                    result = self.mongodb_task.find_one_and_update(
-                        {"_id": ObjectId(task["id"]), "executor": executor},
-                        too_big_operation
-                    )
-                except:
-                    self.logger.error("Failed to update task %s." % task["id"], exc_info=True)
-                if not result:
-                    self.logger.warning("Skipped task %s as it is not found." % task["id"])
-                else:
-                    self.logger.info("Updated complete task %s." % task["id"])
-                # Complete task is going to be deleted, no matter whether there is such a task record
-                delete_list.append(generate(task, brief=True))
+                complete_list.append((ObjectId(task["id"]), task))
             except:
-                # If errors occur during updating, the report_time should not be updated
+                # If errors occur during extracting, the report_time should not be updated
                 # and the task is going to cancelled (due to expiration) if it fails to be updated for several times
-                self.logger.error("Failed to update complete task.", exc_info=True)
+                self.logger.error("Failed to extract complete task.", exc_info=True)
+        self.logger.info("Updating complete tasks %s." % str([task["id"] for _, task in complete_list]))
+        matched, errors = self.bulk_update([
+            (
+                {"_id": id, "executor": executor},
+                {
+                    "$set": {
+                        "done": True,
+                        "status": task["status"],
+                        "executor": None,
+                        "report_time": datetime.datetime.now(),
+                        "result": self.preview(task["result"])
+                    }
+                }
+            ) for id, task in complete_list
+        ])
+        # If the reported task is too big (this should not happened), set the status to error
+        too_big_list = []
+        for i, (id, task) in enumerate(complete_list):
+            if i not in errors:
                 continue
+            if "large" in errors[i]:
+                self.logger.error("Failed to update task %s as it is too large: %s" % (task["id"], errors[i]))
+                too_big_list.append(id)
+            else:
+                self.logger.error("Failed to update task %s: %s" % (task["id"], errors[i]))
+        if too_big_list:
+            self.mongodb_task.update_many({"_id": {"$in": too_big_list}, "executor": executor}, too_big_operation)
+        if matched < len(complete_list) - len(errors):
+            self.logger.warning(
+                "Skipped %d complete tasks as they are not found." % (len(complete_list) - len(errors) - matched)
+            )
+        self.logger.info("Updated %d complete tasks." % matched)
+        # Complete task is going to be deleted, no matter whether there is such a task record
+        for _, task in complete_list:
+            delete_list.append(generate(task, brief=True))
 
-        # Update all executing tasks, and request the executor to delete it if the task does not belong to it
+        # Update all executing tasks in one bulk write
+        executing_tasks = []
         for t in executing:
             try:
                 task = extract(t, brief=True)
-                self.logger.info("Updating executing task %s." % task["id"])
-                # Put the id of the task to executing_list for unreported task check up
-                executing_list.append(ObjectId(task["id"]))
-                result = self.mongodb_task.find_one_and_update(
-                    {"_id": ObjectId(task["id"]), "executor": executor},
-                    {"$set": {"status": task["status"], "report_time": datetime.datetime.now()}}
-                )
-                if not result:
-                    delete_list.append(generate(task, brief=True))
-                    self.logger.warning("Skipping executing task %s as it is not found." % task["id"])
-                else:
-                    self.logger.info("Updated executing task %s." % task["id"])
+                executing_tasks.append((ObjectId(task["id"]), task))
             except:
                 # The same thing when handling complete task failure
-                self.logger.error("Failed to update executing task.", exc_info=True)
+                self.logger.error("Failed to extract executing task.", exc_info=True)
+        # Put the id of the task to executing_list for unreported task check up
+        executing_list = [id for id, _ in executing_tasks]
+        self.logger.info("Updating executing tasks %s." % str([task["id"] for _, task in executing_tasks]))
+        matched, errors = self.bulk_update([
+            (
+                {"_id": id, "executor": executor},
+                {"$set": {"status": task["status"], "report_time": datetime.datetime.now()}}
+            ) for id, task in executing_tasks
+        ])
+        for i in errors:
+            self.logger.error("Failed to update executing task %s: %s" % (executing_tasks[i][1]["id"], errors[i]))
+        # Request the executor to delete the task if it does not belong to it
+        if matched < len(executing_tasks):
+            owned = set(
+                x["_id"] for x in self.mongodb_task.find(
+                    {"_id": {"$in": executing_list}, "executor": executor},
+                    ["_id"]
+                )
+            )
+        else:
+            owned = set(executing_list)
+        for id, task in executing_tasks:
+            if id not in owned:
+                delete_list.append(generate(task, brief=True))
+                self.logger.warning("Skipping executing task %s as it is not found." % task["id"])
+        self.logger.info("Updated %d executing tasks." % len(owned))
 
         # Find all tasks which should be executed by this executor but not appear in executing list
         # And set their status to retry, and also add them to delete list
@@ -458,7 +1052,8 @@ class RPCService:
         while True:
             task = self.mongodb_task.find_one_and_update(
                 {"_id": {"$nin": executing_list}, "done": False, "executor": executor},
-                {"$set": {"executor": None, "status": TASK_STATUS["RETRYING"]}}
+                {"$set": {"executor": None, "status": TASK_STATUS["RETRYING"]}},
+                projection=TASK_BRIEF_PROJECTION
             )
             if not task:
                 break
@@ -468,24 +1063,141 @@ class RPCService:
             )
             delete_list.append(generate(task, True))
 
-        # While there is still vacant position in the executor
-        while vacant:
-            # Find task undone task with no executor and assign it to the executor
-            task = self.mongodb_task.find_one_and_update(
-                {"done": False, "executor": None},
-                {"$set": {"executor": executor, "report_time": datetime.datetime.now()}},
-                return_document=pymongo.ReturnDocument.AFTER
-            )
-            if not task:
-                self.logger.info("No more task to assign for executor %s." % executor)
+        # Claim undone tasks with no executor for all vacant position in the executor
+        # If nothing is claimed, wait for new tasks and claim again until the deadline
+        deadline = time.time() + min(wait or 0, self.max_dispatch_wait)
+        while True:
+            for task in self.claim(executor, vacant, capacity):
+                transform_id(task)
+                assign_list.append(generate(task))
+                self.logger.info("Assigned Task %s to executor %s." % (task["id"], executor))
+            if assign_list or vacant == 0 or time.time() >= deadline:
                 break
-            transform_id(task)
-            assign_list.append(generate(task))
-            vacant = vacant - 1
-            self.logger.info("Assigned Task %s to executor %s." % (task["id"], executor))
+            with self.dispatch:
+                self.dispatch.wait_for(lambda: self.dispatch_version != dispatch_version, deadline - time.time())
+                dispatch_version = self.dispatch_version
+        if len(assign_list) < vacant:
+            self.logger.info("No more task to assign for executor %s." % executor)
 
         return ReportReturn(ReturnCode.OK, delete_list, assign_list)
 
+    def share_tag(self, user):
+        """
+        Get the fair share tag of a new task of a user, tasks with smaller tags are assigned first in a priority
+        Tags of a user increase by the reciprocal of its weight for each task, starting from the virtual time, which
+        is the largest tag of assigned tasks, if the user has no task waiting. So a user adding many tasks at once
+        takes turns with others adding tasks later, in proportion to their weights, instead of being served first
+        :param user: The user id
+        :return: The tag
+        """
+        virtual_time = self.mongodb_share.find_one({"_id": SHARE_VIRTUAL_TIME}) or {"tag": 0}
+        self.mongodb_share.update_one({"_id": user}, {"$max": {"tag": virtual_time["tag"]}}, upsert=True)
+        return self.mongodb_share.find_one_and_update(
+            {"_id": user},
+            {"$inc": {"tag": 1 / self.share_weights.get(str(user), 1)}},
+            return_document=pymongo.ReturnDocument.AFTER
+        )["tag"]
+
+    def bulk_update(self, operations):
+        """
+        Carry out update operations on tasks in one unordered bulk write
+        If the bulk write can not be sent as a whole, operations are carried out one by one instead
+        :param operations: List of tuples, (filter, update)
+        :return: Tuple, (amount of matched tasks, dictionary from index of each failed operation to its error message)
+        """
+        if not operations:
+            return 0, {}
+        try:
+            result = self.mongodb_task.bulk_write(
+                [pymongo.UpdateOne(f, u) for f, u in operations],
+                ordered=False
+            )
+            return result.matched_count, {}
+        except pymongo.errors.BulkWriteError as e:
+            return e.details["nMatched"], dict((x["index"], x["errmsg"]) for x in e.details["writeErrors"])
+        except pymongo.errors.DocumentTooLarge:
+            self.logger.warning("Failed to carry out bulk write as it is too large.", exc_info=True)
+
+        # Fall back to separate updates, so that only the too large ones fail
+        matched, errors = 0, {}
+        for i, (f, u) in enumerate(operations):
+            try:
+                matched += self.mongodb_task.update_one(f, u).matched_count
+            except pymongo.errors.DocumentTooLarge as e:
+                errors[i] = "Document too large: %s" % str(e)
+            except pymongo.errors.OperationFailure as e:
+                errors[i] = str(e)
+        return matched, errors
+
+    def claim(self, executor, amount, capacity=None):
+        """
+        Claim at most a certain amount of undone tasks with no executor for an executor, in the order of assignment
+        Candidates are found first and then claimed by a single update_many, which only takes tasks still with no
+        executor, so no task can be claimed by two executors even if other judicators are claiming at the same time
+        With a capacity, candidates are packed in the order they are found, skipping those no longer fitting in the
+        remaining capacity, and tasks requiring more than the whole capacity are not looked at
+        :param executor: Name of the executor
+        :param amount: Max amount of tasks to be claimed
+        :param capacity: Dictionary of available resources of the executor, None or missing ones for not limited
+        :return: List of claimed tasks
+        """
+        claimed = []
+        capacity = dict(capacity or {})
+        for _ in range(CLAIM_ROUNDS):
+            if amount <= 0:
+                break
+            # Find candidates
+            # Tasks without requirement or some of its fields do not require the corresponding resources
+            query = {"done": False, "executor": None}
+            for k, v in capacity.items():
+                query["requirement." + k] = {"$not": {"$gt": v}}
+            found = self.mongodb_task.find(
+                query,
+                ["_id", "requirement"],
+                sort=ASSIGNMENT_SORT,
+                limit=amount * CLAIM_CANDIDATES_FACTOR if capacity else amount
+            )
+            candidates, remaining = [], dict(capacity)
+            for x in found:
+                requirement = x.get("requirement") or {}
+                if any((requirement.get(k) or 0) > v for k, v in remaining.items()):
+                    continue
+                for k in remaining:
+                    remaining[k] -= requirement.get(k) or 0
+                candidates.append(x["_id"])
+                if len(candidates) >= amount:
+                    break
+            if not candidates:
+                break
+            # Claim all candidates which have not been claimed by others
+            # The report time is used to identify tasks claimed in this round
+            # It is truncated to milliseconds as this is the precision of date in mongodb
+            claim_time = datetime.datetime.now()
+            claim_time = claim_time.replace(microsecond=claim_time.microsecond // 1000 * 1000)
+            self.mongodb_task.update_many(
+                {"_id": {"$in": candidates}, "done": False, "executor": None},
+                {"$set": {"executor": executor, "report_time": claim_time}}
+            )
+            result = sorted(
+                self.mongodb_task.find({"_id": {"$in": candidates}, "executor": executor, "report_time": claim_time}),
+                key=lambda x: candidates.index(x["_id"])
+            )
+            claimed.extend(result)
+            amount -= len(result)
+            for x in result:
+                requirement = x.get("requirement") or {}
+                for k in capacity:
+                    capacity[k] -= requirement.get(k) or 0
+            # Move the virtual time of fair share forward
+            tags = [x["share"] for x in result if x.get("share") is not None]
+            if tags:
+                self.mongodb_share.update_one({"_id": SHARE_VIRTUAL_TIME}, {"$max": {"tag": max(tags)}}, upsert=True)
+            # Only try again when some candidates were taken by others and there may be more tasks
+            if len(result) == len(candidates):
+                break
+            self.logger.info("Lost %d candidates to others when claiming tasks." % (len(candidates) - len(result)))
+        return claimed
+
     def executors(self):
         """
         Interface: Executors
@@ -495,13 +1207,232 @@ class RPCService:
         self.logger.debug("Received rpc request: executors.")
 
         # Find all executors and reformat the response.
-        result = self.mongodb_executor.find()
+        result = self.reader("executors", self.mongodb_executor).find()
         result = [x for x in result]
         executors = [
             Executor(str(x["_id"]), x["hostname"], x["report_time"].isoformat()) for x in result
         ]
         return ExecutorsReturn(ReturnCode.OK, executors)
 
+class ReusePortServerSocket(TSocket.TServerSocket):
+    """
+    Rpc server socket with SO_REUSEPORT, so that worker processes can listen on the same port
+    Incoming connections are distributed among the workers by the kernel
+    """
+    def listen(self):
+        """
+        Create, bind and listen on the socket, setting SO_REUSEPORT before binding
+        Unix sockets are not shared, so they are listened on as usual
+        :return: None
+        """
+        if self._unix_socket:
+            return super().listen()
+        res0 = self._resolveAddr()
+        family = socket.AF_INET6 if self._socket_family == socket.AF_UNSPEC else self._socket_family
+        res = next((res for res in res0 if res[0] == family), res0[-1])
+
+        self.handle = socket.socket(res[0], res[1])
+        self.handle.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        self.handle.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEPORT, 1)
+        self.handle.settimeout(None)
+        self.handle.bind(res[4])
+        self.handle.listen(self._backlog)
+        return
+
+def generate_server(processor, address, port, server_config, logger, reuse_port=False):
+    """
+    Generate the rpc server according to the server configuration
+    :param processor: Processor of the rpc service
+    :param address: Listen address
+    :param port: Listen port
+    :param server_config: Server configuration, with type, threads, transport, protocol and expected connections
+    :param logger: The logger
+    :param reuse_port: If the listen socket should be shared with other processes
+    :return: The rpc server
+    """
+    server_type = server_config.get("type", "threaded")
+    transport = server_config.get("transport", "buffered")
+    protocol = server_config.get("protocol", "binary")
+    threads = server_config.get("threads", 16)
+    server_socket = (ReusePortServerSocket if reuse_port else TSocket.TServerSocket)(address, port)
+    transport_factory = TRANSPORT_FACTORIES[transport]()
+    protocol_factory = PROTOCOL_FACTORIES[protocol]()
+
+    if server_type == "threaded":
+        # One thread for each connection, unbounded
+        server = TServer.TThreadedServer(processor, server_socket, transport_factory, protocol_factory)
+    elif server_type == "pool":
+        # One thread for each connection from a bounded pool, held until the connection is closed
+        # Pooled connections from clients are kept open, so once they outnumber the threads, calls on new connections
+        # hang until the clients time out
+        connections = server_config.get("connections")
+        if connections is None:
+            logger.warning(
+                "Pool rpc server has %d threads, with expected connections not set. Calls on connections more than "
+                "threads hang." % threads
+            )
+        elif connections > threads:
+            raise Exception(
+                "Pool rpc server has %d threads, fewer than %d expected connections." % (threads, connections)
+            )
+        server = TServer.TThreadPoolServer(
+            processor, server_socket, transport_factory, protocol_factory, daemon=True
+        )
+        server.setNumThreads(threads)
+    elif server_type == "nonblocking":
+        # Connections are multiplexed by select in one thread, and requests are processed by a bounded pool
+        # This server only speaks framed transport
+        if transport != "framed":
+            raise Exception("Nonblocking rpc server requires framed transport.")
+        server = TNonblockingServer.TNonblockingServer(
+            processor, server_socket, protocol_factory, protocol_factory, threads
+        )
+    else:
+        raise Exception("Unknown rpc server type %s." % server_type)
+
+    logger.info("Generated %s rpc server with %s transport and %s protocol." % (server_type, transport, protocol))
+    return server
+
+def rpc_worker(index, config, mongodb_config, local_etcd, logger):
+    """
+    Target function for rpc worker processes
+    Connect to mongodb again, as clients can not be shared across fork, and serve rpc until terminated
+    :param index: Index of the worker
+    :param config: Configuration dictionary
+    :param mongodb_config: Mongodb configuration dictionary
+    :param local_etcd: Local etcd proxy
+    :param logger: The logger
+    :return: None
+    """
+    logger.info("Rpc worker %d started with pid %d." % (index, os.getpid()))
+    try:
+        local_mongodb = generate_local_mongodb_proxy(mongodb_config, local_etcd, logger)
+        mongodb_task = local_mongodb.client[config["task"]["database"]][config["task"]["collection"]]
+        mongodb_executor = local_mongodb.client[config["executor"]["database"]][config["executor"]["collection"]]
+        blob_config = config.get("blob", DEFAULT_BLOB_CONFIG)
+        mongodb_blob = local_mongodb.client[blob_config["database"]][blob_config["collection"]]
+        share_config = config.get("share", DEFAULT_SHARE_CONFIG)
+        mongodb_share = local_mongodb.client[share_config["database"]][share_config["collection"]]
+        server = generate_server(
+            Judicator.Processor(RPCService(
+                logger, mongodb_task, mongodb_executor, mongodb_blob, mongodb_share,
+                share_config.get("weights"), config["executor"].get("refresh", 0), config.get("read_preference"),
+                config["executor"]["expiration"], config["task"]["expiration"]
+            )),
+            config["listen"]["address"],
+            int(config["listen"]["port"]),
+            config.get("server", {}),
+            logger,
+            True
+        )
+        server.serve()
+    except KeyboardInterrupt:
+        logger.info("Rpc worker %d received SIGINT." % index, exc_info=True)
+    except:
+        logger.error("Rpc worker %d accidentally terminated." % index, exc_info=True)
+    logger.info("Rpc worker %d exiting." % index)
+    return
+
+def reopen_logger(logger, config, suffix):
+    """
+    Replace handlers of the logger inherited across fork with ones of log files of the current process
+    Log files rotated by several processes lose logs, so each forked process logs to its own files
+    :param logger: The logger
+    :param config: Configuration dictionary
+    :param suffix: Suffix appended to names of log files of the current process
+    :return: None
+    """
+    if "log" not in config:
+        return
+    for handler in logger.handlers[:]:
+        logger.removeHandler(handler)
+        handler.close()
+    get_logger(logger, config["log"]["info"] + suffix, config["log"]["error"] + suffix)
+    return
+
+def fork_rpc_worker(index, config, mongodb_config, local_etcd, logger):
+    """
+    Fork a rpc worker process
+    :param index: Index of the worker
+    :param config: Configuration dictionary
+    :param mongodb_config: Mongodb configuration dictionary
+    :param local_etcd: Local etcd proxy
+    :param logger: The logger
+    :return: Pid of the worker process
+    """
+    pid = os.fork()
+    if pid == 0:
+        # The child process only serves rpc, and never returns to the caller
+        try:
+            reopen_logger(logger, config, ".%d" % index)
+            rpc_worker(index, config, mongodb_config, local_etcd, logger)
+        finally:
+            os._exit(0)
+    logger.info("Forked rpc worker %d with pid %d." % (index, pid))
+    return pid
+
+def rpc_supervisor(amount, config, mongodb_config, local_etcd, logger):
+    """
+    Target function for the rpc worker supervisor process
+    Fork rpc workers, restart them when they exit, and stop them when terminated
+    Workers are forked by this process, as it never creates a mongodb client or thread, which are unsafe across fork
+    :param amount: Amount of workers
+    :param config: Configuration dictionary
+    :param mongodb_config: Mongodb configuration dictionary
+    :param local_etcd: Local etcd proxy
+    :param logger: The logger
+    :return: None
+    """
+    logger.info("Rpc worker supervisor started with pid %d." % os.getpid())
+    # Dictionary from pid to index of worker
+    workers = {}
+    try:
+        for i in range(amount):
+            workers[fork_rpc_worker(i, config, mongodb_config, local_etcd, logger)] = i
+        logger.info("Supervising %d rpc workers." % len(workers))
+        while True:
+            pid, status = os.wait()
+            index = workers.pop(pid)
+            logger.error("Rpc worker %d with pid %d exited with status %d." % (index, pid, status))
+            time.sleep(config["retry"]["interval"])
+            workers[fork_rpc_worker(index, config, mongodb_config, local_etcd, logger)] = index
+    except KeyboardInterrupt:
+        logger.info("Rpc worker supervisor received SIGINT.", exc_info=True)
+    except:
+        logger.error("Rpc worker supervisor accidentally terminated.", exc_info=True)
+
+    # Stop all rpc workers
+    for pid in workers:
+        try:
+            os.kill(pid, signal.SIGINT)
+            os.waitpid(pid, 0)
+            logger.info("Stopped rpc worker %d with pid %d." % (workers[pid], pid))
+        except:
+            logger.error("Failed to stop rpc worker %d with pid %d." % (workers[pid], pid), exc_info=True)
+    logger.info("Rpc worker supervisor exiting.")
+    return
+
+def fork_rpc_supervisor(amount, config, mongodb_config, local_etcd, logger):
+    """
+    Fork the rpc worker supervisor process
+    :param amount: Amount of workers
+    :param config: Configuration dictionary
+    :param mongodb_config: Mongodb configuration dictionary
+    :param local_etcd: Local etcd proxy
+    :param logger: The logger
+    :return: Pid of the supervisor process
+    """
+    pid = os.fork()
+    if pid == 0:
+        # The child process only supervises workers, and never returns to the caller
+        try:
+            reopen_logger(logger, config, ".supervisor")
+            rpc_supervisor(amount, config, mongodb_config, local_etcd, logger)
+        finally:
+            os._exit(0)
+    logger.info("Forked rpc worker supervisor with pid %d." % pid)
+    return pid
+
 def run(
     module_name="Judicator",
     etcd_conf_path="config/etcd.json",
@@ -533,10 +1464,32 @@ def run(
     with open(etcd_conf_path, "r") as f:
         local_etcd = generate_local_etcd_proxy(json.load(f)["etcd"], logger)
     with open(mongodb_conf_path, "r") as f:
-        local_mongodb = generate_local_mongodb_proxy(json.load(f)["mongodb"], local_etcd, logger)
-    # Get a connection to both task and executor collection in mongodb
+        mongodb_config = json.load(f)["mongodb"]
+
+    # Fork the rpc worker supervisor before creating any mongodb client or thread of this process
+    # Pid of the supervisor, which forks and restarts the workers
+    supervisor = None
+    worker_amount = config.get("workers", 1)
+    if worker_amount > 1:
+        supervisor = fork_rpc_supervisor(worker_amount, config, mongodb_config, local_etcd, logger)
+
+    local_mongodb = generate_local_mongodb_proxy(mongodb_config, local_etcd, logger)
+    # Get a connection to task, executor, blob and share collection in mongodb
     mongodb_task = local_mongodb.client[config["task"]["database"]][config["task"]["collection"]]
     mongodb_executor = local_mongodb.client[config["executor"]["database"]][config["executor"]["collection"]]
+    blob_config = config.get("blob", DEFAULT_BLOB_CONFIG)
+    mongodb_blob = local_mongodb.client[blob_config["database"]][blob_config["collection"]]
+    share_config = config.get("share", DEFAULT_SHARE_CONFIG)
+    mongodb_share = local_mongodb.client[share_config["database"]][share_config["collection"]]
+
+    # Reconcile indexes of both collections
+    try:
+        reconcile_indexes(mongodb_task, TASK_INDEXES, logger)
+        reconcile_indexes(mongodb_executor, EXECUTOR_INDEXES, logger)
+    except:
+        logger.error("Failed to reconcile indexes.", exc_info=True)
+    if config.get("explain", False):
+        explain(mongodb_task, mongodb_executor, logger)
 
     # Create and start the register thread
     register_thread = threading.Thread(target=register, args=(config, local_etcd, local_mongodb, logger))
@@ -551,16 +1504,27 @@ def run(
     lead_thread.setDaemon(True)
     lead_thread.start()
 
-    # Start the rpc server and serve until terminated
-    server = TServer.TThreadedServer(
-        Judicator.Processor(RPCService(logger, mongodb_task, mongodb_executor)),
-        TSocket.TServerSocket(config["listen"]["address"], int(config["listen"]["port"])),
-        TTransport.TBufferedTransportFactory(),
-        TBinaryProtocol.TBinaryProtocolFactory()
-    )
     try:
-        logger.info("Starting rpc server.")
-        server.serve()
+        if supervisor:
+            # Wait for the rpc worker supervisor, which only exits accidentally
+            _, status = os.waitpid(supervisor, 0)
+            supervisor = None
+            logger.error("Rpc worker supervisor exited with status %d." % status)
+        else:
+            # Start the rpc server and serve until terminated
+            server = generate_server(
+                Judicator.Processor(RPCService(
+                    logger, mongodb_task, mongodb_executor, mongodb_blob, mongodb_share,
+                    share_config.get("weights"), config["executor"].get("refresh", 0),
+                    config.get("read_preference"), config["executor"]["expiration"], config["task"]["expiration"]
+                )),
+                config["listen"]["address"],
+                int(config["listen"]["port"]),
+                config.get("server", {}),
+                logger
+            )
+            logger.info("Starting rpc server.")
+            server.serve()
     except KeyboardInterrupt:
         logger.info("Received SIGINT. Cancelling judicator registration on etcd.", exc_info=True)
         # Wait for the register thread to delete registration and then stop
@@ -570,6 +1534,14 @@ def run(
         logger.error("Accidentally terminated.", exc_info=True)
 
     working = False
+    # Stop the rpc worker supervisor, which stops all rpc workers
+    if supervisor:
+        try:
+            os.kill(supervisor, signal.SIGINT)
+            os.waitpid(supervisor, 0)
+            logger.info("Stopped rpc worker supervisor with pid %d." % supervisor)
+        except:
+            logger.error("Failed to stop rpc worker supervisor with pid %d." % supervisor, exc_info=True)
     logger.info("%s main program exiting." % module_name)
     return
 
@@ -3,7 +3,8 @@ namespace py judicator_rpc
 struct Compile {
     1: binary source,
     2: binary command,
-    3: i32 timeout
+    3: i32 timeout,
+    4: string source_digest
 }
 
 struct Execute {
@@ -11,14 +12,23 @@ struct Execute {
     2: binary data,
     3: binary command,
     4: i32 timeout,
-    5: binary standard
+    5: binary standard,
+    6: string data_digest
 }
 
 struct Result {
     1: binary compile_output,
     2: binary compile_error,
     3: binary execute_output,
-    4: binary execute_error
+    4: binary execute_error,
+    5: i64 cpu_time,
+    6: i64 memory_peak
+}
+
+struct Resource {
+    1: i32 cpu,
+    2: i64 memory,
+    3: i64 disk
 }
 
 struct Task {
@@ -31,7 +41,9 @@ struct Task {
     7: i32 status,
     8: string executor,
     9: string report_time,
-    10: Result result
+    10: Result result,
+    11: Resource requirement,
+    12: i32 priority
 }
 
 struct TaskBrief {
@@ -69,11 +81,33 @@ struct SearchReturn {
     3: list<TaskBrief> tasks
 }
 
+struct CursorSearchReturn {
+    1: ReturnCode result,
+    2: i32 total,
+    3: list<TaskBrief> tasks,
+    4: string cursor
+}
+
 struct GetReturn {
     1: ReturnCode result,
     2: Task task
 }
 
+struct CheckBlobsReturn {
+    1: ReturnCode result,
+    2: list<string> missing
+}
+
+struct GetBlobReturn {
+    1: ReturnCode result,
+    2: binary data
+}
+
+struct GetFileReturn {
+    1: ReturnCode result,
+    2: binary data
+}
+
 struct ReportReturn {
     1: ReturnCode result,
     2: list<TaskBrief> cancel,
@@ -90,8 +124,13 @@ service Judicator {
     AddReturn add(1: Task task);
     ReturnCode cancel(1: string id);
     SearchReturn search(1: string id, 2:i32 user, 3: string start_time, 4: string end_time, 5: bool old_to_new, 6: i32 limit, 7: i32 page);
+    CursorSearchReturn cursor_search(1: string id, 2:i32 user, 3: string start_time, 4: string end_time, 5: bool old_to_new, 6: i32 limit, 7: string cursor, 8: bool count);
     GetReturn get(1: string id);
-    ReportReturn report(1: string executor, 2: list<Task> complete, 3: list<TaskBrief> executing, 4: i32 vacant);
+    GetReturn get_fields(1: string id, 2: list<string> fields, 3: i32 truncate);
+    CheckBlobsReturn check_blobs(1: list<string> digests);
+    GetBlobReturn get_blob(1: string digest);
+    GetFileReturn get_file(1: string id, 2: string file);
+    ReportReturn report(1: string executor, 2: list<Task> complete, 3: list<TaskBrief> executing, 4: i32 vacant, 5: i32 wait, 6: Resource capacity);
 
     ExecutorsReturn executors();
 }
@@ -52,6 +52,21 @@ class Iface(object):
         """
         pass
 
+    def cursor_search(self, id, user, start_time, end_time, old_to_new, limit, cursor, count):
+        """
+        Parameters:
+         - id
+         - user
+         - start_time
+         - end_time
+         - old_to_new
+         - limit
+         - cursor
+         - count
+
+        """
+        pass
+
     def get(self, id):
         """
         Parameters:
@@ -60,13 +75,50 @@ class Iface(object):
         """
         pass
 
-    def report(self, executor, complete, executing, vacant):
+    def get_fields(self, id, fields, truncate):
+        """
+        Parameters:
+         - id
+         - fields
+         - truncate
+
+        """
+        pass
+
+    def check_blobs(self, digests):
+        """
+        Parameters:
+         - digests
+
+        """
+        pass
+
+    def get_blob(self, digest):
+        """
+        Parameters:
+         - digest
+
+        """
+        pass
+
+    def get_file(self, id, file):
+        """
+        Parameters:
+         - id
+         - file
+
+        """
+        pass
+
+    def report(self, executor, complete, executing, vacant, wait, capacity):
         """
         Parameters:
          - executor
          - complete
          - executing
          - vacant
+         - wait
+         - capacity
 
         """
         pass
@@ -216,6 +268,52 @@ class Client(Iface):
             return result.success
         raise TApplicationException(TApplicationException.MISSING_RESULT, "search failed: unknown result")
 
+    def cursor_search(self, id, user, start_time, end_time, old_to_new, limit, cursor, count):
+        """
+        Parameters:
+         - id
+         - user
+         - start_time
+         - end_time
+         - old_to_new
+         - limit
+         - cursor
+         - count
+
+        """
+        self.send_cursor_search(id, user, start_time, end_time, old_to_new, limit, cursor, count)
+        return self.recv_cursor_search()
+
+    def send_cursor_search(self, id, user, start_time, end_time, old_to_new, limit, cursor, count):
+        self._oprot.writeMessageBegin('cursor_search', TMessageType.CALL, self._seqid)
+        args = cursor_search_args()
+        args.id = id
+        args.user = user
+        args.start_time = start_time
+        args.end_time = end_time
+        args.old_to_new = old_to_new
+        args.limit = limit
+        args.cursor = cursor
+        args.count = count
+        args.write(self._oprot)
+        self._oprot.writeMessageEnd()
+        self._oprot.trans.flush()
+
+    def recv_cursor_search(self):
+        iprot = self._iprot
+        (fname, mtype, rseqid) = iprot.readMessageBegin()
+        if mtype == TMessageType.EXCEPTION:
+            x = TApplicationException()
+            x.read(iprot)
+            iprot.readMessageEnd()
+            raise x
+        result = cursor_search_result()
+        result.read(iprot)
+        iprot.readMessageEnd()
+        if result.success is not None:
+            return result.success
+        raise TApplicationException(TApplicationException.MISSING_RESULT, "cursor_search failed: unknown result")
+
     def get(self, id):
         """
         Parameters:
@@ -248,25 +346,163 @@ class Client(Iface):
             return result.success
         raise TApplicationException(TApplicationException.MISSING_RESULT, "get failed: unknown result")
 
-    def report(self, executor, complete, executing, vacant):
+    def get_fields(self, id, fields, truncate):
+        """
+        Parameters:
+         - id
+         - fields
+         - truncate
+
+        """
+        self.send_get_fields(id, fields, truncate)
+        return self.recv_get_fields()
+
+    def send_get_fields(self, id, fields, truncate):
+        self._oprot.writeMessageBegin('get_fields', TMessageType.CALL, self._seqid)
+        args = get_fields_args()
+        args.id = id
+        args.fields = fields
+        args.truncate = truncate
+        args.write(self._oprot)
+        self._oprot.writeMessageEnd()
+        self._oprot.trans.flush()
+
+    def recv_get_fields(self):
+        iprot = self._iprot
+        (fname, mtype, rseqid) = iprot.readMessageBegin()
+        if mtype == TMessageType.EXCEPTION:
+            x = TApplicationException()
+            x.read(iprot)
+            iprot.readMessageEnd()
+            raise x
+        result = get_fields_result()
+        result.read(iprot)
+        iprot.readMessageEnd()
+        if result.success is not None:
+            return result.success
+        raise TApplicationException(TApplicationException.MISSING_RESULT, "get_fields failed: unknown result")
+
+    def check_blobs(self, digests):
+        """
+        Parameters:
+         - digests
+
+        """
+        self.send_check_blobs(digests)
+        return self.recv_check_blobs()
+
+    def send_check_blobs(self, digests):
+        self._oprot.writeMessageBegin('check_blobs', TMessageType.CALL, self._seqid)
+        args = check_blobs_args()
+        args.digests = digests
+        args.write(self._oprot)
+        self._oprot.writeMessageEnd()
+        self._oprot.trans.flush()
+
+    def recv_check_blobs(self):
+        iprot = self._iprot
+        (fname, mtype, rseqid) = iprot.readMessageBegin()
+        if mtype == TMessageType.EXCEPTION:
+            x = TApplicationException()
+            x.read(iprot)
+            iprot.readMessageEnd()
+            raise x
+        result = check_blobs_result()
+        result.read(iprot)
+        iprot.readMessageEnd()
+        if result.success is not None:
+            return result.success
+        raise TApplicationException(TApplicationException.MISSING_RESULT, "check_blobs failed: unknown result")
+
+    def get_blob(self, digest):
+        """
+        Parameters:
+         - digest
+
+        """
+        self.send_get_blob(digest)
+        return self.recv_get_blob()
+
+    def send_get_blob(self, digest):
+        self._oprot.writeMessageBegin('get_blob', TMessageType.CALL, self._seqid)
+        args = get_blob_args()
+        args.digest = digest
+        args.write(self._oprot)
+        self._oprot.writeMessageEnd()
+        self._oprot.trans.flush()
+
+    def recv_get_blob(self):
+        iprot = self._iprot
+        (fname, mtype, rseqid) = iprot.readMessageBegin()
+        if mtype == TMessageType.EXCEPTION:
+            x = TApplicationException()
+            x.read(iprot)
+            iprot.readMessageEnd()
+            raise x
+        result = get_blob_result()
+        result.read(iprot)
+        iprot.readMessageEnd()
+        if result.success is not None:
+            return result.success
+        raise TApplicationException(TApplicationException.MISSING_RESULT, "get_blob failed: unknown result")
+
+    def get_file(self, id, file):
+        """
+        Parameters:
+         - id
+         - file
+
+        """
+        self.send_get_file(id, file)
+        return self.recv_get_file()
+
+    def send_get_file(self, id, file):
+        self._oprot.writeMessageBegin('get_file', TMessageType.CALL, self._seqid)
+        args = get_file_args()
+        args.id = id
+        args.file = file
+        args.write(self._oprot)
+        self._oprot.writeMessageEnd()
+        self._oprot.trans.flush()
+
+    def recv_get_file(self):
+        iprot = self._iprot
+        (fname, mtype, rseqid) = iprot.readMessageBegin()
+        if mtype == TMessageType.EXCEPTION:
+            x = TApplicationException()
+            x.read(iprot)
+            iprot.readMessageEnd()
+            raise x
+        result = get_file_result()
+        result.read(iprot)
+        iprot.readMessageEnd()
+        if result.success is not None:
+            return result.success
+        raise TApplicationException(TApplicationException.MISSING_RESULT, "get_file failed: unknown result")
+
+    def report(self, executor, complete, executing, vacant, wait, capacity):
         """
         Parameters:
          - executor
          - complete
          - executing
          - vacant
+         - wait
+         - capacity
 
         """
-        self.send_report(executor, complete, executing, vacant)
+        self.send_report(executor, complete, executing, vacant, wait, capacity)
         return self.recv_report()
 
-    def send_report(self, executor, complete, executing, vacant):
+    def send_report(self, executor, complete, executing, vacant, wait, capacity):
         self._oprot.writeMessageBegin('report', TMessageType.CALL, self._seqid)
         args = report_args()
         args.executor = executor
         args.complete = complete
         args.executing = executing
         args.vacant = vacant
+        args.wait = wait
+        args.capacity = capacity
         args.write(self._oprot)
         self._oprot.writeMessageEnd()
         self._oprot.trans.flush()
@@ -321,7 +557,12 @@ class Processor(Iface, TProcessor):
         self._processMap["add"] = Processor.process_add
         self._processMap["cancel"] = Processor.process_cancel
         self._processMap["search"] = Processor.process_search
+        self._processMap["cursor_search"] = Processor.process_cursor_search
         self._processMap["get"] = Processor.process_get
+        self._processMap["get_fields"] = Processor.process_get_fields
+        self._processMap["check_blobs"] = Processor.process_check_blobs
+        self._processMap["get_blob"] = Processor.process_get_blob
+        self._processMap["get_file"] = Processor.process_get_file
         self._processMap["report"] = Processor.process_report
         self._processMap["executors"] = Processor.process_executors
         self._on_message_begin = None
@@ -438,6 +679,29 @@ class Processor(Iface, TProcessor):
         oprot.writeMessageEnd()
         oprot.trans.flush()
 
+    def process_cursor_search(self, seqid, iprot, oprot):
+        args = cursor_search_args()
+        args.read(iprot)
+        iprot.readMessageEnd()
+        result = cursor_search_result()
+        try:
+            result.success = self._handler.cursor_search(args.id, args.user, args.start_time, args.end_time, args.old_to_new, args.limit, args.cursor, args.count)
+            msg_type = TMessageType.REPLY
+        except TTransport.TTransportException:
+            raise
+        except TApplicationException as ex:
+            logging.exception('TApplication exception in handler')
+            msg_type = TMessageType.EXCEPTION
+            result = ex
+        except Exception:
+            logging.exception('Unexpected exception in handler')
+            msg_type = TMessageType.EXCEPTION
+            result = TApplicationException(TApplicationException.INTERNAL_ERROR, 'Internal error')
+        oprot.writeMessageBegin("cursor_search", msg_type, seqid)
+        result.write(oprot)
+        oprot.writeMessageEnd()
+        oprot.trans.flush()
+
     def process_get(self, seqid, iprot, oprot):
         args = get_args()
         args.read(iprot)
@@ -461,13 +725,105 @@ class Processor(Iface, TProcessor):
         oprot.writeMessageEnd()
         oprot.trans.flush()
 
+    def process_get_fields(self, seqid, iprot, oprot):
+        args = get_fields_args()
+        args.read(iprot)
+        iprot.readMessageEnd()
+        result = get_fields_result()
+        try:
+            result.success = self._handler.get_fields(args.id, args.fields, args.truncate)
+            msg_type = TMessageType.REPLY
+        except TTransport.TTransportException:
+            raise
+        except TApplicationException as ex:
+            logging.exception('TApplication exception in handler')
+            msg_type = TMessageType.EXCEPTION
+            result = ex
+        except Exception:
+            logging.exception('Unexpected exception in handler')
+            msg_type = TMessageType.EXCEPTION
+            result = TApplicationException(TApplicationException.INTERNAL_ERROR, 'Internal error')
+        oprot.writeMessageBegin("get_fields", msg_type, seqid)
+        result.write(oprot)
+        oprot.writeMessageEnd()
+        oprot.trans.flush()
+
+    def process_check_blobs(self, seqid, iprot, oprot):
+        args = check_blobs_args()
+        args.read(iprot)
+        iprot.readMessageEnd()
+        result = check_blobs_result()
+        try:
+            result.success = self._handler.check_blobs(args.digests)
+            msg_type = TMessageType.REPLY
+        except TTransport.TTransportException:
+            raise
+        except TApplicationException as ex:
+            logging.exception('TApplication exception in handler')
+            msg_type = TMessageType.EXCEPTION
+            result = ex
+        except Exception:
+            logging.exception('Unexpected exception in handler')
+            msg_type = TMessageType.EXCEPTION
+            result = TApplicationException(TApplicationException.INTERNAL_ERROR, 'Internal error')
+        oprot.writeMessageBegin("check_blobs", msg_type, seqid)
+        result.write(oprot)
+        oprot.writeMessageEnd()
+        oprot.trans.flush()
+
+    def process_get_blob(self, seqid, iprot, oprot):
+        args = get_blob_args()
+        args.read(iprot)
+        iprot.readMessageEnd()
+        result = get_blob_result()
+        try:
+            result.success = self._handler.get_blob(args.digest)
+            msg_type = TMessageType.REPLY
+        except TTransport.TTransportException:
+            raise
+        except TApplicationException as ex:
+            logging.exception('TApplication exception in handler')
+            msg_type = TMessageType.EXCEPTION
+            result = ex
+        except Exception:
+            logging.exception('Unexpected exception in handler')
+            msg_type = TMessageType.EXCEPTION
+            result = TApplicationException(TApplicationException.INTERNAL_ERROR, 'Internal error')
+        oprot.writeMessageBegin("get_blob", msg_type, seqid)
+        result.write(oprot)
+        oprot.writeMessageEnd()
+        oprot.trans.flush()
+
+    def process_get_file(self, seqid, iprot, oprot):
+        args = get_file_args()
+        args.read(iprot)
+        iprot.readMessageEnd()
+        result = get_file_result()
+        try:
+            result.success = self._handler.get_file(args.id, args.file)
+            msg_type = TMessageType.REPLY
+        except TTransport.TTransportException:
+            raise
+        except TApplicationException as ex:
+            logging.exception('TApplication exception in handler')
+            msg_type = TMessageType.EXCEPTION
+            result = ex
+        except Exception:
+            logging.exception('Unexpected exception in handler')
+            msg_type = TMessageType.EXCEPTION
+            result = TApplicationException(TApplicationException.INTERNAL_ERROR, 'Internal error')
+        oprot.writeMessageBegin("get_file", msg_type, seqid)
+        result.write(oprot)
+        oprot.writeMessageEnd()
+        oprot.trans.flush()
+
     def process_report(self, seqid, iprot, oprot):
         args = report_args()
         args.read(iprot)
         iprot.readMessageEnd()
         result = report_result()
         try:
-            result.success = self._handler.report(args.executor, args.complete, args.executing, args.vacant)
+            result.success = self._handler.report(args.executor, args.complete, args.executing, args.vacant, args.wait, args.capacity)
             msg_type = TMessageType.REPLY
         except TTransport.TTransportException:
             raise
@@ -1058,16 +1414,762 @@ search_result.thrift_spec = (
 )
 
 
-class get_args(object):
+class cursor_search_args(object):
     """
     Attributes:
      - id
+     - user
+     - start_time
+     - end_time
+     - old_to_new
+     - limit
+     - cursor
+     - count
 
     """
 
 
-    def __init__(self, id=None,):
+    def __init__(self, id=None, user=None, start_time=None, end_time=None, old_to_new=None, limit=None, cursor=None, count=None,):
         self.id = id
+        self.user = user
+        self.start_time = start_time
+        self.end_time = end_time
+        self.old_to_new = old_to_new
+        self.limit = limit
+        self.cursor = cursor
+        self.count = count
+
+    def read(self, iprot):
+        if iprot._fast_decode is not None and isinstance(iprot.trans, TTransport.CReadableTransport) and self.thrift_spec is not None:
+            iprot._fast_decode(self, iprot, [self.__class__, self.thrift_spec])
+            return
+        iprot.readStructBegin()
+        while True:
+            (fname, ftype, fid) = iprot.readFieldBegin()
+            if ftype == TType.STOP:
+                break
+            if fid == 1:
+                if ftype == TType.STRING:
+                    self.id = iprot.readString().decode('utf-8') if sys.version_info[0] == 2 else iprot.readString()
+                else:
+                    iprot.skip(ftype)
+            elif fid == 2:
+                if ftype == TType.I32:
+                    self.user = iprot.readI32()
+                else:
+                    iprot.skip(ftype)
+            elif fid == 3:
+                if ftype == TType.STRING:
+                    self.start_time = iprot.readString().decode('utf-8') if sys.version_info[0] == 2 else iprot.readString()
+                else:
+                    iprot.skip(ftype)
+            elif fid == 4:
+                if ftype == TType.STRING:
+                    self.end_time = iprot.readString().decode('utf-8') if sys.version_info[0] == 2 else iprot.readString()
+                else:
+                    iprot.skip(ftype)
+            elif fid == 5:
+                if ftype == TType.BOOL:
+                    self.old_to_new = iprot.readBool()
+                else:
+                    iprot.skip(ftype)
+            elif fid == 6:
+                if ftype == TType.I32:
+                    self.limit = iprot.readI32()
+                else:
+                    iprot.skip(ftype)
+            elif fid == 7:
+                if ftype == TType.STRING:
+                    self.cursor = iprot.readString().decode('utf-8') if sys.version_info[0] == 2 else iprot.readString()
+                else:
+                    iprot.skip(ftype)
+            elif fid == 8:
+                if ftype == TType.BOOL:
+                    self.count = iprot.readBool()
+                else:
+                    iprot.skip(ftype)
+            else:
+                iprot.skip(ftype)
+            iprot.readFieldEnd()
+        iprot.readStructEnd()
+
+    def write(self, oprot):
+        if oprot._fast_encode is not None and self.thrift_spec is not None:
+            oprot.trans.write(oprot._fast_encode(self, [self.__class__, self.thrift_spec]))
+            return
+        oprot.writeStructBegin('cursor_search_args')
+        if self.id is not None:
+            oprot.writeFieldBegin('id', TType.STRING, 1)
+            oprot.writeString(self.id.encode('utf-8') if sys.version_info[0] == 2 else self.id)
+            oprot.writeFieldEnd()
+        if self.user is not None:
+            oprot.writeFieldBegin('user', TType.I32, 2)
+            oprot.writeI32(self.user)
+            oprot.writeFieldEnd()
+        if self.start_time is not None:
+            oprot.writeFieldBegin('start_time', TType.STRING, 3)
+            oprot.writeString(self.start_time.encode('utf-8') if sys.version_info[0] == 2 else self.start_time)
+            oprot.writeFieldEnd()
+        if self.end_time is not None:
+            oprot.writeFieldBegin('end_time', TType.STRING, 4)
+            oprot.writeString(self.end_time.encode('utf-8') if sys.version_info[0] == 2 else self.end_time)
+            oprot.writeFieldEnd()
+        if self.old_to_new is not None:
+            oprot.writeFieldBegin('old_to_new', TType.BOOL, 5)
+            oprot.writeBool(self.old_to_new)
+            oprot.writeFieldEnd()
+        if self.limit is not None:
+            oprot.writeFieldBegin('limit', TType.I32, 6)
+            oprot.writeI32(self.limit)
+            oprot.writeFieldEnd()
+        if self.cursor is not None:
+            oprot.writeFieldBegin('cursor', TType.STRING, 7)
+            oprot.writeString(self.cursor.encode('utf-8') if sys.version_info[0] == 2 else self.cursor)
+            oprot.writeFieldEnd()
+        if self.count is not None:
+            oprot.writeFieldBegin('count', TType.BOOL, 8)
+            oprot.writeBool(self.count)
+            oprot.writeFieldEnd()
+        oprot.writeFieldStop()
+        oprot.writeStructEnd()
+
+    def validate(self):
+        return
+
+    def __repr__(self):
+        L = ['%s=%r' % (key, value)
+             for key, value in self.__dict__.items()]
+        return '%s(%s)' % (self.__class__.__name__, ', '.join(L))
+
+    def __eq__(self, other):
+        return isinstance(other, self.__class__) and self.__dict__ == other.__dict__
+
+    def __ne__(self, other):
+        return not (self == other)
+all_structs.append(cursor_search_args)
+cursor_search_args.thrift_spec = (
+    None,  # 0
+    (1, TType.STRING, 'id', 'UTF8', None, ),  # 1
+    (2, TType.I32, 'user', None, None, ),  # 2
+    (3, TType.STRING, 'start_time', 'UTF8', None, ),  # 3
+    (4, TType.STRING, 'end_time', 'UTF8', None, ),  # 4
+    (5, TType.BOOL, 'old_to_new', None, None, ),  # 5
+    (6, TType.I32, 'limit', None, None, ),  # 6
+    (7, TType.STRING, 'cursor', 'UTF8', None, ),  # 7
+    (8, TType.BOOL, 'count', None, None, ),  # 8
+)
+
+
+class cursor_search_result(object):
+    """
+    Attributes:
+     - success
+
+    """
+
+
+    def __init__(self, success=None,):
+        self.success = success
+
+    def read(self, iprot):
+        if iprot._fast_decode is not None and isinstance(iprot.trans, TTransport.CReadableTransport) and self.thrift_spec is not None:
+            iprot._fast_decode(self, iprot, [self.__class__, self.thrift_spec])
+            return
+        iprot.readStructBegin()
+        while True:
+            (fname, ftype, fid) = iprot.readFieldBegin()
+            if ftype == TType.STOP:
+                break
+            if fid == 0:
+                if ftype == TType.STRUCT:
+                    self.success = CursorSearchReturn()
+                    self.success.read(iprot)
+                else:
+                    iprot.skip(ftype)
+            else:
+                iprot.skip(ftype)
+            iprot.readFieldEnd()
+        iprot.readStructEnd()
+
+    def write(self, oprot):
+        if oprot._fast_encode is not None and self.thrift_spec is not None:
+            oprot.trans.write(oprot._fast_encode(self, [self.__class__, self.thrift_spec]))
+            return
+        oprot.writeStructBegin('cursor_search_result')
+        if self.success is not None:
+            oprot.writeFieldBegin('success', TType.STRUCT, 0)
+            self.success.write(oprot)
+            oprot.writeFieldEnd()
+        oprot.writeFieldStop()
+        oprot.writeStructEnd()
+
+    def validate(self):
+        return
+
+    def __repr__(self):
+        L = ['%s=%r' % (key, value)
+             for key, value in self.__dict__.items()]
+        return '%s(%s)' % (self.__class__.__name__, ', '.join(L))
+
+    def __eq__(self, other):
+        return isinstance(other, self.__class__) and self.__dict__ == other.__dict__
+
+    def __ne__(self, other):
+        return not (self == other)
+all_structs.append(cursor_search_result)
+cursor_search_result.thrift_spec = (
+    (0, TType.STRUCT, 'success', [CursorSearchReturn, None], None, ),  # 0
+)
+
+
+class get_args(object):
+    """
+    Attributes:
+     - id
+
+    """
+
+
+    def __init__(self, id=None,):
+        self.id = id
+
+    def read(self, iprot):
+        if iprot._fast_decode is not None and isinstance(iprot.trans, TTransport.CReadableTransport) and self.thrift_spec is not None:
+            iprot._fast_decode(self, iprot, [self.__class__, self.thrift_spec])
+            return
+        iprot.readStructBegin()
+        while True:
+            (fname, ftype, fid) = iprot.readFieldBegin()
+            if ftype == TType.STOP:
+                break
+            if fid == 1:
+                if ftype == TType.STRING:
+                    self.id = iprot.readString().decode('utf-8') if sys.version_info[0] == 2 else iprot.readString()
+                else:
+                    iprot.skip(ftype)
+            else:
+                iprot.skip(ftype)
+            iprot.readFieldEnd()
+        iprot.readStructEnd()
+
+    def write(self, oprot):
+        if oprot._fast_encode is not None and self.thrift_spec is not None:
+            oprot.trans.write(oprot._fast_encode(self, [self.__class__, self.thrift_spec]))
+            return
+        oprot.writeStructBegin('get_args')
+        if self.id is not None:
+            oprot.writeFieldBegin('id', TType.STRING, 1)
+            oprot.writeString(self.id.encode('utf-8') if sys.version_info[0] == 2 else self.id)
+            oprot.writeFieldEnd()
+        oprot.writeFieldStop()
+        oprot.writeStructEnd()
+
+    def validate(self):
+        return
+
+    def __repr__(self):
+        L = ['%s=%r' % (key, value)
+             for key, value in self.__dict__.items()]
+        return '%s(%s)' % (self.__class__.__name__, ', '.join(L))
+
+    def __eq__(self, other):
+        return isinstance(other, self.__class__) and self.__dict__ == other.__dict__
+
+    def __ne__(self, other):
+        return not (self == other)
+all_structs.append(get_args)
+get_args.thrift_spec = (
+    None,  # 0
+    (1, TType.STRING, 'id', 'UTF8', None, ),  # 1
+)
+
+
+class get_result(object):
+    """
+    Attributes:
+     - success
+
+    """
+
+
+    def __init__(self, success=None,):
+        self.success = success
+
+    def read(self, iprot):
+        if iprot._fast_decode is not None and isinstance(iprot.trans, TTransport.CReadableTransport) and self.thrift_spec is not None:
+            iprot._fast_decode(self, iprot, [self.__class__, self.thrift_spec])
+            return
+        iprot.readStructBegin()
+        while True:
+            (fname, ftype, fid) = iprot.readFieldBegin()
+            if ftype == TType.STOP:
+                break
+            if fid == 0:
+                if ftype == TType.STRUCT:
+                    self.success = GetReturn()
+                    self.success.read(iprot)
+                else:
+                    iprot.skip(ftype)
+            else:
+                iprot.skip(ftype)
+            iprot.readFieldEnd()
+        iprot.readStructEnd()
+
+    def write(self, oprot):
+        if oprot._fast_encode is not None and self.thrift_spec is not None:
+            oprot.trans.write(oprot._fast_encode(self, [self.__class__, self.thrift_spec]))
+            return
+        oprot.writeStructBegin('get_result')
+        if self.success is not None:
+            oprot.writeFieldBegin('success', TType.STRUCT, 0)
+            self.success.write(oprot)
+            oprot.writeFieldEnd()
+        oprot.writeFieldStop()
+        oprot.writeStructEnd()
+
+    def validate(self):
+        return
+
+    def __repr__(self):
+        L = ['%s=%r' % (key, value)
+             for key, value in self.__dict__.items()]
+        return '%s(%s)' % (self.__class__.__name__, ', '.join(L))
+
+    def __eq__(self, other):
+        return isinstance(other, self.__class__) and self.__dict__ == other.__dict__
+
+    def __ne__(self, other):
+        return not (self == other)
+all_structs.append(get_result)
+get_result.thrift_spec = (
+    (0, TType.STRUCT, 'success', [GetReturn, None], None, ),  # 0
+)
+
+
+class get_fields_args(object):
+    """
+    Attributes:
+     - id
+     - fields
+     - truncate
+
+    """
+
+
+    def __init__(self, id=None, fields=None, truncate=None,):
+        self.id = id
+        self.fields = fields
+        self.truncate = truncate
+
+    def read(self, iprot):
+        if iprot._fast_decode is not None and isinstance(iprot.trans, TTransport.CReadableTransport) and self.thrift_spec is not None:
+            iprot._fast_decode(self, iprot, [self.__class__, self.thrift_spec])
+            return
+        iprot.readStructBegin()
+        while True:
+            (fname, ftype, fid) = iprot.readFieldBegin()
+            if ftype == TType.STOP:
+                break
+            if fid == 1:
+                if ftype == TType.STRING:
+                    self.id = iprot.readString().decode('utf-8') if sys.version_info[0] == 2 else iprot.readString()
+                else:
+                    iprot.skip(ftype)
+            elif fid == 2:
+                if ftype == TType.LIST:
+                    self.fields = []
+                    (_etype45, _size42) = iprot.readListBegin()
+                    for _i46 in range(_size42):
+                        _elem47 = iprot.readString().decode('utf-8') if sys.version_info[0] == 2 else iprot.readString()
+                        self.fields.append(_elem47)
+                    iprot.readListEnd()
+                else:
+                    iprot.skip(ftype)
+            elif fid == 3:
+                if ftype == TType.I32:
+                    self.truncate = iprot.readI32()
+                else:
+                    iprot.skip(ftype)
+            else:
+                iprot.skip(ftype)
+            iprot.readFieldEnd()
+        iprot.readStructEnd()
+
+    def write(self, oprot):
+        if oprot._fast_encode is not None and self.thrift_spec is not None:
+            oprot.trans.write(oprot._fast_encode(self, [self.__class__, self.thrift_spec]))
+            return
+        oprot.writeStructBegin('get_fields_args')
+        if self.id is not None:
+            oprot.writeFieldBegin('id', TType.STRING, 1)
+            oprot.writeString(self.id.encode('utf-8') if sys.version_info[0] == 2 else self.id)
+            oprot.writeFieldEnd()
+        if self.fields is not None:
+            oprot.writeFieldBegin('fields', TType.LIST, 2)
+            oprot.writeListBegin(TType.STRING, len(self.fields))
+            for iter48 in self.fields:
+                oprot.writeString(iter48.encode('utf-8') if sys.version_info[0] == 2 else iter48)
+            oprot.writeListEnd()
+            oprot.writeFieldEnd()
+        if self.truncate is not None:
+            oprot.writeFieldBegin('truncate', TType.I32, 3)
+            oprot.writeI32(self.truncate)
+            oprot.writeFieldEnd()
+        oprot.writeFieldStop()
+        oprot.writeStructEnd()
+
+    def validate(self):
+        return
+
+    def __repr__(self):
+        L = ['%s=%r' % (key, value)
+             for key, value in self.__dict__.items()]
+        return '%s(%s)' % (self.__class__.__name__, ', '.join(L))
+
+    def __eq__(self, other):
+        return isinstance(other, self.__class__) and self.__dict__ == other.__dict__
+
+    def __ne__(self, other):
+        return not (self == other)
+all_structs.append(get_fields_args)
+get_fields_args.thrift_spec = (
+    None,  # 0
+    (1, TType.STRING, 'id', 'UTF8', None, ),  # 1
+    (2, TType.LIST, 'fields', (TType.STRING, 'UTF8', False), None, ),  # 2
+    (3, TType.I32, 'truncate', None, None, ),  # 3
+)
+
+
+class get_fields_result(object):
+    """
+    Attributes:
+     - success
+
+    """
+
+
+    def __init__(self, success=None,):
+        self.success = success
+
+    def read(self, iprot):
+        if iprot._fast_decode is not None and isinstance(iprot.trans, TTransport.CReadableTransport) and self.thrift_spec is not None:
+            iprot._fast_decode(self, iprot, [self.__class__, self.thrift_spec])
+            return
+        iprot.readStructBegin()
+        while True:
+            (fname, ftype, fid) = iprot.readFieldBegin()
+            if ftype == TType.STOP:
+                break
+            if fid == 0:
+                if ftype == TType.STRUCT:
+                    self.success = GetReturn()
+                    self.success.read(iprot)
+                else:
+                    iprot.skip(ftype)
+            else:
+                iprot.skip(ftype)
+            iprot.readFieldEnd()
+        iprot.readStructEnd()
+
+    def write(self, oprot):
+        if oprot._fast_encode is not None and self.thrift_spec is not None:
+            oprot.trans.write(oprot._fast_encode(self, [self.__class__, self.thrift_spec]))
+            return
+        oprot.writeStructBegin('get_fields_result')
+        if self.success is not None:
+            oprot.writeFieldBegin('success', TType.STRUCT, 0)
+            self.success.write(oprot)
+            oprot.writeFieldEnd()
+        oprot.writeFieldStop()
+        oprot.writeStructEnd()
+
+    def validate(self):
+        return
+
+    def __repr__(self):
+        L = ['%s=%r' % (key, value)
+             for key, value in self.__dict__.items()]
+        return '%s(%s)' % (self.__class__.__name__, ', '.join(L))
+
+    def __eq__(self, other):
+        return isinstance(other, self.__class__) and self.__dict__ == other.__dict__
+
+    def __ne__(self, other):
+        return not (self == other)
+all_structs.append(get_fields_result)
+get_fields_result.thrift_spec = (
+    (0, TType.STRUCT, 'success', [GetReturn, None], None, ),  # 0
+)
+
+
+class check_blobs_args(object):
+    """
+    Attributes:
+     - digests
+
+    """
+
+
+    def __init__(self, digests=None,):
+        self.digests = digests
+
+    def read(self, iprot):
+        if iprot._fast_decode is not None and isinstance(iprot.trans, TTransport.CReadableTransport) and self.thrift_spec is not None:
+            iprot._fast_decode(self, iprot, [self.__class__, self.thrift_spec])
+            return
+        iprot.readStructBegin()
+        while True:
+            (fname, ftype, fid) = iprot.readFieldBegin()
+            if ftype == TType.STOP:
+                break
+            if fid == 1:
+                if ftype == TType.LIST:
+                    self.digests = []
+                    (_etype52, _size49) = iprot.readListBegin()
+                    for _i53 in range(_size49):
+                        _elem54 = iprot.readString().decode('utf-8') if sys.version_info[0] == 2 else iprot.readString()
+                        self.digests.append(_elem54)
+                    iprot.readListEnd()
+                else:
+                    iprot.skip(ftype)
+            else:
+                iprot.skip(ftype)
+            iprot.readFieldEnd()
+        iprot.readStructEnd()
+
+    def write(self, oprot):
+        if oprot._fast_encode is not None and self.thrift_spec is not None:
+            oprot.trans.write(oprot._fast_encode(self, [self.__class__, self.thrift_spec]))
+            return
+        oprot.writeStructBegin('check_blobs_args')
+        if self.digests is not None:
+            oprot.writeFieldBegin('digests', TType.LIST, 1)
+            oprot.writeListBegin(TType.STRING, len(self.digests))
+            for iter55 in self.digests:
+                oprot.writeString(iter55.encode('utf-8') if sys.version_info[0] == 2 else iter55)
+            oprot.writeListEnd()
+            oprot.writeFieldEnd()
+        oprot.writeFieldStop()
+        oprot.writeStructEnd()
+
+    def validate(self):
+        return
+
+    def __repr__(self):
+        L = ['%s=%r' % (key, value)
+             for key, value in self.__dict__.items()]
+        return '%s(%s)' % (self.__class__.__name__, ', '.join(L))
+
+    def __eq__(self, other):
+        return isinstance(other, self.__class__) and self.__dict__ == other.__dict__
+
+    def __ne__(self, other):
+        return not (self == other)
+all_structs.append(check_blobs_args)
+check_blobs_args.thrift_spec = (
+    None,  # 0
+    (1, TType.LIST, 'digests', (TType.STRING, 'UTF8', False), None, ),  # 1
+)
+
+
+class check_blobs_result(object):
+    """
+    Attributes:
+     - success
+
+    """
+
+
+    def __init__(self, success=None,):
+        self.success = success
+
+    def read(self, iprot):
+        if iprot._fast_decode is not None and isinstance(iprot.trans, TTransport.CReadableTransport) and self.thrift_spec is not None:
+            iprot._fast_decode(self, iprot, [self.__class__, self.thrift_spec])
+            return
+        iprot.readStructBegin()
+        while True:
+            (fname, ftype, fid) = iprot.readFieldBegin()
+            if ftype == TType.STOP:
+                break
+            if fid == 0:
+                if ftype == TType.STRUCT:
+                    self.success = CheckBlobsReturn()
+                    self.success.read(iprot)
+                else:
+                    iprot.skip(ftype)
+            else:
+                iprot.skip(ftype)
+            iprot.readFieldEnd()
+        iprot.readStructEnd()
+
+    def write(self, oprot):
+        if oprot._fast_encode is not None and self.thrift_spec is not None:
+            oprot.trans.write(oprot._fast_encode(self, [self.__class__, self.thrift_spec]))
+            return
+        oprot.writeStructBegin('check_blobs_result')
+        if self.success is not None:
+            oprot.writeFieldBegin('success', TType.STRUCT, 0)
+            self.success.write(oprot)
+            oprot.writeFieldEnd()
+        oprot.writeFieldStop()
+        oprot.writeStructEnd()
+
+    def validate(self):
+        return
+
+    def __repr__(self):
+        L = ['%s=%r' % (key, value)
+             for key, value in self.__dict__.items()]
+        return '%s(%s)' % (self.__class__.__name__, ', '.join(L))
+
+    def __eq__(self, other):
+        return isinstance(other, self.__class__) and self.__dict__ == other.__dict__
+
+    def __ne__(self, other):
+        return not (self == other)
+all_structs.append(check_blobs_result)
+check_blobs_result.thrift_spec = (
+    (0, TType.STRUCT, 'success', [CheckBlobsReturn, None], None, ),  # 0
+)
+
+
+class get_blob_args(object):
+    """
+    Attributes:
+     - digest
+
+    """
+
+
+    def __init__(self, digest=None,):
+        self.digest = digest
+
+    def read(self, iprot):
+        if iprot._fast_decode is not None and isinstance(iprot.trans, TTransport.CReadableTransport) and self.thrift_spec is not None:
+            iprot._fast_decode(self, iprot, [self.__class__, self.thrift_spec])
+            return
+        iprot.readStructBegin()
+        while True:
+            (fname, ftype, fid) = iprot.readFieldBegin()
+            if ftype == TType.STOP:
+                break
+            if fid == 1:
+                if ftype == TType.STRING:
+                    self.digest = iprot.readString().decode('utf-8') if sys.version_info[0] == 2 else iprot.readString()
+                else:
+                    iprot.skip(ftype)
+            else:
+                iprot.skip(ftype)
+            iprot.readFieldEnd()
+        iprot.readStructEnd()
+
+    def write(self, oprot):
+        if oprot._fast_encode is not None and self.thrift_spec is not None:
+            oprot.trans.write(oprot._fast_encode(self, [self.__class__, self.thrift_spec]))
+            return
+        oprot.writeStructBegin('get_blob_args')
+        if self.digest is not None:
+            oprot.writeFieldBegin('digest', TType.STRING, 1)
+            oprot.writeString(self.digest.encode('utf-8') if sys.version_info[0] == 2 else self.digest)
+            oprot.writeFieldEnd()
+        oprot.writeFieldStop()
+        oprot.writeStructEnd()
+
+    def validate(self):
+        return
+
+    def __repr__(self):
+        L = ['%s=%r' % (key, value)
+             for key, value in self.__dict__.items()]
+        return '%s(%s)' % (self.__class__.__name__, ', '.join(L))
+
+    def __eq__(self, other):
+        return isinstance(other, self.__class__) and self.__dict__ == other.__dict__
+
+    def __ne__(self, other):
+        return not (self == other)
+all_structs.append(get_blob_args)
+get_blob_args.thrift_spec = (
+    None,  # 0
+    (1, TType.STRING, 'digest', 'UTF8', None, ),  # 1
+)
+
+
+class get_blob_result(object):
+    """
+    Attributes:
+     - success
+
+    """
+
+
+    def __init__(self, success=None,):
+        self.success = success
+
+    def read(self, iprot):
+        if iprot._fast_decode is not None and isinstance(iprot.trans, TTransport.CReadableTransport) and self.thrift_spec is not None:
+            iprot._fast_decode(self, iprot, [self.__class__, self.thrift_spec])
+            return
+        iprot.readStructBegin()
+        while True:
+            (fname, ftype, fid) = iprot.readFieldBegin()
+            if ftype == TType.STOP:
+                break
+            if fid == 0:
+                if ftype == TType.STRUCT:
+                    self.success = GetBlobReturn()
+                    self.success.read(iprot)
+                else:
+                    iprot.skip(ftype)
+            else:
+                iprot.skip(ftype)
+            iprot.readFieldEnd()
+        iprot.readStructEnd()
+
+    def write(self, oprot):
+        if oprot._fast_encode is not None and self.thrift_spec is not None:
+            oprot.trans.write(oprot._fast_encode(self, [self.__class__, self.thrift_spec]))
+            return
+        oprot.writeStructBegin('get_blob_result')
+        if self.success is not None:
+            oprot.writeFieldBegin('success', TType.STRUCT, 0)
+            self.success.write(oprot)
+            oprot.writeFieldEnd()
+        oprot.writeFieldStop()
+        oprot.writeStructEnd()
+
+    def validate(self):
+        return
+
+    def __repr__(self):
+        L = ['%s=%r' % (key, value)
+             for key, value in self.__dict__.items()]
+        return '%s(%s)' % (self.__class__.__name__, ', '.join(L))
+
+    def __eq__(self, other):
+        return isinstance(other, self.__class__) and self.__dict__ == other.__dict__
+
+    def __ne__(self, other):
+        return not (self == other)
+all_structs.append(get_blob_result)
+get_blob_result.thrift_spec = (
+    (0, TType.STRUCT, 'success', [GetBlobReturn, None], None, ),  # 0
+)
+
+
+class get_file_args(object):
+    """
+    Attributes:
+     - id
+     - file
+
+    """
+
+
+    def __init__(self, id=None, file=None,):
+        self.id = id
+        self.file = file
 
     def read(self, iprot):
         if iprot._fast_decode is not None and isinstance(iprot.trans, TTransport.CReadableTransport) and self.thrift_spec is not None:
@@ -1083,6 +2185,11 @@ class get_args(object):
                     self.id = iprot.readString().decode('utf-8') if sys.version_info[0] == 2 else iprot.readString()
                 else:
                     iprot.skip(ftype)
+            elif fid == 2:
+                if ftype == TType.STRING:
+                    self.file = iprot.readString().decode('utf-8') if sys.version_info[0] == 2 else iprot.readString()
+                else:
+                    iprot.skip(ftype)
             else:
                 iprot.skip(ftype)
             iprot.readFieldEnd()
@@ -1092,11 +2199,15 @@ class get_args(object):
         if oprot._fast_encode is not None and self.thrift_spec is not None:
             oprot.trans.write(oprot._fast_encode(self, [self.__class__, self.thrift_spec]))
             return
-        oprot.writeStructBegin('get_args')
+        oprot.writeStructBegin('get_file_args')
         if self.id is not None:
             oprot.writeFieldBegin('id', TType.STRING, 1)
             oprot.writeString(self.id.encode('utf-8') if sys.version_info[0] == 2 else self.id)
             oprot.writeFieldEnd()
+        if self.file is not None:
+            oprot.writeFieldBegin('file', TType.STRING, 2)
+            oprot.writeString(self.file.encode('utf-8') if sys.version_info[0] == 2 else self.file)
+            oprot.writeFieldEnd()
         oprot.writeFieldStop()
         oprot.writeStructEnd()
 
@@ -1113,14 +2224,15 @@ class get_args(object):
 
     def __ne__(self, other):
         return not (self == other)
-all_structs.append(get_args)
-get_args.thrift_spec = (
+all_structs.append(get_file_args)
+get_file_args.thrift_spec = (
     None,  # 0
     (1, TType.STRING, 'id', 'UTF8', None, ),  # 1
+    (2, TType.STRING, 'file', 'UTF8', None, ),  # 2
 )
 
 
-class get_result(object):
+class get_file_result(object):
     """
     Attributes:
      - success
@@ -1142,7 +2254,7 @@ class get_result(object):
                 break
             if fid == 0:
                 if ftype == TType.STRUCT:
-                    self.success = GetReturn()
+                    self.success = GetFileReturn()
                     self.success.read(iprot)
                 else:
                     iprot.skip(ftype)
@@ -1155,7 +2267,7 @@ class get_result(object):
         if oprot._fast_encode is not None and self.thrift_spec is not None:
             oprot.trans.write(oprot._fast_encode(self, [self.__class__, self.thrift_spec]))
             return
-        oprot.writeStructBegin('get_result')
+        oprot.writeStructBegin('get_file_result')
         if self.success is not None:
             oprot.writeFieldBegin('success', TType.STRUCT, 0)
             self.success.write(oprot)
@@ -1176,9 +2288,9 @@ class get_result(object):
 
     def __ne__(self, other):
         return not (self == other)
-all_structs.append(get_result)
-get_result.thrift_spec = (
-    (0, TType.STRUCT, 'success', [GetReturn, None], None, ),  # 0
+all_structs.append(get_file_result)
+get_file_result.thrift_spec = (
+    (0, TType.STRUCT, 'success', [GetFileReturn, None], None, ),  # 0
 )
 
 
@@ -1189,15 +2301,19 @@ class report_args(object):
      - complete
      - executing
      - vacant
+     - wait
+     - capacity
 
     """
 
 
-    def __init__(self, executor=None, complete=None, executing=None, vacant=None,):
+    def __init__(self, executor=None, complete=None, executing=None, vacant=None, wait=None, capacity=None,):
         self.executor = executor
         self.complete = complete
         self.executing = executing
         self.vacant = vacant
+        self.wait = wait
+        self.capacity = capacity
 
     def read(self, iprot):
         if iprot._fast_decode is not None and isinstance(iprot.trans, TTransport.CReadableTransport) and self.thrift_spec is not None:
@@ -1216,22 +2332,22 @@ class report_args(object):
             elif fid == 2:
                 if ftype == TType.LIST:
                     self.complete = []
-                    (_etype31, _size28) = iprot.readListBegin()
-                    for _i32 in range(_size28):
-                        _elem33 = Task()
-                        _elem33.read(iprot)
-                        self.complete.append(_elem33)
+                    (_etype59, _size56) = iprot.readListBegin()
+                    for _i60 in range(_size56):
+                        _elem61 = Task()
+                        _elem61.read(iprot)
+                        self.complete.append(_elem61)
                     iprot.readListEnd()
                 else:
                     iprot.skip(ftype)
             elif fid == 3:
                 if ftype == TType.LIST:
                     self.executing = []
-                    (_etype37, _size34) = iprot.readListBegin()
-                    for _i38 in range(_size34):
-                        _elem39 = TaskBrief()
-                        _elem39.read(iprot)
-                        self.executing.append(_elem39)
+                    (_etype65, _size62) = iprot.readListBegin()
+                    for _i66 in range(_size62):
+                        _elem67 = TaskBrief()
+                        _elem67.read(iprot)
+                        self.executing.append(_elem67)
                     iprot.readListEnd()
                 else:
                     iprot.skip(ftype)
@@ -1240,6 +2356,17 @@ class report_args(object):
                     self.vacant = iprot.readI32()
                 else:
                     iprot.skip(ftype)
+            elif fid == 5:
+                if ftype == TType.I32:
+                    self.wait = iprot.readI32()
+                else:
+                    iprot.skip(ftype)
+            elif fid == 6:
+                if ftype == TType.STRUCT:
+                    self.capacity = Resource()
+                    self.capacity.read(iprot)
+                else:
+                    iprot.skip(ftype)
             else:
                 iprot.skip(ftype)
             iprot.readFieldEnd()
@@ -1257,21 +2384,29 @@ class report_args(object):
         if self.complete is not None:
             oprot.writeFieldBegin('complete', TType.LIST, 2)
             oprot.writeListBegin(TType.STRUCT, len(self.complete))
-            for iter40 in self.complete:
-                iter40.write(oprot)
+            for iter68 in self.complete:
+                iter68.write(oprot)
             oprot.writeListEnd()
             oprot.writeFieldEnd()
         if self.executing is not None:
             oprot.writeFieldBegin('executing', TType.LIST, 3)
             oprot.writeListBegin(TType.STRUCT, len(self.executing))
-            for iter41 in self.executing:
-                iter41.write(oprot)
+            for iter69 in self.executing:
+                iter69.write(oprot)
             oprot.writeListEnd()
             oprot.writeFieldEnd()
         if self.vacant is not None:
             oprot.writeFieldBegin('vacant', TType.I32, 4)
             oprot.writeI32(self.vacant)
             oprot.writeFieldEnd()
+        if self.wait is not None:
+            oprot.writeFieldBegin('wait', TType.I32, 5)
+            oprot.writeI32(self.wait)
+            oprot.writeFieldEnd()
+        if self.capacity is not None:
+            oprot.writeFieldBegin('capacity', TType.STRUCT, 6)
+            self.capacity.write(oprot)
+            oprot.writeFieldEnd()
         oprot.writeFieldStop()
         oprot.writeStructEnd()
 
@@ -1295,6 +2430,8 @@ report_args.thrift_spec = (
     (2, TType.LIST, 'complete', (TType.STRUCT, [Task, None], False), None, ),  # 2
     (3, TType.LIST, 'executing', (TType.STRUCT, [TaskBrief, None], False), None, ),  # 3
     (4, TType.I32, 'vacant', None, None, ),  # 4
+    (5, TType.I32, 'wait', None, None, ),  # 5
+    (6, TType.STRUCT, 'capacity', [Resource, None], None, ),  # 6
 )
 
 
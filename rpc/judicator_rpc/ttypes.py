@@ -46,14 +46,16 @@ class Compile(object):
      - source
      - command
      - timeout
+     - source_digest
 
     """
 
 
-    def __init__(self, source=None, command=None, timeout=None,):
+    def __init__(self, source=None, command=None, timeout=None, source_digest=None,):
         self.source = source
         self.command = command
         self.timeout = timeout
+        self.source_digest = source_digest
 
     def read(self, iprot):
         if iprot._fast_decode is not None and isinstance(iprot.trans, TTransport.CReadableTransport) and self.thrift_spec is not None:
@@ -79,6 +81,11 @@ class Compile(object):
                     self.timeout = iprot.readI32()
                 else:
                     iprot.skip(ftype)
+            elif fid == 4:
+                if ftype == TType.STRING:
+                    self.source_digest = iprot.readString().decode('utf-8') if sys.version_info[0] == 2 else iprot.readString()
+                else:
+                    iprot.skip(ftype)
             else:
                 iprot.skip(ftype)
             iprot.readFieldEnd()
@@ -101,6 +108,10 @@ class Compile(object):
             oprot.writeFieldBegin('timeout', TType.I32, 3)
             oprot.writeI32(self.timeout)
             oprot.writeFieldEnd()
+        if self.source_digest is not None:
+            oprot.writeFieldBegin('source_digest', TType.STRING, 4)
+            oprot.writeString(self.source_digest.encode('utf-8') if sys.version_info[0] == 2 else self.source_digest)
+            oprot.writeFieldEnd()
         oprot.writeFieldStop()
         oprot.writeStructEnd()
 
@@ -127,16 +138,18 @@ class Execute(object):
      - command
      - timeout
      - standard
+     - data_digest
 
     """
 
 
-    def __init__(self, input=None, data=None, command=None, timeout=None, standard=None,):
+    def __init__(self, input=None, data=None, command=None, timeout=None, standard=None, data_digest=None,):
         self.input = input
         self.data = data
         self.command = command
         self.timeout = timeout
         self.standard = standard
+        self.data_digest = data_digest
 
     def read(self, iprot):
         if iprot._fast_decode is not None and isinstance(iprot.trans, TTransport.CReadableTransport) and self.thrift_spec is not None:
@@ -172,6 +185,11 @@ class Execute(object):
                     self.standard = iprot.readBinary()
                 else:
                     iprot.skip(ftype)
+            elif fid == 6:
+                if ftype == TType.STRING:
+                    self.data_digest = iprot.readString().decode('utf-8') if sys.version_info[0] == 2 else iprot.readString()
+                else:
+                    iprot.skip(ftype)
             else:
                 iprot.skip(ftype)
             iprot.readFieldEnd()
@@ -202,6 +220,10 @@ class Execute(object):
             oprot.writeFieldBegin('standard', TType.STRING, 5)
             oprot.writeBinary(self.standard)
             oprot.writeFieldEnd()
+        if self.data_digest is not None:
+            oprot.writeFieldBegin('data_digest', TType.STRING, 6)
+            oprot.writeString(self.data_digest.encode('utf-8') if sys.version_info[0] == 2 else self.data_digest)
+            oprot.writeFieldEnd()
         oprot.writeFieldStop()
         oprot.writeStructEnd()
 
@@ -227,15 +249,19 @@ class Result(object):
      - compile_error
      - execute_output
      - execute_error
+     - cpu_time
+     - memory_peak
 
     """
 
 
-    def __init__(self, compile_output=None, compile_error=None, execute_output=None, execute_error=None,):
+    def __init__(self, compile_output=None, compile_error=None, execute_output=None, execute_error=None, cpu_time=None, memory_peak=None,):
         self.compile_output = compile_output
         self.compile_error = compile_error
         self.execute_output = execute_output
         self.execute_error = execute_error
+        self.cpu_time = cpu_time
+        self.memory_peak = memory_peak
 
     def read(self, iprot):
         if iprot._fast_decode is not None and isinstance(iprot.trans, TTransport.CReadableTransport) and self.thrift_spec is not None:
@@ -266,6 +292,16 @@ class Result(object):
                     self.execute_error = iprot.readBinary()
                 else:
                     iprot.skip(ftype)
+            elif fid == 5:
+                if ftype == TType.I64:
+                    self.cpu_time = iprot.readI64()
+                else:
+                    iprot.skip(ftype)
+            elif fid == 6:
+                if ftype == TType.I64:
+                    self.memory_peak = iprot.readI64()
+                else:
+                    iprot.skip(ftype)
             else:
                 iprot.skip(ftype)
             iprot.readFieldEnd()
@@ -292,6 +328,93 @@ class Result(object):
             oprot.writeFieldBegin('execute_error', TType.STRING, 4)
             oprot.writeBinary(self.execute_error)
             oprot.writeFieldEnd()
+        if self.cpu_time is not None:
+            oprot.writeFieldBegin('cpu_time', TType.I64, 5)
+            oprot.writeI64(self.cpu_time)
+            oprot.writeFieldEnd()
+        if self.memory_peak is not None:
+            oprot.writeFieldBegin('memory_peak', TType.I64, 6)
+            oprot.writeI64(self.memory_peak)
+            oprot.writeFieldEnd()
+        oprot.writeFieldStop()
+        oprot.writeStructEnd()
+
+    def validate(self):
+        return
+
+    def __repr__(self):
+        L = ['%s=%r' % (key, value)
+             for key, value in self.__dict__.items()]
+        return '%s(%s)' % (self.__class__.__name__, ', '.join(L))
+
+    def __eq__(self, other):
+        return isinstance(other, self.__class__) and self.__dict__ == other.__dict__
+
+    def __ne__(self, other):
+        return not (self == other)
+
+
+class Resource(object):
+    """
+    Attributes:
+     - cpu
+     - memory
+     - disk
+
+    """
+
+
+    def __init__(self, cpu=None, memory=None, disk=None,):
+        self.cpu = cpu
+        self.memory = memory
+        self.disk = disk
+
+    def read(self, iprot):
+        if iprot._fast_decode is not None and isinstance(iprot.trans, TTransport.CReadableTransport) and self.thrift_spec is not None:
+            iprot._fast_decode(self, iprot, [self.__class__, self.thrift_spec])
+            return
+        iprot.readStructBegin()
+        while True:
+            (fname, ftype, fid) = iprot.readFieldBegin()
+            if ftype == TType.STOP:
+                break
+            if fid == 1:
+                if ftype == TType.I32:
+                    self.cpu = iprot.readI32()
+                else:
+                    iprot.skip(ftype)
+            elif fid == 2:
+                if ftype == TType.I64:
+                    self.memory = iprot.readI64()
+                else:
+                    iprot.skip(ftype)
+            elif fid == 3:
+                if ftype == TType.I64:
+                    self.disk = iprot.readI64()
+                else:
+                    iprot.skip(ftype)
+            else:
+                iprot.skip(ftype)
+            iprot.readFieldEnd()
+        iprot.readStructEnd()
+
+    def write(self, oprot):
+        if oprot._fast_encode is not None and self.thrift_spec is not None:
+            oprot.trans.write(oprot._fast_encode(self, [self.__class__, self.thrift_spec]))
+            return
+        oprot.writeStructBegin('Resource')
+        if self.cpu is not None:
+            oprot.writeFieldBegin('cpu', TType.I32, 1)
+            oprot.writeI32(self.cpu)
+            oprot.writeFieldEnd()
+        if self.memory is not None:
+            oprot.writeFieldBegin('memory', TType.I64, 2)
+            oprot.writeI64(self.memory)
+            oprot.writeFieldEnd()
+        if self.disk is not None:
+            oprot.writeFieldBegin('disk', TType.I64, 3)
+            oprot.writeI64(self.disk)
+            oprot.writeFieldEnd()
         oprot.writeFieldStop()
         oprot.writeStructEnd()
 
@@ -323,11 +446,13 @@ class Task(object):
      - executor
      - report_time
      - result
+     - requirement
+     - priority
 
     """
 
 
-    def __init__(self, id=None, user=None, compile=None, execute=None, add_time=None, done=None, status=None, executor=None, report_time=None, result=None,):
+    def __init__(self, id=None, user=None, compile=None, execute=None, add_time=None, done=None, status=None, executor=None, report_time=None, result=None, requirement=None, priority=None,):
         self.id = id
         self.user = user
         self.compile = compile
@@ -338,6 +463,8 @@ class Task(object):
         self.executor = executor
         self.report_time = report_time
         self.result = result
+        self.requirement = requirement
+        self.priority = priority
 
     def read(self, iprot):
         if iprot._fast_decode is not None and isinstance(iprot.trans, TTransport.CReadableTransport) and self.thrift_spec is not None:
@@ -401,6 +528,17 @@ class Task(object):
                     self.result.read(iprot)
                 else:
                     iprot.skip(ftype)
+            elif fid == 11:
+                if ftype == TType.STRUCT:
+                    self.requirement = Resource()
+                    self.requirement.read(iprot)
+                else:
+                    iprot.skip(ftype)
+            elif fid == 12:
+                if ftype == TType.I32:
+                    self.priority = iprot.readI32()
+                else:
+                    iprot.skip(ftype)
             else:
                 iprot.skip(ftype)
             iprot.readFieldEnd()
@@ -451,6 +589,14 @@ class Task(object):
             oprot.writeFieldBegin('result', TType.STRUCT, 10)
             self.result.write(oprot)
             oprot.writeFieldEnd()
+        if self.requirement is not None:
+            oprot.writeFieldBegin('requirement', TType.STRUCT, 11)
+            self.requirement.write(oprot)
+            oprot.writeFieldEnd()
+        if self.priority is not None:
+            oprot.writeFieldBegin('priority', TType.I32, 12)
+            oprot.writeI32(self.priority)
+            oprot.writeFieldEnd()
         oprot.writeFieldStop()
         oprot.writeStructEnd()
 
@@ -827,6 +973,105 @@ class SearchReturn(object):
         return not (self == other)
 
 
+class CursorSearchReturn(object):
+    """
+    Attributes:
+     - result
+     - total
+     - tasks
+     - cursor
+
+    """
+
+
+    def __init__(self, result=None, total=None, tasks=None, cursor=None,):
+        self.result = result
+        self.total = total
+        self.tasks = tasks
+        self.cursor = cursor
+
+    def read(self, iprot):
+        if iprot._fast_decode is not None and isinstance(iprot.trans, TTransport.CReadableTransport) and self.thrift_spec is not None:
+            iprot._fast_decode(self, iprot, [self.__class__, self.thrift_spec])
+            return
+        iprot.readStructBegin()
+        while True:
+            (fname, ftype, fid) = iprot.readFieldBegin()
+            if ftype == TType.STOP:
+                break
+            if fid == 1:
+                if ftype == TType.I32:
+                    self.result = iprot.readI32()
+                else:
+                    iprot.skip(ftype)
+            elif fid == 2:
+                if ftype == TType.I32:
+                    self.total = iprot.readI32()
+                else:
+                    iprot.skip(ftype)
+            elif fid == 3:
+                if ftype == TType.LIST:
+                    self.tasks = []
+                    (_etype10, _size7) = iprot.readListBegin()
+                    for _i11 in range(_size7):
+                        _elem12 = TaskBrief()
+                        _elem12.read(iprot)
+                        self.tasks.append(_elem12)
+                    iprot.readListEnd()
+                else:
+                    iprot.skip(ftype)
+            elif fid == 4:
+                if ftype == TType.STRING:
+                    self.cursor = iprot.readString().decode('utf-8') if sys.version_info[0] == 2 else iprot.readString()
+                else:
+                    iprot.skip(ftype)
+            else:
+                iprot.skip(ftype)
+            iprot.readFieldEnd()
+        iprot.readStructEnd()
+
+    def write(self, oprot):
+        if oprot._fast_encode is not None and self.thrift_spec is not None:
+            oprot.trans.write(oprot._fast_encode(self, [self.__class__, self.thrift_spec]))
+            return
+        oprot.writeStructBegin('CursorSearchReturn')
+        if self.result is not None:
+            oprot.writeFieldBegin('result', TType.I32, 1)
+            oprot.writeI32(self.result)
+            oprot.writeFieldEnd()
+        if self.total is not None:
+            oprot.writeFieldBegin('total', TType.I32, 2)
+            oprot.writeI32(self.total)
+            oprot.writeFieldEnd()
+        if self.tasks is not None:
+            oprot.writeFieldBegin('tasks', TType.LIST, 3)
+            oprot.writeListBegin(TType.STRUCT, len(self.tasks))
+            for iter13 in self.tasks:
+                iter13.write(oprot)
+            oprot.writeListEnd()
+            oprot.writeFieldEnd()
+        if self.cursor is not None:
+            oprot.writeFieldBegin('cursor', TType.STRING, 4)
+            oprot.writeString(self.cursor.encode('utf-8') if sys.version_info[0] == 2 else self.cursor)
+            oprot.writeFieldEnd()
+        oprot.writeFieldStop()
+        oprot.writeStructEnd()
+
+    def validate(self):
+        return
+
+    def __repr__(self):
+        L = ['%s=%r' % (key, value)
+             for key, value in self.__dict__.items()]
+        return '%s(%s)' % (self.__class__.__name__, ', '.join(L))
+
+    def __eq__(self, other):
+        return isinstance(other, self.__class__) and self.__dict__ == other.__dict__
+
+    def __ne__(self, other):
+        return not (self == other)
+
+
 class GetReturn(object):
     """
     Attributes:
@@ -896,6 +1141,218 @@ class GetReturn(object):
         return not (self == other)
 
 
+class CheckBlobsReturn(object):
+    """
+    Attributes:
+     - result
+     - missing
+
+    """
+
+
+    def __init__(self, result=None, missing=None,):
+        self.result = result
+        self.missing = missing
+
+    def read(self, iprot):
+        if iprot._fast_decode is not None and isinstance(iprot.trans, TTransport.CReadableTransport) and self.thrift_spec is not None:
+            iprot._fast_decode(self, iprot, [self.__class__, self.thrift_spec])
+            return
+        iprot.readStructBegin()
+        while True:
+            (fname, ftype, fid) = iprot.readFieldBegin()
+            if ftype == TType.STOP:
+                break
+            if fid == 1:
+                if ftype == TType.I32:
+                    self.result = iprot.readI32()
+                else:
+                    iprot.skip(ftype)
+            elif fid == 2:
+                if ftype == TType.LIST:
+                    self.missing = []
+                    (_etype17, _size14) = iprot.readListBegin()
+                    for _i18 in range(_size14):
+                        _elem19 = iprot.readString().decode('utf-8') if sys.version_info[0] == 2 else iprot.readString()
+                        self.missing.append(_elem19)
+                    iprot.readListEnd()
+                else:
+                    iprot.skip(ftype)
+            else:
+                iprot.skip(ftype)
+            iprot.readFieldEnd()
+        iprot.readStructEnd()
+
+    def write(self, oprot):
+        if oprot._fast_encode is not None and self.thrift_spec is not None:
+            oprot.trans.write(oprot._fast_encode(self, [self.__class__, self.thrift_spec]))
+            return
+        oprot.writeStructBegin('CheckBlobsReturn')
+        if self.result is not None:
+            oprot.writeFieldBegin('result', TType.I32, 1)
+            oprot.writeI32(self.result)
+            oprot.writeFieldEnd()
+        if self.missing is not None:
+            oprot.writeFieldBegin('missing', TType.LIST, 2)
+            oprot.writeListBegin(TType.STRING, len(self.missing))
+            for iter20 in self.missing:
+                oprot.writeString(iter20.encode('utf-8') if sys.version_info[0] == 2 else iter20)
+            oprot.writeListEnd()
+            oprot.writeFieldEnd()
+        oprot.writeFieldStop()
+        oprot.writeStructEnd()
+
+    def validate(self):
+        return
+
+    def __repr__(self):
+        L = ['%s=%r' % (key, value)
+             for key, value in self.__dict__.items()]
+        return '%s(%s)' % (self.__class__.__name__, ', '.join(L))
+
+    def __eq__(self, other):
+        return isinstance(other, self.__class__) and self.__dict__ == other.__dict__
+
+    def __ne__(self, other):
+        return not (self == other)
+
+
+class GetBlobReturn(object):
+    """
+    Attributes:
+     - result
+     - data
+
+    """
+
+
+    def __init__(self, result=None, data=None,):
+        self.result = result
+        self.data = data
+
+    def read(self, iprot):
+        if iprot._fast_decode is not None and isinstance(iprot.trans, TTransport.CReadableTransport) and self.thrift_spec is not None:
+            iprot._fast_decode(self, iprot, [self.__class__, self.thrift_spec])
+            return
+        iprot.readStructBegin()
+        while True:
+            (fname, ftype, fid) = iprot.readFieldBegin()
+            if ftype == TType.STOP:
+                break
+            if fid == 1:
+                if ftype == TType.I32:
+                    self.result = iprot.readI32()
+                else:
+                    iprot.skip(ftype)
+            elif fid == 2:
+                if ftype == TType.STRING:
+                    self.data = iprot.readBinary()
+                else:
+                    iprot.skip(ftype)
+            else:
+                iprot.skip(ftype)
+            iprot.readFieldEnd()
+        iprot.readStructEnd()
+
+    def write(self, oprot):
+        if oprot._fast_encode is not None and self.thrift_spec is not None:
+            oprot.trans.write(oprot._fast_encode(self, [self.__class__, self.thrift_spec]))
+            return
+        oprot.writeStructBegin('GetBlobReturn')
+        if self.result is not None:
+            oprot.writeFieldBegin('result', TType.I32, 1)
+            oprot.writeI32(self.result)
+            oprot.writeFieldEnd()
+        if self.data is not None:
+            oprot.writeFieldBegin('data', TType.STRING, 2)
+            oprot.writeBinary(self.data)
+            oprot.writeFieldEnd()
+        oprot.writeFieldStop()
+        oprot.writeStructEnd()
+
+    def validate(self):
+        return
+
+    def __repr__(self):
+        L = ['%s=%r' % (key, value)
+             for key, value in self.__dict__.items()]
+        return '%s(%s)' % (self.__class__.__name__, ', '.join(L))
+
+    def __eq__(self, other):
+        return isinstance(other, self.__class__) and self.__dict__ == other.__dict__
+
+    def __ne__(self, other):
+        return not (self == other)
+
+
+class GetFileReturn(object):
+    """
+    Attributes:
+     - result
+     - data
+
+    """
+
+
+    def __init__(self, result=None, data=None,):
+        self.result = result
+        self.data = data
+
+    def read(self, iprot):
+        if iprot._fast_decode is not None and isinstance(iprot.trans, TTransport.CReadableTransport) and self.thrift_spec is not None:
+            iprot._fast_decode(self, iprot, [self.__class__, self.thrift_spec])
+            return
+        iprot.readStructBegin()
+        while True:
+            (fname, ftype, fid) = iprot.readFieldBegin()
+            if ftype == TType.STOP:
+                break
+            if fid == 1:
+                if ftype == TType.I32:
+                    self.result = iprot.readI32()
+                else:
+                    iprot.skip(ftype)
+            elif fid == 2:
+                if ftype == TType.STRING:
+                    self.data = iprot.readBinary()
+                else:
+                    iprot.skip(ftype)
+            else:
+                iprot.skip(ftype)
+            iprot.readFieldEnd()
+        iprot.readStructEnd()
+
+    def write(self, oprot):
+        if oprot._fast_encode is not None and self.thrift_spec is not None:
+            oprot.trans.write(oprot._fast_encode(self, [self.__class__, self.thrift_spec]))
+            return
+        oprot.writeStructBegin('GetFileReturn')
+        if self.result is not None:
+            oprot.writeFieldBegin('result', TType.I32, 1)
+            oprot.writeI32(self.result)
+            oprot.writeFieldEnd()
+        if self.data is not None:
+            oprot.writeFieldBegin('data', TType.STRING, 2)
+            oprot.writeBinary(self.data)
+            oprot.writeFieldEnd()
+        oprot.writeFieldStop()
+        oprot.writeStructEnd()
+
+    def validate(self):
+        return
+
+    def __repr__(self):
+        L = ['%s=%r' % (key, value)
+             for key, value in self.__dict__.items()]
+        return '%s(%s)' % (self.__class__.__name__, ', '.join(L))
+
+    def __eq__(self, other):
+        return isinstance(other, self.__class__) and self.__dict__ == other.__dict__
+
+    def __ne__(self, other):
+        return not (self == other)
+
+
 class ReportReturn(object):
     """
     Attributes:
@@ -928,22 +1385,22 @@ class ReportReturn(object):
             elif fid == 2:
                 if ftype == TType.LIST:
                     self.cancel = []
-                    (_etype10, _size7) = iprot.readListBegin()
-                    for _i11 in range(_size7):
-                        _elem12 = TaskBrief()
-                        _elem12.read(iprot)
-                        self.cancel.append(_elem12)
+                    (_etype24, _size21) = iprot.readListBegin()
+                    for _i25 in range(_size21):
+                        _elem26 = TaskBrief()
+                        _elem26.read(iprot)
+                        self.cancel.append(_elem26)
                     iprot.readListEnd()
                 else:
                     iprot.skip(ftype)
             elif fid == 3:
                 if ftype == TType.LIST:
                     self.assign = []
-                    (_etype16, _size13) = iprot.readListBegin()
-                    for _i17 in range(_size13):
-                        _elem18 = Task()
-                        _elem18.read(iprot)
-                        self.assign.append(_elem18)
+                    (_etype30, _size27) = iprot.readListBegin()
+                    for _i31 in range(_size27):
+                        _elem32 = Task()
+                        _elem32.read(iprot)
+                        self.assign.append(_elem32)
                     iprot.readListEnd()
                 else:
                     iprot.skip(ftype)
@@ -964,15 +1421,15 @@ class ReportReturn(object):
         if self.cancel is not None:
             oprot.writeFieldBegin('cancel', TType.LIST, 2)
             oprot.writeListBegin(TType.STRUCT, len(self.cancel))
-            for iter19 in self.cancel:
-                iter19.write(oprot)
+            for iter33 in self.cancel:
+                iter33.write(oprot)
             oprot.writeListEnd()
             oprot.writeFieldEnd()
         if self.assign is not None:
             oprot.writeFieldBegin('assign', TType.LIST, 3)
             oprot.writeListBegin(TType.STRUCT, len(self.assign))
-            for iter20 in self.assign:
-                iter20.write(oprot)
+            for iter34 in self.assign:
+                iter34.write(oprot)
             oprot.writeListEnd()
             oprot.writeFieldEnd()
         oprot.writeFieldStop()
@@ -1023,11 +1480,11 @@ class ExecutorsReturn(object):
             elif fid == 2:
                 if ftype == TType.LIST:
                     self.executors = []
-                    (_etype24, _size21) = iprot.readListBegin()
-                    for _i25 in range(_size21):
-                        _elem26 = Executor()
-                        _elem26.read(iprot)
-                        self.executors.append(_elem26)
+                    (_etype38, _size35) = iprot.readListBegin()
+                    for _i39 in range(_size35):
+                        _elem40 = Executor()
+                        _elem40.read(iprot)
+                        self.executors.append(_elem40)
                     iprot.readListEnd()
                 else:
                     iprot.skip(ftype)
@@ -1048,8 +1505,8 @@ class ExecutorsReturn(object):
         if self.executors is not None:
             oprot.writeFieldBegin('executors', TType.LIST, 2)
             oprot.writeListBegin(TType.STRUCT, len(self.executors))
-            for iter27 in self.executors:
-                iter27.write(oprot)
+            for iter41 in self.executors:
+                iter41.write(oprot)
             oprot.writeListEnd()
             oprot.writeFieldEnd()
         oprot.writeFieldStop()
@@ -1074,6 +1531,7 @@ Compile.thrift_spec = (
     (1, TType.STRING, 'source', 'BINARY', None, ),  # 1
     (2, TType.STRING, 'command', 'BINARY', None, ),  # 2
     (3, TType.I32, 'timeout', None, None, ),  # 3
+    (4, TType.STRING, 'source_digest', 'UTF8', None, ),  # 4
 )
 all_structs.append(Execute)
 Execute.thrift_spec = (
@@ -1083,6 +1541,7 @@ Execute.thrift_spec = (
     (3, TType.STRING, 'command', 'BINARY', None, ),  # 3
     (4, TType.I32, 'timeout', None, None, ),  # 4
     (5, TType.STRING, 'standard', 'BINARY', None, ),  # 5
+    (6, TType.STRING, 'data_digest', 'UTF8', None, ),  # 6
 )
 all_structs.append(Result)
 Result.thrift_spec = (
@@ -1091,6 +1550,15 @@ Result.thrift_spec = (
     (2, TType.STRING, 'compile_error', 'BINARY', None, ),  # 2
     (3, TType.STRING, 'execute_output', 'BINARY', None, ),  # 3
     (4, TType.STRING, 'execute_error', 'BINARY', None, ),  # 4
+    (5, TType.I64, 'cpu_time', None, None, ),  # 5
+    (6, TType.I64, 'memory_peak', None, None, ),  # 6
+)
+all_structs.append(Resource)
+Resource.thrift_spec = (
+    None,  # 0
+    (1, TType.I32, 'cpu', None, None, ),  # 1
+    (2, TType.I64, 'memory', None, None, ),  # 2
+    (3, TType.I64, 'disk', None, None, ),  # 3
 )
 all_structs.append(Task)
 Task.thrift_spec = (
@@ -1105,6 +1573,8 @@ Task.thrift_spec = (
     (8, TType.STRING, 'executor', 'UTF8', None, ),  # 8
     (9, TType.STRING, 'report_time', 'UTF8', None, ),  # 9
     (10, TType.STRUCT, 'result', [Result, None], None, ),  # 10
+    (11, TType.STRUCT, 'requirement', [Resource, None], None, ),  # 11
+    (12, TType.I32, 'priority', None, None, ),  # 12
 )
 all_structs.append(TaskBrief)
 TaskBrief.thrift_spec = (
@@ -1137,12 +1607,38 @@ SearchReturn.thrift_spec = (
     (2, TType.I32, 'pages', None, None, ),  # 2
     (3, TType.LIST, 'tasks', (TType.STRUCT, [TaskBrief, None], False), None, ),  # 3
 )
+all_structs.append(CursorSearchReturn)
+CursorSearchReturn.thrift_spec = (
+    None,  # 0
+    (1, TType.I32, 'result', None, None, ),  # 1
+    (2, TType.I32, 'total', None, None, ),  # 2
+    (3, TType.LIST, 'tasks', (TType.STRUCT, [TaskBrief, None], False), None, ),  # 3
+    (4, TType.STRING, 'cursor', 'UTF8', None, ),  # 4
+)
 all_structs.append(GetReturn)
 GetReturn.thrift_spec = (
     None,  # 0
     (1, TType.I32, 'result', None, None, ),  # 1
     (2, TType.STRUCT, 'task', [Task, None], None, ),  # 2
 )
+all_structs.append(CheckBlobsReturn)
+CheckBlobsReturn.thrift_spec = (
+    None,  # 0
+    (1, TType.I32, 'result', None, None, ),  # 1
+    (2, TType.LIST, 'missing', (TType.STRING, 'UTF8', False), None, ),  # 2
+)
+all_structs.append(GetBlobReturn)
+GetBlobReturn.thrift_spec = (
+    None,  # 0
+    (1, TType.I32, 'result', None, None, ),  # 1
+    (2, TType.STRING, 'data', 'BINARY', None, ),  # 2
+)
+all_structs.append(GetFileReturn)
+GetFileReturn.thrift_spec = (
+    None,  # 0
+    (1, TType.I32, 'result', None, None, ),  # 1
+    (2, TType.STRING, 'data', 'BINARY', None, ),  # 2
+)
 all_structs.append(ReportReturn)
 ReportReturn.thrift_spec = (
     None,  # 0
@@ -0,0 +1,171 @@
+# -*- coding: utf-8 -*-
+
+# The MIT License (MIT)
+# Copyright (c) 2020 SBofGaySchoolBuPaAnything
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND,
+# EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF
+# MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT.
+# IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM,
+# DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR
+# OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE
+# OR OTHER DEALINGS IN THE SOFTWARE.
+
+__author__ = "chenty"
+
+# Add current folder and parent folder into python path
+import os
+import sys
+sys.path.append(os.getcwd())
+sys.path.append(os.path.dirname(os.getcwd()))
+import argparse
+import logging
+import threading
+import time
+
+from rpc.judicator_rpc import Judicator
+from rpc.judicator_rpc.ttypes import *
+
+from judicator.main import generate_server
+from utility.rpc import JudicatorPool
+
+
+# Server configurations to be compared, (type, transport, protocol)
+MODES = [
+    ("threaded", "buffered", "binary"),
+    ("pool", "buffered", "binary"),
+    ("pool", "framed", "compact"),
+    ("nonblocking", "framed", "binary"),
+    ("nonblocking", "framed", "compact")
+]
+
+
+class BenchmarkService:
+    """
+    Rpc service simulating the judicator, with a fixed latency for each database access
+    """
+    def __init__(self, latency):
+        """
+        Initializer of the class
+        :param latency: Simulated latency of database in seconds
+        """
+        self.latency = latency
+        return
+
+    def ping(self):
+        """
+        Interface: Ping
+        :return: ReturnCode.OK
+        """
+        return ReturnCode.OK
+
+    def executors(self):
+        """
+        Interface: Executors, sleep for the latency before returning
+        :return: ExecutorsReturn with an executor
+        """
+        time.sleep(self.latency)
+        return ExecutorsReturn(ReturnCode.OK, [Executor("0", "executor", "2020-01-01T00:00:00")])
+
+
+class StaticEtcd:
+    """
+    Etcd proxy stub returning a fixed judicator list
+    """
+    def __init__(self, address):
+        """
+        Initializer of the class
+        :param address: Address of the judicator
+        """
+        self.judicators = {"benchmark": address}
+        return
+
+    def get(self, key):
+        """
+        Get the judicator list
+        :param key: Ignored
+        :return: The judicator list
+        """
+        return self.judicators
+
+
+def benchmark(mode, port, args, logger):
+    """
+    Start a server with the given mode and call it concurrently from clients
+    :param mode: Tuple, (type, transport, protocol)
+    :param port: Listen port of the server
+    :param args: Parsed command line arguments
+    :param logger: The logger
+    :return: Tuple, (calls per second, median latency, 99th percentile latency)
+    """
+    server_type, transport, protocol = mode
+    # Persistent connections occupy threads of the pool server, so it needs one thread for each client
+    server = generate_server(
+        Judicator.Processor(BenchmarkService(args.latency)),
+        "127.0.0.1",
+        port,
+        {"type": server_type, "threads": max(args.threads, args.clients) if server_type == "pool" else args.threads,
+         "transport": transport, "protocol": protocol, "connections": args.clients},
+        logger
+    )
+    server_thread = threading.Thread(target=server.serve)
+    server_thread.setDaemon(True)
+    server_thread.start()
+    time.sleep(0.5)
+
+    pool = JudicatorPool(
+        StaticEtcd("127.0.0.1:%d" % port), "", logger,
+        max_idle=args.clients, transport=transport, protocol=protocol
+    )
+    latencies = [[] for _ in range(args.clients)]
+
+    def client(index):
+        for _ in range(args.calls):
+            start = time.time()
+            pool.call("executors")
+            latencies[index].append(time.time() - start)
+
+    start = time.time()
+    threads = [threading.Thread(target=client, args=(i,)) for i in range(args.clients)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    duration = time.time() - start
+
+    latencies = sorted(x for l in latencies for x in l)
+    return (
+        len(latencies) / duration,
+        latencies[len(latencies) // 2],
+        latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))]
+    )
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark of judicator rpc server modes.")
+    parser.add_argument("--clients", type=int, default=32, help="Amount of concurrent clients")
+    parser.add_argument("--calls", type=int, default=200, help="Amount of calls made by each client")
+    parser.add_argument("--threads", type=int, default=16, help="Amount of worker threads of the server")
+    parser.add_argument("--latency", type=float, default=0.002, help="Simulated database latency in seconds")
+    parser.add_argument("--port", type=int, default=14000, help="First listen port used by servers")
+    args = parser.parse_args()
+
+    logger = logging.getLogger("benchmark")
+    logger.addHandler(logging.NullHandler())
+    logger.propagate = False
+
+    print("%d clients, %d calls each, %d server threads, %.1f ms latency." %
+          (args.clients, args.calls, args.threads, args.latency * 1000))
+    print("%-12s %-9s %-8s %10s %10s %10s" % ("server", "transport", "protocol", "calls/s", "p50 ms", "p99 ms"))
+    for i, mode in enumerate(MODES):
+        throughput, p50, p99 = benchmark(mode, args.port + i, args, logger)
+        print("%-12s %-9s %-8s %10.1f %10.2f %10.2f" % (mode + (throughput, p50 * 1000, p99 * 1000)))
@@ -0,0 +1,266 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+# The MIT License (MIT)
+# Copyright (c) 2020 SBofGaySchoolBuPaAnything
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND,
+# EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF
+# MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT.
+# IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM,
+# DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR
+# OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE
+# OR OTHER DEALINGS IN THE SOFTWARE.
+__author__ = "chenty"
+
+# Add current folder and parent folder into python path
+import os
+os.environ["PYTHONPATH"] = os.environ.get("PYTHONPATH", "") + ":" + os.getcwd()
+os.environ["PYTHONPATH"] += ":" + os.path.dirname(os.getcwd())
+import sys
+sys.path.append(os.getcwd())
+sys.path.append(os.path.dirname(os.getcwd()))
+import unittest
+import io
+import shutil
+import tempfile
+import zipfile
+
+from utility.cache import tree_size, link_tree, DatasetCache, ResponseCache
+from utility.task import blob_digest
+from utility.function import get_logger
+
+
+def generate_zip(files):
+    """
+    Generate a zip file
+    :param files: Dictionary from path to content of each file
+    :return: Content of the zip file
+    """
+    buff = io.BytesIO()
+    with zipfile.ZipFile(buff, "w") as f:
+        for path, content in files.items():
+            f.writestr(path, content)
+    return buff.getvalue()
+
+def read_tree(path):
+    """
+    Read all files in a directory
+    :param path: Path to the directory
+    :return: Dictionary from relative path to content of each file
+    """
+    res = {}
+    for root, _, files in os.walk(path):
+        for name in files:
+            with open(os.path.join(root, name), "rb") as f:
+                res[os.path.relpath(os.path.join(root, name), path).replace(os.sep, "/")] = f.read()
+    return res
+
+
+# Unit test class for utility.cache
+class TestCache(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        """
+        Initialization function
+        :return: None
+        """
+        cls.logger = get_logger("Test", None, None)
+        return
+
+    def setUp(self):
+        """
+        Initialization function of each test
+        :return: None
+        """
+        self.temp_dir = tempfile.mkdtemp()
+        return
+
+    def tearDown(self):
+        """
+        Clean up function of each test
+        :return: None
+        """
+        shutil.rmtree(self.temp_dir)
+        return
+
+    def test_000_link_tree(self):
+        """
+        Test for populating a directory with links or copies of files
+        :return: None
+        """
+        src = os.path.join(self.temp_dir, "src")
+        files = {"a": b"1", "d/b": b"22", "d/e/c": b"333"}
+        os.makedirs(os.path.join(src, "d", "e"))
+        os.makedirs(os.path.join(src, "empty"))
+        for path, content in files.items():
+            with open(os.path.join(src, path), "wb") as f:
+                f.write(content)
+        self.assertEqual(tree_size(src), 6)
+
+        for copy in [False, True]:
+            dst = os.path.join(self.temp_dir, "dst_%s" % copy)
+            os.mkdir(dst)
+            link_tree(src, dst, copy)
+            self.assertEqual(read_tree(dst), files)
+            self.assertTrue(os.path.isdir(os.path.join(dst, "empty")))
+            for path in files:
+                self.assertEqual(
+                    os.path.samefile(os.path.join(src, path), os.path.join(dst, path)),
+                    not copy
+                )
+
+        # Created directories and copied files are given to the owner, while linked files keep their owner
+        uid, gid = os.getuid(), os.getgid()
+        for copy in [False, True]:
+            dst = os.path.join(self.temp_dir, "owned_%s" % copy)
+            os.mkdir(dst)
+            owned = []
+            chown, os.chown = os.chown, lambda path, *owner: owned.append((os.path.relpath(path, dst), owner))
+            try:
+                link_tree(src, dst, copy, (uid, gid))
+            finally:
+                os.chown = chown
+            self.assertEqual(read_tree(dst), files)
+            self.assertEqual(
+                sorted(owned),
+                sorted([(x, (uid, gid)) for x in ["d", os.path.join("d", "e"), "empty"]] +
+                       ([(os.path.normpath(x), (uid, gid)) for x in files] if copy else []))
+            )
+        return
+
+    def test_001_dataset_cache(self):
+        """
+        Test for the disk cache of extracted zip files
+        :return: None
+        """
+        path = os.path.join(self.temp_dir, "cache")
+        datasets = [{"a": b"x" * 40, "d/b": b"y" * 20}, {"c": b"z" * 50}, {"e": b"w" * 30}]
+        zips = [generate_zip(x) for x in datasets]
+        digests = [blob_digest(x) for x in zips]
+        fetched = []
+
+        def fetcher(i):
+            """
+            Generate a function fetching a zip file, recording calls
+            :param i: Index of the zip file
+            :return: The function
+            """
+            def fetch():
+                fetched.append(i)
+                return zips[i]
+            return fetch
+
+        cache = DatasetCache(path, 100, self.logger)
+
+        # Miss and then hit
+        entry = cache.acquire(digests[0], fetcher(0))
+        self.assertEqual(entry, os.path.join(path, digests[0]))
+        self.assertEqual(read_tree(entry), datasets[0])
+        self.assertEqual(cache.acquire(digests[0], fetcher(0)), entry)
+        self.assertEqual(fetched, [0])
+        self.assertEqual(cache.size, 60)
+        self.assertEqual(cache.using[digests[0]], 2)
+
+        # Datasets in use are not evicted, even if the cache is larger than its size
+        cache.acquire(digests[1], fetcher(1))
+        self.assertEqual(cache.size, 110)
+        self.assertEqual(list(cache.entries.keys()), digests[:2])
+        cache.release(digests[0])
+        self.assertIn(digests[0], cache.entries)
+
+        # The least recently used dataset is evicted when released by all
+        cache.release(digests[0])
+        self.assertNotIn(digests[0], cache.using)
+        self.assertEqual(list(cache.entries.keys()), [digests[1]])
+        self.assertFalse(os.path.exists(entry))
+        self.assertEqual(cache.size, 50)
+
+        cache.acquire(digests[2], fetcher(2))
+        cache.release(digests[2])
+        cache.release(digests[1])
+        self.assertEqual(list(cache.entries.keys()), digests[1:])
+        self.assertEqual(cache.size, 80)
+        self.assertEqual(fetched, [0, 1, 2])
+
+        # A failed extraction leaves nothing behind
+        with self.assertRaises(Exception):
+            cache.acquire(digests[0], lambda: b"not a zip file")
+        self.assertNotIn(digests[0], cache.entries)
+        self.assertEqual(sorted(os.listdir(path)), sorted(digests[1:]))
+
+        # Cached datasets are loaded by a new instance, and partially extracted or unknown files are removed
+        os.mkdir(os.path.join(path, "tmp_partial"))
+        with open(os.path.join(path, "unknown"), "wb") as f:
+            f.write(b"")
+        cache = DatasetCache(path, 100, self.logger)
+        self.assertEqual(sorted(cache.entries.keys()), sorted(digests[1:]))
+        self.assertEqual(cache.size, 80)
+        self.assertEqual(sorted(os.listdir(path)), sorted(digests[1:]))
+        self.assertEqual(cache.acquire(digests[2], fetcher(2)), os.path.join(path, digests[2]))
+        self.assertEqual(fetched, [0, 1, 2])
+        cache.release(digests[2])
+
+        # Loaded datasets are evicted if the cache is smaller, in the order of their modification time
+        os.utime(os.path.join(path, digests[1]), (1000, 1000))
+        os.utime(os.path.join(path, digests[2]), (2000, 2000))
+        cache = DatasetCache(path, 40, self.logger)
+        self.assertEqual(cache.size, 30)
+        self.assertEqual(os.listdir(path), [digests[2]])
+        return
+
+    def test_002_response_cache(self):
+        """
+        Test for the in-process response cache
+        :return: None
+        """
+        cache = ResponseCache(10)
+        self.assertIsNone(cache.get("a"))
+        cache.set("a", b"1234")
+        cache.set("b", b"1234")
+        self.assertEqual(cache.get("a"), b"1234")
+        self.assertEqual(cache.size, 8)
+
+        # The least recently used one is evicted
+        cache.set("c", b"1234")
+        self.assertIsNone(cache.get("b"))
+        self.assertEqual(cache.get("a"), b"1234")
+        self.assertEqual(cache.get("c"), b"1234")
+        self.assertEqual(cache.size, 8)
+
+        # Replacing a response updates the size
+        cache.set("a", b"12")
+        self.assertEqual(cache.get("a"), b"12")
+        self.assertEqual(cache.size, 6)
+        cache.set("d", b"1234")
+        self.assertEqual(cache.size, 10)
+        self.assertEqual(list(cache.entries.keys()), ["c", "a", "d"])
+
+        # Responses larger than the whole cache are not cached, and evict nothing
+        cache.set("e", b"x" * 11)
+        self.assertIsNone(cache.get("e"))
+        self.assertEqual(cache.size, 10)
+
+        # A response as large as the whole cache evicts all others
+        cache.set("f", b"x" * 10)
+        self.assertEqual(cache.get("f"), b"x" * 10)
+        self.assertEqual(list(cache.entries.keys()), ["f"])
+        self.assertEqual(cache.size, 10)
+
+        # Empty responses are cached
+        cache.set("g", b"")
+        self.assertEqual(cache.get("g"), b"")
+        return
+
+if __name__ == "__main__":
+    unittest.main()
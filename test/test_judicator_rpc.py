@@ -0,0 +1,439 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+# The MIT License (MIT)
+# Copyright (c) 2020 SBofGaySchoolBuPaAnything
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND,
+# EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF
+# MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT.
+# IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM,
+# DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR
+# OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE
+# OR OTHER DEALINGS IN THE SOFTWARE.
+__author__ = "chenty"
+
+# Add current folder and parent folder into python path
+import os
+os.environ["PYTHONPATH"] = os.environ.get("PYTHONPATH", "") + ":" + os.getcwd()
+os.environ["PYTHONPATH"] += ":" + os.path.dirname(os.getcwd())
+import sys
+sys.path.append(os.getcwd())
+sys.path.append(os.path.dirname(os.getcwd()))
+import unittest
+import subprocess
+import signal
+import time
+import shutil
+import pymongo
+import datetime
+import zlib
+import tracemalloc
+tracemalloc.start()
+
+from utility.mongodb.proxy import mongodb_generate_run_command, reconcile_indexes
+from utility.function import get_logger
+from judicator.main import RPCService, SHARE_VIRTUAL_TIME, EXECUTOR_INDEXES, backfill_assignment
+from judicator.main import expire_tasks, expire_executors, PREVIEW_FIELDS
+from rpc.judicator_rpc.ttypes import ReturnCode
+from utility.task import TASK_STATUS, TRUNCATE_MAX_LENGTH, decompress_and_truncate
+
+
+# Unit test class for task assignment and updates of judicator.main.RPCService
+class TestJudicatorRPC(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        """
+        Initialization function
+        :return: None
+        """
+        print("Initializing environment.\n")
+
+        # Generate temp data dir
+        os.mkdir("mongodb")
+
+        # Start a single member replica set, like the ones judicators work with
+        cls.mongodb_conf = {
+            "exe": "mongod",
+            "name": "mongodb",
+            "data_dir": "mongodb",
+            "listen": {
+                "address": "0.0.0.0",
+                "port": "3000"
+            },
+            "advertise": {
+                "address": "localhost",
+                "port": "3000"
+            },
+            "replica_set": "rs"
+        }
+        cls.mongodb_proc = subprocess.Popen(
+            mongodb_generate_run_command(cls.mongodb_conf),
+            stdout=sys.stdout,
+            stderr=subprocess.STDOUT
+        )
+        time.sleep(5)
+        client = pymongo.MongoClient("localhost", 3000)
+        client.admin.command("replSetInitiate", {"_id": "rs", "members": [{"_id": 0, "host": "localhost:3000"}]})
+        client.close()
+        cls.client = pymongo.MongoClient("localhost", 3000, replicaset="rs")
+        time.sleep(10)
+
+        cls.logger = get_logger("Test", None, None)
+        database = cls.client["judicator_test"]
+        cls.mongodb_task = database["task"]
+        cls.mongodb_executor = database["executor"]
+        cls.mongodb_blob = database["blob"]
+        cls.mongodb_share = database["share"]
+        reconcile_indexes(cls.mongodb_executor, EXECUTOR_INDEXES, cls.logger)
+        cls.rpc = RPCService(
+            cls.logger, cls.mongodb_task, cls.mongodb_executor, cls.mongodb_blob, cls.mongodb_share
+        )
+        return
+
+    def setUp(self):
+        """
+        Initialization function of each test
+        :return: None
+        """
+        self.mongodb_task.delete_many({})
+        self.mongodb_share.delete_many({})
+        return
+
+    def insert_tasks(self, tasks):
+        """
+        Insert undone tasks with no executor
+        :param tasks: List of dictionaries of fields of each task, other than the default ones
+        :return: List of ids of the tasks
+        """
+        documents = []
+        for x in tasks:
+            task = {"done": False, "executor": None, "priority": 0, "share": 0}
+            task.update(x)
+            documents.append(task)
+        return self.mongodb_task.insert_many(documents).inserted_ids
+
+    def test_000_claim(self):
+        """
+        Test for claiming tasks in the order of assignment
+        :return: None
+        """
+        ids = self.insert_tasks([
+            {"priority": 0, "share": 1},
+            {"priority": 1, "share": 3},
+            {"priority": 0, "share": 0},
+            {"priority": 1, "share": 2},
+            {"priority": 0, "share": 1}
+        ])
+        self.mongodb_task.insert_one({"done": True, "executor": None, "priority": 2, "share": 0})
+        self.mongodb_task.insert_one({"done": False, "executor": "other", "priority": 2, "share": 0})
+
+        self.assertEqual(self.rpc.claim("a", 0), [])
+        claimed = self.rpc.claim("a", 2)
+        self.assertEqual([x["_id"] for x in claimed], [ids[3], ids[1]])
+        self.assertTrue(all(x["executor"] == "a" for x in claimed))
+        self.assertEqual(self.mongodb_share.find_one({"_id": SHARE_VIRTUAL_TIME})["tag"], 3)
+
+        # Claimed tasks are not claimed again, and ties of share are broken by id
+        claimed = self.rpc.claim("b", 10)
+        self.assertEqual([x["_id"] for x in claimed], [ids[2], ids[0], ids[4]])
+        self.assertEqual(self.mongodb_task.count_documents({"executor": "a"}), 2)
+        self.assertEqual(self.mongodb_task.count_documents({"executor": "b"}), 3)
+        self.assertEqual(self.rpc.claim("c", 10), [])
+
+        # The virtual time never moves backward
+        self.assertEqual(self.mongodb_share.find_one({"_id": SHARE_VIRTUAL_TIME})["tag"], 3)
+        return
+
+    def test_001_bulk_update(self):
+        """
+        Test for carrying out updates in one bulk write
+        :return: None
+        """
+        ids = self.insert_tasks([{"status": 0, "n": i} for i in range(3)])
+
+        self.assertEqual(self.rpc.bulk_update([]), (0, {}))
+
+        # Unmatched updates are not counted
+        matched, errors = self.rpc.bulk_update([
+            ({"_id": ids[0]}, {"$set": {"status": 1}}),
+            ({"_id": ids[1], "executor": "other"}, {"$set": {"status": 1}}),
+            ({"_id": ids[2]}, {"$set": {"status": 3}})
+        ])
+        self.assertEqual((matched, errors), (2, {}))
+        self.assertEqual([x["status"] for x in self.mongodb_task.find(sort=[("n", 1)])], [1, 0, 3])
+
+        # Failed updates do not stop others
+        matched, errors = self.rpc.bulk_update([
+            ({"_id": ids[0]}, {"$set": {"status": 2}}),
+            ({"_id": ids[1]}, {"$inc": {"executor": 1}}),
+            ({"_id": ids[2]}, {"$set": {"status": 4}})
+        ])
+        self.assertEqual(matched, 2)
+        self.assertEqual(list(errors.keys()), [1])
+        self.assertEqual([x["status"] for x in self.mongodb_task.find(sort=[("n", 1)])], [2, 0, 4])
+
+        # Updates making documents too large fail on the server
+        self.mongodb_task.update_one({"_id": ids[1]}, {"$set": {"a": b"\x00" * (9 * 1024 * 1024)}})
+        matched, errors = self.rpc.bulk_update([
+            ({"_id": ids[0]}, {"$set": {"status": 5}}),
+            ({"_id": ids[1]}, {"$set": {"b": b"\x00" * (9 * 1024 * 1024)}})
+        ])
+        self.assertEqual(matched, 1)
+        self.assertEqual(list(errors.keys()), [1])
+        self.assertIn("large", errors[1])
+
+        # Updates larger than a message are not sent, and then updates are carried out one by one, and only they fail
+        matched, errors = self.rpc.bulk_update([
+            ({"_id": ids[0]}, {"$set": {"status": 6}}),
+            ({"_id": ids[2]}, {"$set": {"b": b"\x00" * (50 * 1000 * 1000)}}),
+            ({"_id": ids[2]}, {"$set": {"status": 6}})
+        ])
+        self.assertEqual(matched, 2)
+        self.assertEqual(list(errors.keys()), [1])
+        self.assertIn("large", errors[1])
+        self.assertEqual([x["status"] for x in self.mongodb_task.find(sort=[("n", 1)])], [6, 0, 6])
+        return
+
+    def test_002_cursor_search(self):
+        """
+        Test for paging through tasks with cursors
+        :return: None
+        """
+        # Some tasks are added at the same time, and are ordered by their ids
+        now = datetime.datetime.now().replace(microsecond=0)
+        times = [now - datetime.timedelta(seconds=x // 2) for x in range(7)]
+        ids = self.insert_tasks([
+            {"user": x % 2, "add_time": t, "status": 0, "report_time": t} for x, t in enumerate(times)
+        ])
+        tasks = sorted(zip(times, ids))
+
+        for old_to_new in [True, False]:
+            expected = [str(x[1]) for x in (tasks if old_to_new else tasks[::-1])]
+            found, cursor = [], None
+            while True:
+                result = self.rpc.cursor_search(None, None, None, None, old_to_new, 3, cursor, cursor is None)
+                self.assertEqual(result.result, ReturnCode.OK)
+                self.assertEqual(result.total, 7 if cursor is None else -1)
+                found.extend(x.id for x in result.tasks)
+                cursor = result.cursor
+                if not cursor:
+                    break
+            self.assertEqual(found, expected)
+
+        # Conditions are kept across pages
+        result = self.rpc.cursor_search(None, 1, None, None, True, 2, None, True)
+        self.assertEqual(result.total, 3)
+        result = self.rpc.cursor_search(None, 1, None, None, True, 2, result.cursor, False)
+        self.assertEqual([x.id for x in result.tasks], [str(x[1]) for x in tasks if x[1] in ids[1::2]][2:])
+        self.assertEqual(result.cursor, None)
+
+        result = self.rpc.cursor_search(None, None, None, None, True, 3, "invalid", False)
+        self.assertEqual(result.result, ReturnCode.INVALID_INPUT)
+        return
+
+    def test_003_claim_capacity(self):
+        """
+        Test for claiming tasks fitting in the capacity of an executor
+        :return: None
+        """
+        ids = self.insert_tasks([
+            {"share": 0, "requirement": {"cpu": 2, "memory": 100, "disk": 0}},
+            {"share": 1, "requirement": {"cpu": 8, "memory": 100, "disk": 0}},
+            {"share": 2, "requirement": {"cpu": 1, "memory": 500, "disk": 0}},
+            {"share": 3},
+            {"share": 4, "requirement": {"cpu": 1, "memory": 200, "disk": 0}},
+            {"share": 5, "requirement": {"cpu": 1}}
+        ])
+
+        # Tasks requiring more than the remaining capacity are skipped, and those without requirement always fit
+        claimed = self.rpc.claim("a", 10, {"cpu": 4, "memory": 400})
+        self.assertEqual([x["_id"] for x in claimed], [ids[0], ids[3], ids[4], ids[5]])
+
+        # Resources not in the capacity are not limited
+        claimed = self.rpc.claim("b", 10, {"cpu": 1})
+        self.assertEqual([x["_id"] for x in claimed], [ids[2]])
+
+        # The amount is limited as well
+        self.mongodb_task.update_many({}, {"$set": {"executor": None}})
+        claimed = self.rpc.claim("c", 2, {"cpu": 16, "memory": 1000, "disk": 0})
+        self.assertEqual([x["_id"] for x in claimed], [ids[0], ids[1]])
+        claimed = self.rpc.claim("c", 10, {"cpu": 0, "memory": 0, "disk": 0})
+        self.assertEqual([x["_id"] for x in claimed], [ids[3]])
+        return
+
+    def test_004_expire(self):
+        """
+        Test for expiring tasks and executors not reported for a while
+        :return: None
+        """
+        now = datetime.datetime.now()
+        old = now - datetime.timedelta(seconds=60)
+        expired = self.insert_tasks([{"executor": "a", "report_time": old, "status": 2} for _ in range(3)])
+        self.insert_tasks([
+            {"executor": "a", "report_time": now, "status": 2},
+            {"executor": None, "report_time": old},
+            {"done": True, "executor": "a", "report_time": old}
+        ])
+        self.assertEqual(sorted(expire_tasks(self.mongodb_task, now - datetime.timedelta(seconds=30))), expired)
+        self.assertEqual(
+            sorted(x["_id"] for x in self.mongodb_task.find({"status": TASK_STATUS["RETRYING"], "executor": None})),
+            expired
+        )
+        self.assertEqual(expire_tasks(self.mongodb_task, now - datetime.timedelta(seconds=30)), [])
+
+        self.mongodb_executor.delete_many({})
+        self.mongodb_executor.insert_many([
+            {"hostname": "a", "report_time": old},
+            {"hostname": "b", "report_time": old},
+            {"hostname": "c", "report_time": now}
+        ])
+        self.assertEqual(
+            sorted(expire_executors(self.mongodb_executor, now - datetime.timedelta(seconds=30))), ["a", "b"]
+        )
+        self.assertEqual([x["hostname"] for x in self.mongodb_executor.find()], ["c"])
+        return
+
+    def test_005_get_fields(self):
+        """
+        Test for getting some files of a task, truncated through stored previews or the files themselves
+        :return: None
+        """
+        now = datetime.datetime.now()
+        long_text = zlib.compress(("x" * TRUNCATE_MAX_LENGTH * 2).encode("utf-8"))
+        short_text = zlib.compress(b"short")
+        task = {
+            "user": 0, "add_time": now, "done": True, "status": 5, "report_time": now,
+            "compile": {"source": b"source", "command": short_text, "timeout": 1},
+            "execute": {"input": short_text, "data": b"", "command": short_text, "timeout": 1, "standard": b""},
+            "result": {
+                "compile_output": short_text, "compile_error": b"",
+                "execute_output": long_text, "execute_error": long_text
+            }
+        }
+        ids = self.insert_tasks([task, dict(task, result=dict(task["result"]))])
+        # Previews are stored for the first task only, as if the second one was done before they were introduced
+        preview = dict((f, zlib.compress(b"preview")) for f in PREVIEW_FIELDS)
+        self.mongodb_task.update_one({"_id": ids[0]}, {"$set": {"result.preview": preview}})
+
+        for id, expected in [(ids[0], "preview"), (ids[1], "x" * 10 + "...")]:
+            result = self.rpc.get_fields(str(id), ["execute_output", "compile_command"], 10)
+            self.assertEqual(result.result, ReturnCode.OK)
+            self.assertEqual(decompress_and_truncate(result.task.result.execute_output, False), expected)
+            self.assertEqual(result.task.compile.command, short_text)
+            # Files not requested are left empty
+            self.assertEqual(result.task.result.execute_error, b"")
+            self.assertEqual(result.task.compile.source, b"")
+            self.assertEqual(result.task.execute.input, b"")
+
+        # Files are read when longer text than previews is requested
+        result = self.rpc.get_fields(str(ids[0]), ["execute_output"], TRUNCATE_MAX_LENGTH + 1)
+        self.assertEqual(
+            decompress_and_truncate(result.task.result.execute_output, False), "x" * (TRUNCATE_MAX_LENGTH + 1) + "..."
+        )
+        result = self.rpc.get_fields(str(ids[0]), ["execute_output"], 0)
+        self.assertEqual(result.task.result.execute_output, long_text)
+
+        self.assertEqual(self.rpc.get_fields(str(ids[0]), ["unknown"], 0).result, ReturnCode.INVALID_INPUT)
+        self.assertEqual(self.rpc.get_fields("0" * 24, ["execute_output"], 0).result, ReturnCode.NOT_EXIST)
+        return
+
+    def test_006_report_wait(self):
+        """
+        Test for holding reports for at most half the task expiration
+        :return: None
+        """
+        rpc = RPCService(
+            self.logger, self.mongodb_task, self.mongodb_executor, self.mongodb_blob, self.mongodb_share,
+            task_expiration=2
+        )
+        start = time.time()
+        result = rpc.report("a", [], [], 1, 30)
+        self.assertEqual(result.assign, [])
+        self.assertGreaterEqual(time.time() - start, 1)
+        self.assertLess(time.time() - start, 5)
+
+        # Reports with no vacancy are not held
+        start = time.time()
+        rpc.report("a", [], [], 0, 30)
+        self.assertLess(time.time() - start, 1)
+        return
+
+    def test_007_backfill(self):
+        """
+        Test for setting priority and share tag of waiting tasks added without them
+        :return: None
+        """
+        old = self.mongodb_task.insert_many([{"done": False, "executor": None} for _ in range(2)]).inserted_ids
+        self.mongodb_task.insert_one({"done": False, "executor": "a", "n": 0})
+        self.mongodb_task.insert_one({"done": True, "executor": None, "n": 1})
+        new = self.insert_tasks([{"priority": 0, "share": 1}, {"priority": 1, "share": 2}])
+
+        self.assertEqual(backfill_assignment(self.mongodb_task), 2)
+        self.assertEqual(backfill_assignment(self.mongodb_task), 0)
+        self.assertEqual(self.mongodb_task.count_documents({"priority": {"$exists": False}}), 2)
+        self.assertEqual([x["_id"] for x in self.rpc.claim("b", 10)], [new[1]] + old + [new[0]])
+        return
+
+    def test_008_executor_refresh(self):
+        """
+        Test for refreshing report time of executors only when it is older than the refresh
+        :return: None
+        """
+        self.mongodb_executor.delete_many({})
+        rpc = RPCService(
+            self.logger, self.mongodb_task, self.mongodb_executor, self.mongodb_blob, self.mongodb_share,
+            executor_refresh=1
+        )
+        rpc.report("a", [], [], 0)
+        report_time = self.mongodb_executor.find_one({"hostname": "a"})["report_time"]
+
+        # Refreshes within the refresh are skipped, by any rpc service
+        oplog = self.client.local["oplog.rs"]
+        operation_time = next(oplog.find().sort("$natural", -1).limit(1))["ts"]
+        rpc.report("a", [], [], 0)
+        RPCService(
+            self.logger, self.mongodb_task, self.mongodb_executor, self.mongodb_blob, self.mongodb_share,
+            executor_refresh=1
+        ).report("a", [], [], 0)
+        self.assertEqual(self.mongodb_executor.find_one({"hostname": "a"})["report_time"], report_time)
+        self.assertEqual(oplog.count_documents(
+            {"ts": {"$gt": operation_time}, "ns": self.mongodb_executor.full_name}
+        ), 0)
+
+        time.sleep(1.1)
+        rpc.report("a", [], [], 0)
+        self.assertGreater(self.mongodb_executor.find_one({"hostname": "a"})["report_time"], report_time)
+        self.assertEqual(self.mongodb_executor.count_documents({}), 1)
+        return
+
+    @classmethod
+    def tearDownClass(cls):
+        """
+        Clean up function
+        :return: None
+        """
+        print("Tearing down environment.\n")
+
+        cls.client.close()
+        # Kill subprocess
+        if cls.mongodb_proc:
+            os.kill(cls.mongodb_proc.pid, signal.SIGINT)
+            cls.mongodb_proc.wait()
+
+        # Remove temp dir
+        shutil.rmtree("mongodb")
+        return
+
+if __name__ == "__main__":
+    unittest.main()
@@ -36,10 +36,11 @@ import subprocess
 import signal
 import time
 import shutil
+import pymongo
 import tracemalloc
 tracemalloc.start()
 
-from utility.mongodb.proxy import generate_local_mongodb_proxy, mongodb_generate_run_command
+from utility.mongodb.proxy import generate_local_mongodb_proxy, mongodb_generate_run_command, reconcile_indexes
 from utility.etcd.proxy import etcd_generate_run_command, EtcdProxy
 from utility.function import get_logger
 
@@ -286,6 +287,42 @@ class TestMongodbProxy(unittest.TestCase):
         )
         return
 
+    def test_005_reconcile_indexes(self):
+        """
+        Test for reconciling indexes of a collection
+        :return: None
+        """
+        cls = self.__class__
+        primary = cls.mongodb2 if cls.mongodb2.is_primary() else cls.mongodb3
+        collection = primary.client["test_db"]["test_index"]
+        collection.create_index("value", name="value")
+        collection.create_index("value", name="kv2_value")
+        collection.create_index("name", name="kv2_name")
+        collection.create_index("time", name="kv2_time")
+
+        # Changed and retired managed indexes are dropped, while undeclared and unmanaged ones are kept
+        reconcile_indexes(
+            collection,
+            [
+                pymongo.IndexModel([("value", pymongo.DESCENDING)], name="kv2_value"),
+                pymongo.IndexModel([("user", pymongo.ASCENDING)], name="kv2_user", unique=True)
+            ],
+            cls.logger,
+            ["kv2_time"]
+        )
+        indexes = collection.index_information()
+        self.assertEqual(set(indexes), {"_id_", "value", "kv2_value", "kv2_name", "kv2_user"})
+        self.assertEqual(indexes["kv2_value"]["key"], [("value", -1)])
+        self.assertEqual(indexes["kv2_user"]["unique"], True)
+
+        # Unmanaged indexes can be neither declared nor retired
+        with self.assertRaises(ValueError):
+            reconcile_indexes(collection, [pymongo.IndexModel([("value", pymongo.ASCENDING)])], cls.logger)
+        with self.assertRaises(ValueError):
+            reconcile_indexes(collection, [], cls.logger, ["value"])
+        self.assertIn("value", collection.index_information())
+        return
+
     @classmethod
     def tearDownClass(cls):
         """
@@ -0,0 +1,274 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+# The MIT License (MIT)
+# Copyright (c) 2020 SBofGaySchoolBuPaAnything
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND,
+# EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF
+# MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT.
+# IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM,
+# DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR
+# OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE
+# OR OTHER DEALINGS IN THE SOFTWARE.
+__author__ = "chenty"
+
+# Add current folder and parent folder into python path
+import os
+os.environ["PYTHONPATH"] = os.environ.get("PYTHONPATH", "") + ":" + os.getcwd()
+os.environ["PYTHONPATH"] += ":" + os.path.dirname(os.getcwd())
+import sys
+sys.path.append(os.getcwd())
+sys.path.append(os.path.dirname(os.getcwd()))
+import unittest
+import multiprocessing
+import time
+
+from rpc.judicator_rpc import Judicator
+from rpc.judicator_rpc.ttypes import *
+from thrift.server import TServer
+from thrift.transport import TSocket, TTransport
+from thrift.protocol import TBinaryProtocol
+
+from utility.rpc import JudicatorPool
+from utility.function import get_logger
+
+
+class RecordingService:
+    """
+    Rpc service recording the calls it receives
+    """
+    def __init__(self, calls, delay):
+        """
+        Initializer of the class
+        :param calls: Queue to put names of received calls into
+        :param delay: Seconds to sleep before returning from cancel and add
+        """
+        self.calls = calls
+        self.delay = delay
+        return
+
+    def ping(self):
+        """
+        Interface: Ping
+        :return: ReturnCode.OK
+        """
+        self.calls.put("ping")
+        return ReturnCode.OK
+
+    def cancel(self, id):
+        """
+        Interface: Cancel
+        :param id: Ignored
+        :return: ReturnCode.OK
+        """
+        self.calls.put("cancel")
+        time.sleep(self.delay)
+        return ReturnCode.OK
+
+    def add(self, task):
+        """
+        Interface: Add
+        :param task: Ignored
+        :return: AddReturn with a fixed id
+        """
+        self.calls.put("add")
+        time.sleep(self.delay)
+        return AddReturn(ReturnCode.OK, "0" * 24)
+
+def serve(port, calls, delay):
+    """
+    Target function of judicator processes
+    :param port: Listen port
+    :param calls: Queue to put names of received calls into
+    :param delay: Seconds to sleep before returning from cancel and add
+    :return: None
+    """
+    TServer.TThreadedServer(
+        Judicator.Processor(RecordingService(calls, delay)),
+        TSocket.TServerSocket("127.0.0.1", port),
+        TTransport.TBufferedTransportFactory(),
+        TBinaryProtocol.TBinaryProtocolFactory(),
+        daemon=True
+    ).serve()
+    return
+
+class StaticEtcd:
+    """
+    Etcd proxy stub returning a fixed judicator list
+    """
+    def __init__(self, judicators):
+        """
+        Initializer of the class
+        :param judicators: Dictionary from judicator names to addresses
+        """
+        self.judicators = judicators
+        return
+
+    def get(self, key):
+        """
+        Get the judicator list
+        :param key: Ignored
+        :return: The judicator list
+        """
+        return self.judicators
+
+
+# Unit test class for utility.rpc.JudicatorPool
+class TestRPC(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        """
+        Initialization function
+        :return: None
+        """
+        cls.logger = get_logger("Test", None, None)
+        return
+
+    def setUp(self):
+        """
+        Initialization function of each test
+        :return: None
+        """
+        # Names are written at once, so that they are not lost when judicators are terminated
+        self.calls = multiprocessing.SimpleQueue()
+        self.judicators = {}
+        return
+
+    def start(self, port, delay=0):
+        """
+        Start a judicator process, replacing the one on the same port
+        :param port: Listen port
+        :param delay: Seconds to sleep before returning from cancel and add
+        :return: None
+        """
+        self.stop(port)
+        self.judicators[port] = multiprocessing.Process(target=serve, args=(port, self.calls, delay))
+        self.judicators[port].start()
+        time.sleep(1)
+        return
+
+    def stop(self, port):
+        """
+        Stop a judicator process, closing all its connections
+        :param port: Listen port
+        :return: None
+        """
+        if port in self.judicators:
+            self.judicators.pop(port).terminate()
+            time.sleep(0.5)
+        return
+
+    def received(self):
+        """
+        Get names of calls received by judicators since the last time
+        :return: List of the names
+        """
+        res = []
+        while not self.calls.empty():
+            res.append(self.calls.get())
+        return res
+
+    def test_000_call(self):
+        """
+        Test for calling and reusing connections
+        :return: None
+        """
+        self.start(4000)
+        pool = JudicatorPool(StaticEtcd({"j": "127.0.0.1:4000"}), "", self.logger)
+        self.assertEqual(pool.call("ping"), ReturnCode.OK)
+        self.assertEqual(pool.call("cancel", "id"), ReturnCode.OK)
+        self.assertEqual(self.received(), ["ping", "cancel"])
+        self.assertEqual(len(pool.idle["127.0.0.1:4000"]), 1)
+
+        with self.assertRaises(Exception):
+            JudicatorPool(StaticEtcd({}), "", self.logger).call("ping")
+        return
+
+    def test_001_failover(self):
+        """
+        Test for trying other judicators when a call fails to be sent
+        :return: None
+        """
+        self.start(4000)
+        pool = JudicatorPool(StaticEtcd({"j0": "127.0.0.1:4000", "j1": "127.0.0.1:4001"}), "", self.logger)
+        for _ in range(10):
+            self.assertEqual(pool.call("add", Task()).result, ReturnCode.OK)
+        self.assertEqual(self.received(), ["add"] * 10)
+
+        # The list is read again once all judicators fail
+        self.stop(4000)
+        with self.assertRaises(Exception):
+            pool.call("ping")
+        self.assertEqual(pool.refresh_time, 0)
+        return
+
+    def test_002_check_idle(self):
+        """
+        Test for checking connections idle for a while before reusing them
+        :return: None
+        """
+        self.start(4000)
+        pool = JudicatorPool(StaticEtcd({"j": "127.0.0.1:4000"}), "", self.logger, check_interval=0)
+        self.assertEqual(pool.call("add", Task()).result, ReturnCode.OK)
+        self.start(4000)
+        self.assertEqual(pool.call("add", Task()).result, ReturnCode.OK)
+        self.assertEqual(self.received(), ["add", "add"])
+        return
+
+    def test_003_retry_closed(self):
+        """
+        Test for retrying calls on a reused connection closed by a restarted judicator
+        :return: None
+        """
+        self.start(4000)
+        pool = JudicatorPool(StaticEtcd({"j": "127.0.0.1:4000"}), "", self.logger)
+        self.assertEqual(pool.call("cancel", "id"), ReturnCode.OK)
+        self.start(4000)
+        self.assertEqual(pool.call("cancel", "id"), ReturnCode.OK)
+        self.assertEqual(self.received(), ["cancel", "cancel"])
+
+        # Calls which must not be carried out twice are not retried
+        self.start(4000)
+        with self.assertRaises(TTransport.TTransportException):
+            pool.call("add", Task())
+        self.assertEqual(self.received(), [])
+        self.assertEqual(pool.call("add", Task()).result, ReturnCode.OK)
+        self.assertEqual(self.received(), ["add"])
+        return
+
+    def test_004_no_retry_timeout(self):
+        """
+        Test for not retrying calls timed out, which are still carried out by the judicator
+        :return: None
+        """
+        self.start(4000, 2)
+        pool = JudicatorPool(StaticEtcd({"j": "127.0.0.1:4000"}), "", self.logger, timeout=1)
+        self.assertEqual(pool.call("ping"), ReturnCode.OK)
+        with self.assertRaises(TTransport.TTransportException):
+            pool.call("cancel", "id")
+        time.sleep(2)
+        self.assertEqual(self.received(), ["ping", "cancel"])
+        return
+
+    def tearDown(self):
+        """
+        Clean up function of each test
+        :return: None
+        """
+        for port in list(self.judicators):
+            self.stop(port)
+        return
+
+if __name__ == "__main__":
+    unittest.main()
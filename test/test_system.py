@@ -184,6 +184,15 @@ class TestSystem(unittest.TestCase):
                     "collection": "executor",
                     "expiration": 15
                 },
+                "blob": {
+                    "database": "judicator",
+                    "collection": "blob"
+                },
+                "share": {
+                    "database": "judicator",
+                    "collection": "share",
+                    "weights": {}
+                },
             }, indent=4))
         with open("config/executor.json", "w") as f:
             f.write(json.dumps({
@@ -300,6 +309,15 @@ class TestSystem(unittest.TestCase):
         self.assertEqual(len(res["tasks"]), 1)
         self.assertEqual(res["tasks"][0]["id"], id)
 
+        # Search with cursor
+        param = {"user": 0, "limit": 1, "cursor": "", "count": "1"}
+        res = json.loads(requests.get("http://localhost:7000/api/task/list", params=param).text)
+        self.assertEqual(res["result"], ReturnCode.OK)
+        self.assertEqual(res["total"], 1)
+        self.assertEqual(len(res["tasks"]), 1)
+        self.assertEqual(res["tasks"][0]["id"], id)
+        self.assertEqual(res["cursor"], None)
+
         # Get details
         res = json.loads(requests.get("http://localhost:7000/api/task", params={"id": id}).text)
         self.assertEqual(res["result"], ReturnCode.OK)
@@ -0,0 +1,194 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+# The MIT License (MIT)
+# Copyright (c) 2020 SBofGaySchoolBuPaAnything
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND,
+# EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF
+# MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT.
+# IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM,
+# DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR
+# OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE
+# OR OTHER DEALINGS IN THE SOFTWARE.
+__author__ = "chenty"
+
+# Add current folder and parent folder into python path
+import os
+os.environ["PYTHONPATH"] = os.environ.get("PYTHONPATH", "") + ":" + os.getcwd()
+os.environ["PYTHONPATH"] += ":" + os.path.dirname(os.getcwd())
+import sys
+sys.path.append(os.getcwd())
+sys.path.append(os.path.dirname(os.getcwd()))
+import unittest
+import datetime
+import random
+import zlib
+import bson
+from bson.int64 import Int64
+from bson.objectid import ObjectId
+
+from utility.task import bson_value_size, task_dict_size, check_task_dict_size, TASK_DICTIONARY_MAX_SIZE, \
+    decompress_chunks, decompress_and_truncate, truncate_zipped
+
+
+# Unit test class for utility.task
+class TestTask(unittest.TestCase):
+    def assert_bson_size(self, value):
+        """
+        Assert that the size of a value is the same as the size of it encoded in a document
+        :param value: The value
+        :return: None
+        """
+        # A document with a single empty key adds 7 bytes to the value, 4 for its size, 1 for the type of the element,
+        # 1 for the end of the key, and 1 for the end of the document
+        self.assertEqual(bson_value_size(value), len(bson.BSON.encode({"": value})) - 7, repr(value))
+        return
+
+    def test_000_bson_scalar_size(self):
+        """
+        Test for size of scalar values
+        :return: None
+        """
+        for value in [
+            None, True, False, 0, 1, -1, 0.5, float("inf"),
+            2 ** 31 - 1, 2 ** 31, -2 ** 31, -2 ** 31 - 1, 2 ** 63 - 1, -2 ** 63, Int64(0), Int64(2 ** 40),
+            "", "abc", "中文", "\U0001f600", "a\nb\tc",
+            b"", b"\x00\xff" * 100, bytes(range(256)),
+            datetime.datetime(2020, 1, 1), datetime.datetime(1900, 1, 1, 12, 30, 15, 123000),
+            ObjectId(), bson.Regex("^a", "i")
+        ]:
+            self.assert_bson_size(value)
+        return
+
+    def test_001_bson_container_size(self):
+        """
+        Test for size of nested dictionaries and lists
+        :return: None
+        """
+        for value in [
+            {}, [], (), [None], [1, 2 ** 31, "x"], list(range(1000)),
+            {"a": 1, "中文": "值", "\U0001f600": [b"\x01", {"k": None}]},
+            {"nested": {"deeper": {"deepest": [[], {}, [[1], [2, [3]]]]}}},
+            {"list": [{"i": i, "s": str(i) * i, "d": datetime.datetime(2020, 1, 1, 0, 0, i)} for i in range(20)]}
+        ]:
+            self.assert_bson_size(value)
+        return
+
+    def test_002_task_dict_size(self):
+        """
+        Test for size of task dictionaries
+        :return: None
+        """
+        task = {
+            "_id": ObjectId(),
+            "user": 0,
+            "priority": 0,
+            "share": 1.5,
+            "compile": {
+                "source": zlib.compress(b"int main() {}"),
+                "command": zlib.compress(b"gcc main.c"),
+                "timeout": 1
+            },
+            "execute": {
+                "input": zlib.compress("输入".encode("utf-8")),
+                "data": None,
+                "data_digest": "0" * 64,
+                "command": zlib.compress(b"./a.out"),
+                "timeout": 2 ** 31,
+                "standard": b""
+            },
+            "requirement": {"cpu": 1, "memory": 2 ** 33, "disk": 0},
+            "done": False,
+            "status": 0,
+            "executor": None,
+            "add_time": datetime.datetime.now().replace(microsecond=0),
+            "report_time": datetime.datetime.now().replace(microsecond=0),
+            "result": {"compile_output": b"", "compile_error": b"", "execute_output": b"", "execute_error": b""}
+        }
+        self.assertEqual(task_dict_size(task), len(bson.BSON.encode(task)))
+        self.assertTrue(check_task_dict_size(task))
+
+        # Sizes close to the limitation
+        task["result"]["execute_output"] = b"\x00" * (TASK_DICTIONARY_MAX_SIZE - task_dict_size(task))
+        self.assertEqual(task_dict_size(task), TASK_DICTIONARY_MAX_SIZE)
+        self.assertEqual(task_dict_size(task), len(bson.BSON.encode(task)))
+        self.assertFalse(check_task_dict_size(task))
+        task["result"]["execute_output"] = task["result"]["execute_output"][1:]
+        self.assertTrue(check_task_dict_size(task))
+        return
+
+    def test_003_decompress_chunks(self):
+        """
+        Test for decompressing zipped strings chunk by chunk
+        :return: None
+        """
+        random.seed(0)
+        for data in [
+            b"",
+            b"a",
+            b"a" * 1000000,
+            bytes(random.getrandbits(8) for _ in range(100000)),
+            "中文\U0001f600".encode("utf-8") * 10000
+        ]:
+            for chunk_size in [1, 7, 4096, 65536]:
+                if chunk_size == 1 and len(data) > 100000:
+                    continue
+                chunks = list(decompress_chunks(zlib.compress(data), chunk_size))
+                self.assertEqual(b"".join(chunks), data)
+                self.assertTrue(all(0 < len(x) <= chunk_size for x in chunks))
+        self.assertEqual(list(decompress_chunks(b"")), [])
+        return
+
+    def test_004_decompress_and_truncate(self):
+        """
+        Test for decompressing and truncating zipped strings
+        :return: None
+        """
+        self.assertEqual(decompress_and_truncate(b""), "")
+        self.assertEqual(decompress_and_truncate(None), "")
+        self.assertEqual(decompress_and_truncate(zlib.compress(b"")), "")
+        for text in [
+            "abc", "a" * 1000, "a" * 1001, "a" * 100000, "中文" * 2000, "\U0001f600" * 2000, "a中\U0001f600" * 999
+        ]:
+            zipped = zlib.compress(text.encode("utf-8"))
+            self.assertEqual(decompress_and_truncate(zipped, False), text)
+            for max_length in [1, 2, 3, 999, 1000, 1001]:
+                res = decompress_and_truncate(zipped, True, max_length)
+                if len(text) > max_length:
+                    self.assertEqual(res, text[: max_length] + "...")
+                else:
+                    self.assertEqual(res, text)
+        self.assertEqual(decompress_and_truncate(zlib.compress(b"a" * 2000)), "a" * 1000 + "...")
+        return
+
+    def test_005_truncate_zipped(self):
+        """
+        Test for truncating zipped strings keeping them zipped
+        :return: None
+        """
+        zipped = zlib.compress("短文本".encode("utf-8"))
+        self.assertIs(truncate_zipped(zipped), zipped)
+        zipped = zlib.compress(("中" * 1000).encode("utf-8"))
+        self.assertIs(truncate_zipped(zipped), zipped)
+        self.assertEqual(truncate_zipped(b""), b"")
+
+        text = "中\U0001f600a" * 1000
+        res = truncate_zipped(zlib.compress(text.encode("utf-8")))
+        self.assertEqual(zlib.decompress(res).decode("utf-8"), text[: 1000] + "...")
+        res = truncate_zipped(zlib.compress(text.encode("utf-8")), 10)
+        self.assertEqual(zlib.decompress(res).decode("utf-8"), text[: 10] + "...")
+        return
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,266 @@
+# -*- coding: utf-8 -*-
+
+# The MIT License (MIT)
+# Copyright (c) 2020 SBofGaySchoolBuPaAnything
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND,
+# EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF
+# MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT.
+# IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM,
+# DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR
+# OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE
+# OR OTHER DEALINGS IN THE SOFTWARE.
+
+__author__ = "chenty"
+
+import collections
+import io
+import os
+from os.path import join
+import shutil
+import tempfile
+import threading
+import zipfile
+
+from utility.task import check_digest
+
+
+def tree_size(path):
+    """
+    Get the total size of all files in a directory
+    :param path: Path to the directory
+    :return: Size in bytes
+    """
+    return sum(os.path.getsize(join(root, f)) for root, _, files in os.walk(path) for f in files)
+
+def link_tree(src, dst, copy=False, owner=None):
+    """
+    Populate a directory with hard links to all files in another directory
+    Files are copied instead if they can not be linked, for example, on different file systems, or if required
+    Created directories and copied files are given to the owner, while linked files keep their owner, as changing it
+    changes the source files too
+    :param src: Source directory
+    :param dst: Destination directory, which must exist
+    :param copy: If files are always copied, for users who are able to write through hard links
+    :param owner: Tuple of uid and gid of the owner of created directories and copied files, None to keep the current
+    :return: None
+    """
+    for root, dirs, files in os.walk(src):
+        target = join(dst, os.path.relpath(root, src))
+        for d in dirs:
+            os.makedirs(join(target, d), exist_ok=True)
+            if owner:
+                os.chown(join(target, d), *owner)
+        for f in files:
+            if not copy:
+                try:
+                    os.link(join(root, f), join(target, f))
+                    continue
+                except OSError:
+                    pass
+            shutil.copy2(join(root, f), join(target, f))
+            if owner:
+                os.chown(join(target, f), *owner)
+    return
+
+class DatasetCache:
+    """
+    Class for a disk cache of extracted zip files, keyed by digests of the zip files
+    Total size of extracted files is bounded, and the least recently used ones not in use are evicted
+    """
+    def __init__(self, path, max_size, logger):
+        """
+        Initializer of the class
+        Datasets left by previous runs in the directory are kept
+        :param path: Directory of the cache
+        :param max_size: Max total size in bytes of the extracted files
+        :param logger: The logger
+        """
+        self.path = path
+        self.max_size = max_size
+        self.logger = logger
+        self.lock = threading.Lock()
+        # Ordered dictionary from digest to size, with the least recently used first
+        self.entries = collections.OrderedDict()
+        # Dictionary from digest to amount of tasks using it
+        self.using = {}
+        self.size = 0
+
+        os.makedirs(path, mode=0o700, exist_ok=True)
+        existing = []
+        for name in os.listdir(path):
+            entry = join(path, name)
+            if check_digest(name) and os.path.isdir(entry):
+                existing.append((os.path.getmtime(entry), name, tree_size(entry)))
+            else:
+                # Partially extracted or unknown files
+                if os.path.isdir(entry):
+                    shutil.rmtree(entry)
+                else:
+                    os.remove(entry)
+        for _, name, size in sorted(existing):
+            self.entries[name] = size
+            self.size += size
+        self.logger.info("Loaded %d datasets of %d bytes in cache." % (len(self.entries), self.size))
+        with self.lock:
+            self.evict()
+        return
+
+    def evict(self):
+        """
+        Evict least recently used datasets not in use until the cache fits in its size
+        The lock must be held by the caller
+        :return: None
+        """
+        for digest in list(self.entries.keys()):
+            if self.size <= self.max_size:
+                break
+            if self.using.get(digest, 0):
+                continue
+            self.size -= self.entries.pop(digest)
+            shutil.rmtree(join(self.path, digest), ignore_errors=True)
+            self.logger.info("Evicted dataset %s from cache." % digest)
+        return
+
+    def acquire(self, digest, fetch):
+        """
+        Get the extracted dataset of a zip file, extracting it if it is not cached
+        The dataset is kept from eviction until it is released
+        :param digest: Digest of the zip file
+        :param fetch: Function returning content of the zip file, only called if it is not cached
+        :return: Path to the directory of extracted files, which must not be modified, nor linked to by users able to
+        modify them
+        """
+        entry = join(self.path, digest)
+        with self.lock:
+            if digest in self.entries:
+                self.entries.move_to_end(digest)
+                self.using[digest] = self.using.get(digest, 0) + 1
+                self.logger.info("Dataset %s hit in cache." % digest)
+                return entry
+
+        # Extract outside the lock into a temp dir, and then move it into place
+        self.logger.info("Dataset %s missed in cache. Extracting." % digest)
+        temp_dir = tempfile.mkdtemp(dir=self.path)
+        try:
+            with zipfile.ZipFile(io.BytesIO(fetch()), "r") as f:
+                f.extractall(temp_dir)
+            size = tree_size(temp_dir)
+            with self.lock:
+                # The same dataset may have been extracted by others at the same time
+                if digest not in self.entries:
+                    os.rename(temp_dir, entry)
+                    self.entries[digest] = size
+                    self.size += size
+                self.entries.move_to_end(digest)
+                self.using[digest] = self.using.get(digest, 0) + 1
+                self.evict()
+        finally:
+            shutil.rmtree(temp_dir, ignore_errors=True)
+        return entry
+
+    def release(self, digest):
+        """
+        Release a dataset acquired before, so that it can be evicted
+        :param digest: Digest of the zip file
+        :return: None
+        """
+        with self.lock:
+            self.using[digest] -= 1
+            if not self.using[digest]:
+                del self.using[digest]
+            self.evict()
+        return
+
+class ResponseCache:
+    """
+    Class for an in-process cache of rendered responses, keyed by strings
+    Total size of responses is bounded, and the least recently used ones are evicted
+    """
+    def __init__(self, max_size):
+        """
+        Initializer of the class
+        :param max_size: Max total size in bytes of the responses
+        """
+        self.max_size = max_size
+        self.lock = threading.Lock()
+        # Ordered dictionary from key to response, with the least recently used first
+        self.entries = collections.OrderedDict()
+        self.size = 0
+        return
+
+    def get(self, key):
+        """
+        Get a cached response
+        :param key: The key
+        :return: The response, or None if not cached
+        """
+        with self.lock:
+            value = self.entries.get(key)
+            if value is not None:
+                self.entries.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        """
+        Cache a response, evicting least recently used ones if necessary
+        Responses larger than the whole cache are not cached
+        :param key: The key
+        :param value: The response in bytes
+        :return: None
+        """
+        if len(value) > self.max_size:
+            return
+        with self.lock:
+            if key in self.entries:
+                self.size -= len(self.entries.pop(key))
+            self.entries[key] = value
+            self.size += len(value)
+            while self.size > self.max_size:
+                _, evicted = self.entries.popitem(last=False)
+                self.size -= len(evicted)
+        return
+
+class UwsgiResponseCache:
+    """
+    Class for a cache of rendered responses shared by all uwsgi workers, kept in a cache of uwsgi
+    Its size and eviction are set by the cache2 option of uwsgi, e.g. with purge_lru
+    """
+    def __init__(self, name):
+        """
+        Initializer of the class
+        An ImportError is raised if not running in uwsgi
+        :param name: Name of the uwsgi cache
+        """
+        import uwsgi
+        self.uwsgi = uwsgi
+        self.name = name
+        return
+
+    def get(self, key):
+        """
+        Get a cached response
+        :param key: The key
+        :return: The response, or None if not cached
+        """
+        return self.uwsgi.cache_get(key, self.name)
+
+    def set(self, key, value):
+        """
+        Cache a response, which is skipped by uwsgi if it is too large
+        :param key: The key
+        :param value: The response in bytes
+        :return: None
+        """
+        self.uwsgi.cache_update(key, value, 0, self.name)
+        return
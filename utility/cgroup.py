@@ -0,0 +1,153 @@
+# -*- coding: utf-8 -*-
+
+# The MIT License (MIT)
+# Copyright (c) 2020 SBofGaySchoolBuPaAnything
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND,
+# EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF
+# MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT.
+# IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM,
+# DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR
+# OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE
+# OR OTHER DEALINGS IN THE SOFTWARE.
+
+__author__ = "chenty"
+
+import os
+from os.path import join
+import signal
+import time
+
+
+# Controllers enabled for cgroups of tasks
+CGROUP_CONTROLLERS = ("cpu", "memory", "pids")
+# Seconds to wait for all processes in a cgroup to exit after being killed
+CGROUP_KILL_TIMEOUT = 5
+
+
+def read_cgroup_file(path, name):
+    """
+    Read an interface file of a cgroup
+    :param path: Path to the cgroup
+    :param name: Name of the file
+    :return: Content of the file
+    """
+    with open(join(path, name), "r") as f:
+        return f.read()
+
+def write_cgroup_file(path, name, value):
+    """
+    Write an interface file of a cgroup
+    :param path: Path to the cgroup
+    :param name: Name of the file
+    :param value: Content to be written
+    :return: None
+    """
+    with open(join(path, name), "w") as f:
+        f.write(value)
+    return
+
+class TaskCGroups:
+    """
+    Class managing a cgroup v2 for each task under a parent cgroup, limiting and accounting its resource usage
+    The parent cgroup must be writable and delegated to the executor, without any process in it
+    """
+    def __init__(self, path, limits, logger):
+        """
+        Initializer of the class
+        Cgroups left by previous runs under the parent cgroup are killed and removed
+        :param path: Path to the parent cgroup, created if not exists
+        :param limits: Dictionary from interface file names to values written into cgroups of tasks, like cpu.max
+        :param logger: The logger
+        """
+        self.path = path
+        self.limits = limits
+        self.logger = logger
+
+        os.makedirs(path, exist_ok=True)
+        for name in os.listdir(path):
+            if os.path.isdir(join(path, name)):
+                self.remove(name)
+        available = read_cgroup_file(path, "cgroup.controllers").split()
+        enabled = [c for c in CGROUP_CONTROLLERS if c in available]
+        write_cgroup_file(path, "cgroup.subtree_control", " ".join("+" + c for c in enabled))
+        self.logger.info("Enabled cgroup controllers %s in %s." % (str(enabled), path))
+        return
+
+    def create(self, name):
+        """
+        Create the cgroup of a task with limits set
+        :param name: Name of the cgroup, the task id
+        :return: Path to the cgroup
+        """
+        path = join(self.path, name)
+        os.mkdir(path)
+        for key, value in self.limits.items():
+            write_cgroup_file(path, key, str(value))
+        return path
+
+    def usage(self, name):
+        """
+        Get resource usage of all processes ever in the cgroup of a task
+        :param name: Name of the cgroup, the task id
+        :return: Tuple, (cpu time in microseconds, peak memory in bytes), None for any one not available
+        """
+        path = join(self.path, name)
+        cpu_time = None
+        for line in read_cgroup_file(path, "cpu.stat").splitlines():
+            key, value = line.split()
+            if key == "usage_usec":
+                cpu_time = int(value)
+        # Peak memory is only available since linux 5.19
+        memory_peak = None
+        if os.path.exists(join(path, "memory.peak")):
+            memory_peak = int(read_cgroup_file(path, "memory.peak"))
+        return cpu_time, memory_peak
+
+    def kill(self, name):
+        """
+        Kill all processes in the cgroup of a task, including those started in new sessions, without waiting for them
+        :param name: Name of the cgroup, the task id
+        :return: None
+        """
+        path = join(self.path, name)
+        if not os.path.isdir(path):
+            return
+        # Kill at once if supported, since linux 5.14, otherwise kill processes one by one
+        if os.path.exists(join(path, "cgroup.kill")):
+            write_cgroup_file(path, "cgroup.kill", "1")
+        else:
+            for pid in read_cgroup_file(path, "cgroup.procs").split():
+                try:
+                    os.kill(int(pid), signal.SIGKILL)
+                except ProcessLookupError:
+                    pass
+        return
+
+    def remove(self, name):
+        """
+        Kill all processes in the cgroup of a task and remove it, if it exists
+        This is blocking as it waits for processes to exit
+        :param name: Name of the cgroup, the task id
+        :return: None
+        """
+        path = join(self.path, name)
+        if not os.path.isdir(path):
+            return
+        self.kill(name)
+        deadline = time.time() + CGROUP_KILL_TIMEOUT
+        while "populated 1" in read_cgroup_file(path, "cgroup.events") and time.time() < deadline:
+            time.sleep(0.01)
+        os.rmdir(path)
+        self.logger.info("Removed cgroup %s." % path)
+        return
@@ -27,6 +27,18 @@ import urllib.parse
 
 import pymongo
 import pymongo.errors
+import pymongo.read_preferences
+
+# Read preferences by their mode names
+READ_PREFERENCES = {
+    "primary": pymongo.read_preferences.Primary,
+    "primaryPreferred": pymongo.read_preferences.PrimaryPreferred,
+    "secondary": pymongo.read_preferences.Secondary,
+    "secondaryPreferred": pymongo.read_preferences.SecondaryPreferred,
+    "nearest": pymongo.read_preferences.Nearest
+}
+# Prefix of names of indexes managed by reconcile_indexes
+INDEX_PREFIX = "kv2_"
 
 
 def mongodb_generate_run_command(mongodb_config):
@@ -48,6 +60,65 @@ def mongodb_generate_run_command(mongodb_config):
         mongodb_config["data_dir"]
     ]
 
+def generate_read_preference(config):
+    """
+    Generate a mongodb read preference from its configuration
+    :param config: Dictionary with the mode, and optionally max_staleness in seconds, which must be at least 90
+    :return: The read preference
+    """
+    if config["mode"] == "primary":
+        return READ_PREFERENCES["primary"]()
+    return READ_PREFERENCES[config["mode"]](max_staleness=config.get("max_staleness", -1))
+
+def reconcile_indexes(collection, indexes, logger, retired=()):
+    """
+    Reconcile indexes of a collection with declared ones
+    Indexes are identified by their names, and only those named with INDEX_PREFIX are managed, so others like ones
+    created by operators are left alone. Managed indexes with changed definition and retired indexes are dropped, and
+    then all missing indexes are created. Undeclared managed indexes are kept, as they may be declared by judicators of
+    other versions during rolling upgrades, so indexes no longer used must be retired, and a changed index must be
+    given a new name, with the old name retired
+    :param collection: The mongodb collection
+    :param indexes: List of declared pymongo.IndexModel, all of which must be named with INDEX_PREFIX
+    :param logger: The logger
+    :param retired: Names of indexes no longer used, which are dropped if exist, all of which must be prefixed with
+    INDEX_PREFIX
+    :return: None
+    """
+    def definition(index):
+        """
+        Get a comparable definition of an index
+        :param index: Index dictionary, either from IndexModel or index_information
+        :return: Tuple, (list of keys, dictionary of options)
+        """
+        keys = index["key"].items() if isinstance(index["key"], dict) else index["key"]
+        keys = [(k, float(d) if isinstance(d, (int, float)) else d) for k, d in keys]
+        options = dict((k, index[k]) for k in ("unique", "sparse", "partialFilterExpression") if index.get(k))
+        return keys, options
+
+    declared = dict((x.document["name"], x) for x in indexes)
+    for name in list(declared) + list(retired):
+        if not name.startswith(INDEX_PREFIX):
+            raise ValueError("Name of index %s is not prefixed with %s." % (name, INDEX_PREFIX))
+    existing = collection.index_information()
+
+    # Drop retired or changed indexes
+    for name, info in existing.items():
+        if name in retired or name in declared and definition(info) != definition(declared[name].document):
+            logger.warning("Dropping index %s of collection %s." % (name, collection.full_name))
+            collection.drop_index(name)
+            existing[name] = None
+
+    # Create missing indexes
+    missing = [x for n, x in declared.items() if not existing.get(n)]
+    if missing:
+        logger.info(
+            "Creating indexes %s of collection %s." % (str([x.document["name"] for x in missing]), collection.full_name)
+        )
+        collection.create_indexes(missing)
+    logger.info("Reconciled indexes of collection %s." % collection.full_name)
+    return
+
 class MongoDBProxy:
     """
     Class representing a mongodb proxy connected to a mongodb instance
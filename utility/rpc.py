@@ -24,13 +24,27 @@
 __author__ = "chenty"
 
 import dateutil.parser
+import errno
 import random
+import threading
+import time
 
 from rpc.judicator_rpc import Judicator
 from rpc.judicator_rpc.ttypes import *
 from thrift.transport import TSocket, TTransport
-from thrift.protocol import TBinaryProtocol
+from thrift.protocol import TBinaryProtocol, TCompactProtocol
 
+# Transport and protocol factories of rpc, server and clients must use the same ones
+TRANSPORT_FACTORIES = {
+    "buffered": TTransport.TBufferedTransportFactory,
+    "framed": TTransport.TFramedTransportFactory
+}
+PROTOCOL_FACTORIES = {
+    "binary": TBinaryProtocol.TBinaryProtocolFactory,
+    "compact": TCompactProtocol.TCompactProtocolFactory
+}
+# Rpc calls which must not be carried out twice, add creates a task and report claims tasks
+NON_IDEMPOTENT_CALLS = ("add", "report")
 
 def extract(task, brief=False, compile=True, execute=True, result=True):
     """
@@ -62,7 +76,8 @@ def extract(task, brief=False, compile=True, execute=True, result=True):
         res["compile"] = {
             "source": task.compile.source,
             "command": task.compile.command,
-            "timeout": task.compile.timeout
+            "timeout": task.compile.timeout,
+            "source_digest": task.compile.source_digest
         }
     else:
         res["compile"] = None
@@ -74,7 +89,8 @@ def extract(task, brief=False, compile=True, execute=True, result=True):
             "data": task.execute.data,
             "command": task.execute.command,
             "timeout": task.execute.timeout,
-            "standard": task.execute.standard
+            "standard": task.execute.standard,
+            "data_digest": task.execute.data_digest
         }
     else:
         res["execute"] = None
@@ -86,10 +102,23 @@ def extract(task, brief=False, compile=True, execute=True, result=True):
             "compile_error": task.result.compile_error,
             "execute_output": task.result.execute_output,
             "execute_error": task.result.execute_error,
+            "cpu_time": task.result.cpu_time,
+            "memory_peak": task.result.memory_peak
         }
     else:
         res["result"] = None
 
+    # Resource requirement
+    if task.requirement:
+        res["requirement"] = {
+            "cpu": task.requirement.cpu,
+            "memory": task.requirement.memory,
+            "disk": task.requirement.disk
+        }
+    else:
+        res["requirement"] = None
+    res["priority"] = task.priority
+
     return res
 
 def generate(task, brief=False, compile=True, execute=True, result=True):
@@ -131,7 +160,8 @@ def generate(task, brief=False, compile=True, execute=True, result=True):
         c = Compile(
             task["compile"]["source"],
             task["compile"]["command"],
-            task["compile"]["timeout"]
+            task["compile"]["timeout"],
+            task["compile"].get("source_digest")
         )
     else:
         c = None
@@ -143,7 +173,8 @@ def generate(task, brief=False, compile=True, execute=True, result=True):
             task["execute"]["data"],
             task["execute"]["command"],
             task["execute"]["timeout"],
-            task["execute"]["standard"]
+            task["execute"]["standard"],
+            task["execute"].get("data_digest")
         )
     else:
         e = None
@@ -154,11 +185,23 @@ def generate(task, brief=False, compile=True, execute=True, result=True):
             task["result"]["compile_output"],
             task["result"]["compile_error"],
             task["result"]["execute_output"],
-            task["result"]["execute_error"]
+            task["result"]["execute_error"],
+            task["result"].get("cpu_time"),
+            task["result"].get("memory_peak")
         )
     else:
         r = None
 
+    # Resource requirement
+    if task.get("requirement"):
+        q = Resource(
+            task["requirement"]["cpu"],
+            task["requirement"]["memory"],
+            task["requirement"]["disk"]
+        )
+    else:
+        q = None
+
     return Task(
             task["id"],
             task["user"],
@@ -169,33 +212,214 @@ def generate(task, brief=False, compile=True, execute=True, result=True):
             task["status"],
             task["executor"],
             report_time,
-            r
+            r,
+            q,
+            task.get("priority")
         )
 
-def select_from_etcd_and_call(func, local_etcd, judicator_path, logger, *args, **kwargs):
+class CountingSocket(TSocket.TSocket):
     """
-    Select a judicator from etcd and call rpc process.
-    :param func: Name of the function
-    :param local_etcd: Etcd proxy
-    :param judicator_path: Path to judicator services on etcd
-    :param logger: Logger object.
-    :return: Return of the rpc call.
+    Socket counting bytes received, to tell whether any response has been received by a failed call
+    It also records whether the last read failed as the connection was closed by the peer, rather than timed out
     """
-    # Get all judicator rpc address and choose one randomly
-    judicator = local_etcd.get(judicator_path)
-    logger.info("Got judicator list %s." % str(judicator))
-    if not judicator:
-        raise Exception("No judicator rpc service detected.")
-    name, address = random.choice(tuple(judicator.items()))
-    host, port = address.split(":")
-    logger.debug("Making %s call to judicator %s at %s" % (func, name, address))
-
-    # Start rpc transport
-    transport = TTransport.TBufferedTransport(TSocket.TSocket(host, int(port)))
-    client = Judicator.Client(TBinaryProtocol.TBinaryProtocol(transport))
-    transport.open()
-    # Call and return
-    res = client.__getattribute__(func)(*args, **kwargs)
-    transport.close()
+    def __init__(self, *args, **kwargs):
+        """
+        Initializer of the class, with the same arguments as TSocket
+        """
+        super().__init__(*args, **kwargs)
+        self.received = 0
+        self.closed_by_peer = False
+        return
 
-    return res
+    def read(self, sz):
+        """
+        Read from the socket, and count bytes read
+        :param sz: Max amount of bytes to read
+        :return: Bytes read
+        """
+        try:
+            buff = super().read(sz)
+        except TTransport.TTransportException as e:
+            # Timeouts are raised with an inner socket.timeout, which has no errno
+            self.closed_by_peer = e.type == TTransport.TTransportException.END_OF_FILE or \
+                isinstance(e.inner, OSError) and e.inner.errno == errno.ECONNRESET
+            raise
+        self.closed_by_peer = False
+        self.received += len(buff)
+        return buff
+
+class JudicatorPool:
+    """
+    Class for a pool of rpc connections to judicators
+    The judicator list on etcd is cached for a while, and connections to judicators are kept open and reused
+    """
+    def __init__(self, local_etcd, judicator_path, logger, ttl=5, check_interval=10, max_idle=4,
+                 transport="buffered", protocol="binary", timeout=60):
+        """
+        Initializer of the class
+        :param local_etcd: Etcd proxy
+        :param judicator_path: Path to judicator services on etcd
+        :param logger: The logger
+        :param ttl: Time in seconds for which the judicator list is cached
+        :param check_interval: Idle time in seconds after which a connection is pinged before being reused
+        :param max_idle: Max amount of idle connections kept for each judicator
+        :param transport: Name of the rpc transport, must be the same as the judicators
+        :param protocol: Name of the rpc protocol, must be the same as the judicators
+        :param timeout: Timeout in seconds of connecting, sending and receiving, which must be longer than reports are
+        held by judicators waiting for new tasks
+        """
+        self.local_etcd = local_etcd
+        self.judicator_path = judicator_path
+        self.logger = logger
+        self.ttl = ttl
+        self.check_interval = check_interval
+        self.max_idle = max_idle
+        self.timeout = timeout
+        self.transport_factory = TRANSPORT_FACTORIES[transport]()
+        self.protocol_factory = PROTOCOL_FACTORIES[protocol]()
+        # Lock for the judicator list and idle connections
+        self.lock = threading.Lock()
+        self.judicators = {}
+        self.refresh_time = 0
+        # Dictionary from judicator address to list of idle connections, (transport, client, socket, last used time)
+        self.idle = {}
+        return
+
+    def get_judicators(self):
+        """
+        Get the judicator list, from etcd if the cached one has expired
+        :return: Dictionary from judicator names to addresses
+        """
+        with self.lock:
+            if time.time() - self.refresh_time < self.ttl:
+                return self.judicators
+        judicators = self.local_etcd.get(self.judicator_path) or {}
+        self.logger.info("Got judicator list %s." % str(judicators))
+        with self.lock:
+            self.judicators = judicators
+            self.refresh_time = time.time()
+            # Close connections to judicators which no longer exist
+            addresses = set(judicators.values())
+            for address in [x for x in self.idle if x not in addresses]:
+                self.discard(address)
+        return judicators
+
+    def discard(self, address):
+        """
+        Close all idle connections to a judicator
+        The lock must be held by the caller
+        :param address: Address of the judicator
+        :return: None
+        """
+        for transport, _, _, _ in self.idle.pop(address, []):
+            transport.close()
+        return
+
+    def acquire(self, address, fresh=False):
+        """
+        Get an idle connection to a judicator, or open a new one
+        Connections idle for too long are checked by ping before being returned
+        :param address: Address of the judicator
+        :param fresh: If a new connection must be opened
+        :return: Tuple, (transport, client, socket, if it is reused without being checked)
+        """
+        while not fresh:
+            with self.lock:
+                connection = self.idle.get(address, []).pop() if self.idle.get(address) else None
+            if connection is None:
+                break
+            transport, client, rpc_socket, last_used = connection
+            if time.time() - last_used < self.check_interval:
+                return transport, client, rpc_socket, True
+            try:
+                client.ping()
+                return transport, client, rpc_socket, False
+            except:
+                self.logger.warning("Discarded broken connection to judicator at %s." % address, exc_info=True)
+                transport.close()
+
+        # Open a new connection
+        host, port = address.split(":")
+        rpc_socket = CountingSocket(host, int(port))
+        # Calls fail instead of hanging if the judicator does not respond, e.g. with all threads of its pool busy
+        rpc_socket.setTimeout(self.timeout * 1000)
+        transport = self.transport_factory.getTransport(rpc_socket)
+        client = Judicator.Client(self.protocol_factory.getProtocol(transport))
+        transport.open()
+        return transport, client, rpc_socket, False
+
+    def release(self, address, transport, client, rpc_socket):
+        """
+        Return a connection to the pool, or close it if there are enough idle connections
+        :param address: Address of the judicator
+        :param transport: Transport of the connection
+        :param client: Client of the connection
+        :param rpc_socket: Socket of the connection
+        :return: None
+        """
+        with self.lock:
+            idle = self.idle.setdefault(address, [])
+            if len(idle) < self.max_idle:
+                idle.append((transport, client, rpc_socket, time.time()))
+                return
+        transport.close()
+        return
+
+    def call(self, func, *args, **kwargs):
+        """
+        Call rpc process on a randomly selected judicator
+        If the request fails to be sent, another judicator is tried
+        If the response fails to be received, the error is raised as the request may have been processed
+        Unless a reused connection is closed by the judicator before anything is received, which is likely a restarted
+        judicator, as sending to it still succeeds, and then the call is tried again on a new connection
+        Calls which must not be carried out twice are never tried again, nor calls timed out, which may still be queued
+        on the judicator
+        :param func: Name of the function
+        :return: Return of the rpc call
+        """
+        judicators = list(self.get_judicators().items())
+        if not judicators:
+            raise Exception("No judicator rpc service detected.")
+        random.shuffle(judicators)
+
+        error = None
+        for name, address in judicators:
+            fresh = False
+            while True:
+                self.logger.debug("Making %s call to judicator %s at %s" % (func, name, address))
+                transport = None
+                try:
+                    transport, client, rpc_socket, reused = self.acquire(address, fresh)
+                    client.__getattribute__("send_" + func)(*args, **kwargs)
+                except Exception as e:
+                    if transport:
+                        transport.close()
+                    self.logger.warning(
+                        "Failed to send %s call to judicator %s at %s." % (func, name, address), exc_info=True
+                    )
+                    error = e
+                    break
+                received = rpc_socket.received
+                try:
+                    res = client.__getattribute__("recv_" + func)()
+                except:
+                    transport.close()
+                    if not (reused and rpc_socket.received == received and rpc_socket.closed_by_peer and
+                            func not in NON_IDEMPOTENT_CALLS):
+                        raise
+                    self.logger.warning(
+                        "Reused connection to judicator %s at %s is closed. Retrying %s call on a new connection." %
+                        (name, address, func), exc_info=True
+                    )
+                    # Other idle connections to the judicator are likely closed as well
+                    with self.lock:
+                        self.discard(address)
+                    fresh = True
+                    continue
+                self.release(address, transport, client, rpc_socket)
+                return res
+
+        # All judicators failed, the list may be out of date, so refresh it next time
+        with self.lock:
+            self.refresh_time = 0
+        raise error
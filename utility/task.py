@@ -24,8 +24,13 @@
 __author__ = "chenty"
 
 import zlib
+import codecs
 import bson
+from bson.objectid import ObjectId
+from bson.int64 import Int64
+import datetime
 import re
+import hashlib
 
 
 # Status of a task
@@ -44,6 +49,28 @@ TASK_STATUS = {
 # Max size of a task dictionary
 TASK_DICTIONARY_MAX_SIZE = 16252928
 
+# Resources of executors which can be required by tasks, cpu in cores, memory and disk in bytes
+TASK_RESOURCES = ("cpu", "memory", "disk")
+
+# Files of a task which can be downloaded, from names to paths of fields and of digests of blobs in task dictionaries
+# Zip files are kept in the blob store if only their digests are kept in tasks, and others are zipped by zlib
+TASK_FILES = {
+    "compile_source": ("compile.source", "compile.source_digest"),
+    "execute_data": ("execute.data", "execute.data_digest"),
+    "compile_command": ("compile.command", None),
+    "execute_input": ("execute.input", None),
+    "execute_command": ("execute.command", None),
+    "execute_standard": ("execute.standard", None),
+    "compile_output": ("result.compile_output", None),
+    "compile_error": ("result.compile_error", None),
+    "execute_output": ("result.execute_output", None),
+    "execute_error": ("result.execute_error", None)
+}
+# Size of chunks when decompressing files for streaming
+DECOMPRESS_CHUNK_SIZE = 65536
+# Max length in characters of truncated text
+TRUNCATE_MAX_LENGTH = 1000
+
 def transform_id(f):
     """
     Transform the _id (ObjectId) field to a id field (String) inside a json
@@ -55,13 +82,52 @@ def transform_id(f):
     return
 
 
+def bson_value_size(value):
+    """
+    Get the size of a value when it is encoded as a bson element, excluding the type byte and the key
+    The size is computed from lengths of fields, without encoding the value
+    :param value: The value
+    :return: The size in bytes
+    """
+    if isinstance(value, bool):
+        return 1
+    # Int64 is always encoded in 8 bytes, even if it fits in 4
+    if isinstance(value, Int64):
+        return 8
+    if isinstance(value, int):
+        return 4 if -2 ** 31 <= value < 2 ** 31 else 8
+    if isinstance(value, (float, datetime.datetime)):
+        return 8
+    if value is None:
+        return 0
+    if isinstance(value, str):
+        return len(value.encode("utf-8")) + 5
+    if isinstance(value, bytes):
+        return len(value) + 5
+    if isinstance(value, ObjectId):
+        return 12
+    if isinstance(value, dict):
+        return sum(len(str(k).encode("utf-8")) + 2 + bson_value_size(v) for k, v in value.items()) + 5
+    if isinstance(value, (list, tuple)):
+        return sum(len(str(i)) + 2 + bson_value_size(v) for i, v in enumerate(value)) + 5
+    # Other types are rare in a task, and are measured by encoding them in an empty document
+    return len(bson.BSON.encode({"": value})) - 7
+
+def task_dict_size(task):
+    """
+    Get the size of a task dictionary when it is stored
+    :param task: The task dictionary
+    :return: The size in bytes
+    """
+    return bson_value_size(task)
+
 def check_task_dict_size(task):
     """
     Check whether a task dictionary is larger than the limitation
     :param task: The task dictionary
     :return: The result
     """
-    return len(bson.BSON.encode(task)) < TASK_DICTIONARY_MAX_SIZE
+    return task_dict_size(task) < TASK_DICTIONARY_MAX_SIZE
 
 def check_id(id):
     """
@@ -71,6 +137,22 @@ def check_id(id):
     """
     return bool(re.match(r"^[a-f0-9]{24}$", id))
 
+def check_digest(digest):
+    """
+    Check whether a blob digest is valid
+    :param digest: The digest
+    :return: The result
+    """
+    return isinstance(digest, str) and bool(re.match(r"^[a-f0-9]{64}$", digest))
+
+def blob_digest(data):
+    """
+    Calculate the digest of a blob, by which it is stored
+    :param data: Binary content of the blob
+    :return: Hex string of the SHA-256 digest
+    """
+    return hashlib.sha256(data).hexdigest()
+
 def check_int(x):
     """
     Check whether a int is valid
@@ -79,7 +161,48 @@ def check_int(x):
     """
     return 0 <= x <= 2147483647
 
-def decompress_and_truncate(zipped, truncate=True, max_length=1000):
+def check_resource(resource):
+    """
+    Check whether a resource dictionary, the requirement of a task or the capacity of an executor, is valid
+    :param resource: The resource dictionary
+    :return: The result
+    """
+    return all(
+        isinstance(resource.get(k), int) and 0 <= resource[k] < 2 ** 63 for k in TASK_RESOURCES
+    ) and check_int(resource["cpu"])
+
+def get_path(d, path):
+    """
+    Get a value in nested dictionaries by a dotted path
+    :param d: The dictionary
+    :param path: The dotted path, like result.execute_output
+    :return: The value, or None if any part of the path does not exist
+    """
+    for key in path.split("."):
+        if not isinstance(d, dict):
+            return None
+        d = d.get(key)
+    return d
+
+def decompress_chunks(zipped, chunk_size=DECOMPRESS_CHUNK_SIZE):
+    """
+    Decompress a string zipped by zlib chunk by chunk, without holding the whole decompressed string in memory
+    :param zipped: Zipped string
+    :param chunk_size: Max size of each chunk
+    :return: Generator of decompressed chunks
+    """
+    decompressor = zlib.decompressobj()
+    while zipped:
+        chunk = decompressor.decompress(zipped, chunk_size)
+        if chunk:
+            yield chunk
+        zipped = decompressor.unconsumed_tail
+    chunk = decompressor.flush()
+    if chunk:
+        yield chunk
+    return
+
+def decompress_and_truncate(zipped, truncate=True, max_length=TRUNCATE_MAX_LENGTH):
     """
     Decompress a string zipped by zlib and truncate it
     :param zipped: Zipped string
@@ -87,7 +210,26 @@ def decompress_and_truncate(zipped, truncate=True, max_length=1000):
     :param max_length: Specified length
     :return:
     """
-    res = zlib.decompress(zipped).decode("utf-8") if zipped else ""
-    if truncate and len(res) > max_length:
+    if not zipped:
+        return ""
+    if not truncate:
+        return zlib.decompress(zipped).decode("utf-8")
+    # Only decompress the prefix needed, as a character takes at most 4 bytes in utf-8
+    # A character cut at the end of the prefix is left in the incremental decoder
+    prefix = zlib.decompressobj().decompress(zipped, (max_length + 1) * 4)
+    res = codecs.getincrementaldecoder("utf-8")().decode(prefix)
+    if len(res) > max_length:
         res = res[: max_length] + "..."
     return res
+
+def truncate_zipped(zipped, max_length=TRUNCATE_MAX_LENGTH):
+    """
+    Truncate a string zipped by zlib, keeping it zipped
+    :param zipped: Zipped string
+    :param max_length: Specified length
+    :return: Zipped truncated string, or the original one if it is not longer than the length
+    """
+    res = decompress_and_truncate(zipped, True, max_length)
+    if len(res) <= max_length:
+        return zipped
+    return zlib.compress(res.encode("utf-8"))
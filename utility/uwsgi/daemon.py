@@ -76,6 +76,9 @@ def run(module_name="Gateway", uwsgi_conf_path="config/uwsgi.json"):
         "threads": config["uwsgi"]["threads"],
         "master": config["uwsgi"]["master"]
     }
+    # Cache shared by all workers
+    if "cache2" in config["uwsgi"]:
+        ini["uwsgi"]["cache2"] = config["uwsgi"]["cache2"]
     with open(config["uwsgi"]["exe"][-1], "w") as f:
         ini.write(f)
     daemon_logger.info("Generated ini file for uwsgi.")